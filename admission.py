@@ -0,0 +1,173 @@
+"""
+Admission control for the API
+Bounds how many DB-bound requests run at once, sheds load early when the
+queue would not drain before a request's deadline, and rate limits each
+client with a token bucket.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+
+class Overloaded(Exception):
+    """Raised when a request is rejected; carries the suggested Retry-After"""
+
+    def __init__(self, reason, retry_after, status_code=503):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst` tokens"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self):
+        """Take one token; returns seconds to wait if none is available, else 0"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    """Per-client token buckets, bounded to the most recently seen clients"""
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+
+    def check(self, client_key):
+        bucket = self.buckets.get(client_key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self.buckets[client_key] = bucket
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(client_key)
+
+        wait = bucket.try_acquire()
+        if wait:
+            raise Overloaded("Too many requests from this client", wait, status_code=429)
+
+
+class ConcurrencyLimiter:
+    """Limits in-flight requests for one route class with a bounded wait queue
+
+    A request is rejected immediately when the queue is full, or when the
+    expected wait (queue length x average service time / slots) already
+    exceeds its deadline, so admitted requests keep a stable latency.
+    """
+
+    def __init__(self, name, max_concurrent, max_queue, queue_timeout):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self.active = 0
+        # Exponentially weighted average of handler time, seeded optimistically
+        self.avg_service_time = 0.05
+        # Created lazily so it binds to the server's running event loop
+        self._semaphore = None
+
+    def _expected_wait(self):
+        return (self.waiting + 1) * self.avg_service_time / self.max_concurrent
+
+    async def acquire(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        if not self._semaphore.locked() and not self.waiting:
+            # Free slot and nobody queued: acquire() returns without suspending
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                raise Overloaded(f"{self.name} queue is full", self._expected_wait())
+            if self._expected_wait() > self.queue_timeout:
+                raise Overloaded(f"{self.name} queue wait exceeds deadline", self._expected_wait())
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise Overloaded(f"{self.name} queue wait exceeded deadline", self._expected_wait())
+            finally:
+                self.waiting -= 1
+        self.active += 1
+
+    def release(self, service_time):
+        self.active -= 1
+        self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * service_time
+        self._semaphore.release()
+
+
+class AdmissionController:
+    """Route-class concurrency limits plus per-client rate limiting"""
+
+    def __init__(self):
+        self.client_limiter = ClientRateLimiter(
+            rate=float(os.getenv('ADMISSION_CLIENT_RATE', 20)),
+            burst=float(os.getenv('ADMISSION_CLIENT_BURST', 40))
+        )
+        queue_timeout = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 2.0))
+        # Listing is cheap; detail pages load full version history and writes
+        # hold a connection longer, so they get a separate, smaller pool
+        self.limiters = {
+            'list': ConcurrencyLimiter(
+                'list',
+                max_concurrent=int(os.getenv('ADMISSION_LIST_CONCURRENCY', 16)),
+                max_queue=int(os.getenv('ADMISSION_LIST_QUEUE', 64)),
+                queue_timeout=queue_timeout
+            ),
+            'detail': ConcurrencyLimiter(
+                'detail',
+                max_concurrent=int(os.getenv('ADMISSION_DETAIL_CONCURRENCY', 8)),
+                max_queue=int(os.getenv('ADMISSION_DETAIL_QUEUE', 32)),
+                queue_timeout=queue_timeout
+            ),
+        }
+
+    @staticmethod
+    def classify(method, path):
+        """Map a request to a route class, or None if it does not touch the DB"""
+        if path == '/projects' and method == 'GET':
+            return 'list'
+        if path.startswith('/projects') or path.startswith('/versions'):
+            return 'detail'
+        return None
+
+    def check_client(self, client_key):
+        """Charge the client's rate limit, raising Overloaded (429) when exceeded"""
+        self.client_limiter.check(client_key)
+
+    async def run(self, route_class, call):
+        """Take a route-class slot and run `call`, raising Overloaded on rejection
+
+        The client limit is checked separately, before any request
+        coalescing, so every client is charged for its own requests.
+        """
+        limiter = self.limiters[route_class]
+        await limiter.acquire()
+        start_time = time.monotonic()
+        try:
+            return await call()
+        finally:
+            limiter.release(time.monotonic() - start_time)
+
+
+admission = AdmissionController()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+End-to-end HTTP benchmark for the API
+Seeds a local MySQL database with a synthetic catalog, drives the main routes
+at a fixed concurrency and reports throughput and p50/p95/p99 latency per
+route as JSON, optionally comparing against a previous run.
+
+Typical use:
+    python benchmark.py seed                       # once, against a local DB
+    python benchmark.py run --start-server -o new.json --compare baseline.json
+    python benchmark.py clean
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import aiohttp
+
+from content_codec import compress_content
+from database import db
+
+BENCH_PREFIX = "bench-"
+# Versions created by the POST scenario end with this suffix
+CREATED_SUFFIX = "-bench"
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+WORDS = ("fix", "add", "support", "improve", "remove", "update", "crash", "render",
+         "cache", "router", "build", "config", "types", "docs", "performance")
+
+
+def fake_release_notes(rng, paragraphs):
+    """Markdown shaped like translated release notes"""
+    lines = []
+    for _ in range(paragraphs):
+        lines.append(f"### {' '.join(rng.choices(WORDS, k=3)).title()}")
+        for _ in range(rng.randint(3, 8)):
+            lines.append(f"- {' '.join(rng.choices(WORDS, k=rng.randint(6, 16)))}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def seed(projects, versions_per_project):
+    """Insert a synthetic catalog of bench-* projects with their versions"""
+    if db.host not in LOCAL_HOSTS and not os.getenv('BENCH_ALLOW_REMOTE'):
+        print(f"Refusing to seed non-local database {db.host} (set BENCH_ALLOW_REMOTE=1 to override)")
+        return False
+    if not db.connect():
+        print("Failed to connect to database")
+        return False
+
+    rng = random.Random(42)
+    try:
+        start_time = time.time()
+        for p in range(projects):
+            slug = f"{BENCH_PREFIX}project-{p}"
+            latest = date(2025, 1, 1) - timedelta(days=p)
+            db.execute_query(
+                "INSERT INTO projects (icon, name, slug, latest_version, latest_update_time, `describe`, summar, author, type) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                ("PKG", slug, slug, f"v{versions_per_project}.0.0", latest,
+                 "Synthetic benchmark project", "Benchmark", "bench", "Tool")
+            )
+            project_id = db.execute_query("SELECT id FROM projects WHERE slug = %s", (slug,))[0]['id']
+
+            # Insert versions with multi-row VALUES to keep seeding fast
+            rows = []
+            for v in range(versions_per_project):
+                rows.append((project_id, f"v{v}.0.0", latest - timedelta(days=7 * (versions_per_project - v)),
+                             compress_content(fake_release_notes(rng, rng.randint(1, 6))), f"https://example.com/{slug}/v{v}.0.0.zip"))
+            for i in range(0, len(rows), 100):
+                chunk = rows[i:i + 100]
+                placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(chunk))
+                db.execute_query(
+                    f"INSERT INTO versions (project_id, version, update_time, content, download_url) VALUES {placeholders}",
+                    tuple(value for row in chunk for value in row)
+                )
+        print(f"Seeded {projects} projects x {versions_per_project} versions in {time.time() - start_time:.2f} seconds")
+        return True
+    finally:
+        db.disconnect()
+
+
+def clean():
+    """Remove everything created by seed() and by the write scenarios"""
+    if not db.connect():
+        print("Failed to connect to database")
+        return False
+    try:
+        # Versions are removed by the ON DELETE CASCADE foreign key
+        db.execute_query("DELETE FROM projects WHERE slug LIKE %s", (f"{BENCH_PREFIX}%",))
+        print("Removed benchmark projects")
+        return True
+    finally:
+        db.disconnect()
+
+
+def remove_created_versions():
+    """Delete the versions the POST scenario added to the bench projects"""
+    if not db.connect():
+        print("Failed to connect to database")
+        return False
+    try:
+        db.execute_query(
+            "DELETE v FROM versions v JOIN projects p ON p.id = v.project_id "
+            "WHERE p.slug LIKE %s AND v.version LIKE %s",
+            (f"{BENCH_PREFIX}%", f"%{CREATED_SUFFIX}")
+        )
+        return True
+    finally:
+        db.disconnect()
+
+
+def load_targets():
+    """Collect the projects and versions (id, project, version, date, URL) of the seeded catalog"""
+    if not db.connect():
+        raise RuntimeError("Failed to connect to database")
+    try:
+        projects = db.execute_query(
+            "SELECT id, slug FROM projects WHERE slug LIKE %s ORDER BY id", (f"{BENCH_PREFIX}%",)
+        ) or []
+        if not projects:
+            raise RuntimeError("No benchmark projects found, run `python benchmark.py seed` first")
+        project_ids = [p['id'] for p in projects]
+        versions = [
+            {'id': row[0], 'project_id': row[1], 'version': row[2], 'update_time': row[3].isoformat(), 'download_url': row[4]}
+            for row in db.iter_query(
+                "SELECT id, project_id, version, update_time, download_url FROM versions "
+                f"WHERE project_id IN ({', '.join(['%s'] * len(project_ids))})",
+                tuple(project_ids), row_type='tuple'
+            )
+        ]
+        return projects, versions
+    finally:
+        db.disconnect()
+
+
+def build_scenarios(projects, versions, include_writes):
+    """Map route name -> function(rng) returning (method, path, params, json)"""
+    total_pages = max(1, len(projects) // 10)
+    scenarios = {
+        "GET /projects?page=1": lambda rng: ("GET", "/projects", {"page": 1, "per_page": 10}, None),
+        "GET /projects?page=mid": lambda rng: ("GET", "/projects", {"page": max(1, total_pages // 2), "per_page": 10}, None),
+        "GET /projects?page=last": lambda rng: ("GET", "/projects", {"page": total_pages, "per_page": 10}, None),
+        "GET /projects/{id}": lambda rng: ("GET", f"/projects/{rng.choice(projects)['id']}", None, None),
+        "GET /projects/{slug}": lambda rng: ("GET", f"/projects/{rng.choice(projects)['slug']}", None, None),
+        "GET /projects/{id}/versions": lambda rng: ("GET", f"/projects/{rng.choice(projects)['id']}/versions", None, None),
+    }
+    if include_writes:
+        def create_version(rng):
+            project = rng.choice(projects)
+            return ("POST", "/versions", None, {
+                "project_id": project['id'],
+                "version": f"v0.0.{rng.randint(0, 10 ** 9)}{CREATED_SUFFIX}",
+                "update_time": "2000-01-01",
+                "content": fake_release_notes(rng, 2),
+                "download_url": "https://example.com/bench.zip"
+            })
+        scenarios["POST /versions"] = create_version
+        # Updates only touch rows from the seeded catalog and write back each
+        # row's own version, date and URL, so the catalog stays comparable
+        # between runs; only the content changes
+        def update_version(rng):
+            version = rng.choice(versions)
+            return ("PUT", f"/versions/{version['id']}", None, {
+                "project_id": version['project_id'],
+                "version": version['version'],
+                "update_time": version['update_time'],
+                "content": fake_release_notes(rng, 2),
+                "download_url": version['download_url']
+            })
+        scenarios["PUT /versions/{id}"] = update_version
+    return scenarios
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_scenario(session, base_url, make_request, concurrency, duration, seed_value):
+    """Keep `concurrency` requests in flight for `duration` seconds"""
+    latencies = []
+    status_counts = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            method, path, params, body = make_request(rng)
+            start = time.perf_counter()
+            try:
+                async with session.request(method, base_url + path, params=params, json=body) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError:
+                status = "error"
+            latencies.append((time.perf_counter() - start) * 1000)
+            status_counts[status] = status_counts.get(status, 0) + 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start_time
+
+    latencies.sort()
+    ok = sum(count for status, count in status_counts.items() if isinstance(status, int) and status < 400)
+    return {
+        "requests": len(latencies),
+        "ok": ok,
+        "status_counts": {str(k): v for k, v in sorted(status_counts.items(), key=lambda kv: str(kv[0]))},
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0,
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+    }
+
+
+async def run_benchmark(base_url, concurrency, duration, warmup, include_writes, only):
+    # Start from the seeded catalog alone, even if an earlier run was interrupted
+    remove_created_versions()
+    projects, versions = load_targets()
+    scenarios = build_scenarios(projects, versions, include_writes)
+    if only:
+        scenarios = {name: fn for name, fn in scenarios.items() if any(o in name for o in only)}
+
+    results = {}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for index, (name, make_request) in enumerate(scenarios.items()):
+            if warmup:
+                await run_scenario(session, base_url, make_request, concurrency, warmup, index)
+            print(f"Running {name} ({concurrency} concurrent, {duration}s)...")
+            results[name] = await run_scenario(session, base_url, make_request, concurrency, duration, index)
+            r = results[name]
+            print(f"  {r['throughput_rps']} req/s, p50 {r['p50_ms']} ms, p95 {r['p95_ms']} ms, p99 {r['p99_ms']} ms, status {r['status_counts']}")
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "base_url": base_url,
+            "concurrency": concurrency,
+            "duration_seconds": duration,
+            "projects": len(projects),
+            "versions": len(versions),
+        },
+        "routes": results,
+    }
+
+
+def compare(current, baseline, max_regression):
+    """Print per-route deltas; returns False if any route regressed too much"""
+    passed = True
+    print(f"\n{'route':32} {'rps (delta)':>20} {'p99 ms (delta)':>21}")
+    for name, r in current["routes"].items():
+        b = baseline.get("routes", {}).get(name)
+        if not b:
+            print(f"{name:32} {'(no baseline)':>18}")
+            continue
+        rps_delta = (r["throughput_rps"] - b["throughput_rps"]) / b["throughput_rps"] * 100 if b["throughput_rps"] else 0
+        p99_delta = (r["p99_ms"] - b["p99_ms"]) / b["p99_ms"] * 100 if b.get("p99_ms") and r.get("p99_ms") else 0
+        regressed = rps_delta < -max_regression or p99_delta > max_regression
+        passed = passed and not regressed
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{name:32} {r['throughput_rps']:>9} ({rps_delta:+6.1f}%) {r['p99_ms']:>10} ({p99_delta:+6.1f}%){marker}")
+    return passed
+
+
+def start_server(port):
+    """Start uvicorn on main:app with per-client rate limiting relaxed"""
+    env = dict(os.environ, ADMISSION_CLIENT_RATE="1000000", ADMISSION_CLIENT_BURST="1000000")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    async def wait_ready():
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                try:
+                    async with session.get(base_url + "/") as response:
+                        if response.status == 200:
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.1)
+        raise RuntimeError("Server did not start")
+
+    asyncio.run(wait_ready())
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load-testing benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = sub.add_parser("seed", help="seed the local database with a synthetic catalog")
+    seed_parser.add_argument("--projects", type=int, default=200)
+    seed_parser.add_argument("--versions", type=int, default=50, help="versions per project")
+
+    sub.add_parser("clean", help="remove seeded benchmark data")
+
+    run_parser = sub.add_parser("run", help="run the benchmark")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--start-server", action="store_true", help="start uvicorn for the run")
+    run_parser.add_argument("--port", type=int, default=8765)
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--duration", type=float, default=10, help="seconds per route")
+    run_parser.add_argument("--warmup", type=float, default=2, help="warm-up seconds per route")
+    run_parser.add_argument("--no-writes", action="store_true", help="skip POST/PUT scenarios")
+    run_parser.add_argument("--only", nargs="*", help="only routes whose name contains one of these")
+    run_parser.add_argument("-o", "--output", default="bench_results.json")
+    run_parser.add_argument("--compare", help="baseline JSON from a previous run")
+    run_parser.add_argument("--max-regression", type=float, default=10.0,
+                            help="allowed throughput drop / p99 increase in percent")
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        return 0 if seed(args.projects, args.versions) else 1
+    if args.command == "clean":
+        return 0 if clean() else 1
+
+    server = None
+    base_url = args.base_url
+    try:
+        if args.start_server:
+            server, base_url = start_server(args.port)
+        results = asyncio.run(run_benchmark(
+            base_url, args.concurrency, args.duration, args.warmup, not args.no_writes, args.only
+        ))
+    finally:
+        # Rows created by POST would make every later run read a bigger catalog
+        if not args.no_writes:
+            remove_created_versions()
+        if server:
+            server.terminate()
+            server.wait()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.max_regression):
+            print("\nBenchmark regression detected")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,13 +27,6 @@ def clean_pre_releases():
             project_name = project['name']
             print(f"\nProcessing project: {project_name}")
             
-            # Get all versions for this project
-            versions = db.execute_query("SELECT id, version FROM versions WHERE project_id = %s", (project_id,))
-            
-            if not versions:
-                print("  No versions found")
-                continue
-            
             # Identify pre-releases
             pre_release_patterns = [
                 r'.*-canary\..*',
@@ -47,10 +40,8 @@ def clean_pre_releases():
             
             to_delete = []
             
-            for v in versions:
-                version = v['version']
-                version_id = v['id']
-                
+            # Stream versions as compact tuples; only matches are kept in memory
+            for version_id, version in db.iter_query("SELECT id, version FROM versions WHERE project_id = %s", (project_id,), row_type='tuple'):
                 # Check if it matches any pre-release pattern
                 for pattern in pre_release_patterns:
                     if re.match(pattern, version, re.IGNORECASE):
@@ -0,0 +1,97 @@
+"""
+Single-flight request coalescing
+Concurrent identical reads share one in-flight execution: the first caller
+for a key starts the work as a detached task and every caller that arrives
+while it is running awaits the same result instead of repeating the DB
+fetch. Callers wait behind a shield, so a disconnecting caller (leader or
+not) never aborts the work the others are waiting for.
+"""
+
+import asyncio
+
+from starlette.datastructures import QueryParams
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share the same key"""
+
+    def __init__(self):
+        self.in_flight = {}
+        self.shared_count = 0
+
+    async def do(self, key, call):
+        """Run `call` for `key`, or join the execution already in flight"""
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.shared_count += 1
+        else:
+            task = asyncio.ensure_future(call())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        # Later requests start a fresh fetch; only overlapping ones coalesce
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        if not task.cancelled():
+            # Mark retrieved so an exception without waiters is not logged
+            task.exception()
+
+
+class CoalesceMiddleware:
+    """ASGI middleware serving identical concurrent GETs from one execution
+
+    classify(method, path) picks the requests to coalesce (None passes a
+    request through) and admit(route_class, call) runs the shared fetch
+    under route admission, so each group takes a single slot. The fetch
+    calls the app with its own receive/send channels rather than the first
+    caller's, so it does not depend on that caller's connection.
+    """
+
+    def __init__(self, app, flight, classify, admit):
+        self.app = app
+        self.flight = flight
+        self.classify = classify
+        self.admit = admit
+
+    async def __call__(self, scope, receive, send):
+        route_class = None
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            route_class = self.classify(scope['method'], scope['path'])
+        if route_class is None:
+            return await self.app(scope, receive, send)
+
+        key = request_key(scope['method'], scope['path'], QueryParams(scope['query_string']))
+        status, headers, body = await self.flight.do(key, lambda: self.admit(route_class, lambda: self._fetch(scope)))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _fetch(self, scope):
+        """Run the app for a body-less GET and buffer its response"""
+        request_sent = False
+        response = {'status': 500, 'headers': [], 'body': []}
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # The detached request never disconnects
+            await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = message.get('headers', [])
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        await self.app(dict(scope), receive, send)
+        return response['status'], response['headers'], b''.join(response['body'])
+
+
+def request_key(method, path, query_params):
+    """Build a coalescing key from the route and its normalized query string"""
+    query = '&'.join(f"{k}={v}" for k, v in sorted(query_params.multi_items()))
+    return f"{method} {path}?{query}"
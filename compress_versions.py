@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compress existing version content in batches
+Run after migrate_compress_content.sql. Rows are walked by primary key so
+each batch is a short transaction and the script can be stopped and re-run
+at any time; already-compressed rows are skipped.
+"""
+
+import sys
+import time
+from database import db
+from content_codec import compress_content, decompress_content, is_compressed
+
+def compress_versions(batch_size=200):
+    """Compress every uncompressed versions.content value"""
+    if not db.connect():
+        print("Failed to connect to database")
+        return False
+
+    try:
+        last_id = 0
+        scanned = 0
+        compressed = 0
+        bytes_before = 0
+        bytes_after = 0
+        start_time = time.time()
+
+        while True:
+            rows = db.execute_query(
+                "SELECT id, content FROM versions WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size)
+            )
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            scanned += len(rows)
+
+            updates = []
+            for row in rows:
+                if is_compressed(row['content']):
+                    continue
+                encoded = compress_content(decompress_content(row['content']))
+                if is_compressed(encoded):
+                    updates.append((encoded, row['id']))
+                    bytes_before += len(row['content'])
+                    bytes_after += len(encoded)
+
+            # One transaction per batch keeps lock time and undo log small
+            if updates:
+                cursor = db.connection.cursor()
+                try:
+                    cursor.executemany("UPDATE versions SET content = %s WHERE id = %s", updates)
+                    db.connection.commit()
+                finally:
+                    cursor.close()
+                compressed += len(updates)
+
+            print(f"Scanned {scanned} rows (up to id {last_id}), compressed {compressed}")
+
+        if bytes_before:
+            print(f"Content size: {bytes_before} -> {bytes_after} bytes ({bytes_after / bytes_before:.0%})")
+        print(f"Compression completed. Took {time.time() - start_time:.2f} seconds.")
+        return True
+    except Exception as e:
+        print(f"Error compressing versions: {e}")
+        return False
+    finally:
+        db.disconnect()
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    compress_versions(batch_size)
@@ -0,0 +1,58 @@
+"""
+Compression for stored version content
+Release notes are stored compressed with a short format marker in front, so
+compressed and legacy plain-text rows can live side by side in
+versions.content. Decompression happens only when content is returned.
+"""
+
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# A leading NUL byte never appears in stored markdown, so it safely tags
+# compressed payloads; rows without a marker are legacy UTF-8 text
+MARKER_ZLIB = b'\x00ZL1'
+MARKER_ZSTD = b'\x00ZS1'
+
+# Short notes do not shrink enough to be worth the CPU
+COMPRESS_MIN_BYTES = int(os.getenv('CONTENT_COMPRESS_MIN_BYTES', 256))
+COMPRESSION = os.getenv('CONTENT_COMPRESSION', 'zlib')
+
+_zstd_compressor = zstandard.ZstdCompressor(level=10) if zstandard else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+def compress_content(text):
+    """Encode content for storage, compressing it when that saves space"""
+    if text is None:
+        return None
+    raw = text.encode('utf-8')
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return raw
+    if COMPRESSION == 'zstd' and _zstd_compressor:
+        compressed = MARKER_ZSTD + _zstd_compressor.compress(raw)
+    else:
+        compressed = MARKER_ZLIB + zlib.compress(raw, 9)
+    return compressed if len(compressed) < len(raw) else raw
+
+
+def decompress_content(value):
+    """Decode a stored content value back to text; plain strings pass through"""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(MARKER_ZLIB):
+        return zlib.decompress(value[len(MARKER_ZLIB):]).decode('utf-8')
+    if value.startswith(MARKER_ZSTD):
+        if not _zstd_decompressor:
+            raise RuntimeError("Content is zstd-compressed but the zstandard package is not installed")
+        return _zstd_decompressor.decompress(value[len(MARKER_ZSTD):]).decode('utf-8')
+    return value.decode('utf-8')
+
+
+def is_compressed(value):
+    return isinstance(value, (bytes, bytearray)) and bytes(value[:4]) in (MARKER_ZLIB, MARKER_ZSTD)
@@ -1,6 +1,9 @@
 import mysql.connector
 from mysql.connector import Error
+from collections import namedtuple
+from contextlib import contextmanager
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -74,4 +77,137 @@ class Database:
                 except:
                     pass
 
+    def execute_many(self, query, rows):
+        """Run one statement for many parameter rows in a single transaction
+
+        INSERT ... VALUES statements are sent as one multi-row insert.
+        Returns the affected row count, or None after rolling back on error.
+        """
+        cursor = None
+        try:
+            print(f"Executing query for {len(rows)} rows: {query}")
+            cursor = self.connection.cursor()
+            cursor.executemany(query, rows)
+            self.connection.commit()
+            return cursor.rowcount
+        except Error as e:
+            print(f"Error executing query: {e}")
+            try:
+                self.connection.rollback()
+            except:
+                pass
+            return None
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except:
+                    pass
+
+    def iter_query(self, query, params=None, chunk_size=500, row_type='dict'):
+        """Yield SELECT rows in chunks from an unbuffered cursor
+
+        row_type is 'dict', 'tuple' (cheapest) or 'namedtuple'. The
+        connection cannot run other queries until the iterator is exhausted
+        or closed; unread rows are drained when the consumer stops early.
+        Errors are re-raised, so a dropped connection is never mistaken for
+        the end of the result set.
+        """
+        cursor = None
+        try:
+            print(f"Streaming query: {query}")
+            if params:
+                print(f"Query params: {params}")
+            cursor = self.connection.cursor(dictionary=(row_type == 'dict'), buffered=False)
+            cursor.execute(query, params)
+            row_class = None
+            if row_type == 'namedtuple':
+                row_class = namedtuple('Row', cursor.column_names, rename=True)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if row_class:
+                    rows = map(row_class._make, rows)
+                yield from rows
+        except Error as e:
+            print(f"Error executing query: {e}")
+            raise
+        finally:
+            if cursor:
+                try:
+                    # Drain whatever the consumer left unread, chunk by chunk
+                    while self.connection.unread_result and cursor.fetchmany(chunk_size):
+                        pass
+                    cursor.close()
+                except:
+                    pass
+
+class LockedConnection:
+    """A dedicated connection shared by threads, one statement at a time
+
+    Used by components that run beside a scraper (translation and HTTP
+    caches, the job queue), so they can be called from worker threads
+    without touching the scraper's own connection. It connects on first
+    use, and uses raw cursors so cached payloads stay out of the query log.
+    """
+
+    def __init__(self, on_connect=None):
+        self.database = Database()
+        self.lock = threading.RLock()
+        # Called once the connection is established, e.g. to prune expired rows
+        self.on_connect = on_connect
+
+    def ensure_connected(self):
+        """Connect if needed; False if the database is unreachable"""
+        with self.lock:
+            if self.database.connection is not None:
+                return True
+            if not self.database.connect():
+                return False
+            if self.on_connect:
+                self.on_connect()
+            return True
+
+    def execute(self, query, params=None, fetch=None, dictionary=False):
+        """Run one statement and commit
+
+        fetch='one' or 'all' returns rows, otherwise the affected row count.
+        Reads commit too, so the next statement sees other writers' changes.
+        """
+        with self.lock:
+            cursor = self.database.connection.cursor(buffered=True, dictionary=dictionary)
+            try:
+                cursor.execute(query, params)
+                if fetch == 'one':
+                    result = cursor.fetchone()
+                elif fetch == 'all':
+                    result = cursor.fetchall()
+                else:
+                    result = cursor.rowcount
+                self.database.connection.commit()
+                return result
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def transaction(self, dictionary=False):
+        """Hold the connection for a multi-statement transaction and yield its cursor"""
+        with self.lock:
+            connection = self.database.connection
+            cursor = connection.cursor(buffered=True, dictionary=dictionary)
+            try:
+                connection.start_transaction()
+                yield cursor
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def close(self):
+        with self.lock:
+            self.database.disconnect()
+
 db = Database()
\ No newline at end of file
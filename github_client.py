@@ -0,0 +1,216 @@
+"""
+GitHub REST client shared by the scrapers
+Every request goes through the shared GitHub rate limiter and is made
+conditionally: stored ETag / Last-Modified validators are sent with it, and
+a 304 answer (which GitHub does not count against the rate limit) is served
+from the stored body.
+
+Requests are spread round-robin over the configured tokens. The scheduler
+tracks each token's X-RateLimit-Remaining / X-RateLimit-Reset, paces a
+token when its budget runs low, and when GitHub pushes back (primary limit,
+secondary limit with Retry-After, 5xx) waits and retries the same request,
+so callers never get a silently truncated result. GraphQL queries share
+the same scheduling and retries.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+from dotenv import load_dotenv
+
+from http_cache import http_cache
+from rate_limiter import github_limiter
+
+load_dotenv()
+
+# GitHub API headers
+GITHUB_HEADERS = {
+    "Accept": "application/vnd.github.v3+json",
+    "User-Agent": "GitHub-Release-Scraper"
+}
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Comma-separated GITHUB_TOKENS, falling back to the single GITHUB_TOKEN
+GITHUB_TOKENS = [t.strip() for t in os.getenv('GITHUB_TOKENS', os.getenv('GITHUB_TOKEN', '')).split(',') if t.strip()]
+
+GITHUB_MAX_RETRIES = int(os.getenv('GITHUB_MAX_RETRIES', 5))
+# Below this many remaining requests a token's calls are spread evenly until its reset
+GITHUB_PACE_BELOW = int(os.getenv('GITHUB_PACE_BELOW', 500))
+# GitHub asks for at least a minute's pause on a secondary limit without Retry-After
+SECONDARY_LIMIT_WAIT = 60
+
+
+class GitHubError(Exception):
+    """A GitHub request that still failed after every retry"""
+
+
+class TokenState:
+    def __init__(self, token):
+        self.token = token
+        self.remaining = None
+        self.reset_at = 0.0
+        # Earliest time this token may be used again (pacing or back-off)
+        self.ready_at = 0.0
+        self.requests = 0
+
+    @property
+    def label(self):
+        return f"token ...{self.token[-4:]}" if self.token else "anonymous"
+
+
+class GitHubScheduler:
+    """Chooses the token for each request and keeps per-token budgets"""
+
+    def __init__(self, tokens):
+        self.tokens = [TokenState(t) for t in tokens] or [TokenState(None)]
+        self._next = 0
+
+    async def acquire(self):
+        """Wait for the next usable token, round-robin"""
+        while True:
+            now = time.time()
+            for i in range(len(self.tokens)):
+                state = self.tokens[(self._next + i) % len(self.tokens)]
+                if state.ready_at <= now:
+                    self._next = (self._next + i + 1) % len(self.tokens)
+                    state.requests += 1
+                    return state
+            wait = min(state.ready_at for state in self.tokens) - now
+            if wait > 5:
+                print(f"    All GitHub tokens exhausted, waiting {wait:.0f}s for the rate limit to reset...")
+            await asyncio.sleep(wait)
+
+    def update(self, state, headers):
+        """Record the budget reported in a response's rate-limit headers"""
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        now = time.time()
+        state.remaining = int(headers['X-RateLimit-Remaining'])
+        state.reset_at = float(headers.get('X-RateLimit-Reset', now))
+        if state.remaining <= 0:
+            state.ready_at = max(state.ready_at, state.reset_at + 1)
+        elif state.remaining < GITHUB_PACE_BELOW:
+            state.ready_at = max(state.ready_at, now + max(0.0, state.reset_at - now) / state.remaining)
+
+    def back_off(self, state, seconds):
+        state.ready_at = max(state.ready_at, time.time() + seconds)
+
+    def stats(self):
+        return {state.label: {'requests': state.requests, 'remaining': state.remaining} for state in self.tokens}
+
+
+scheduler = GitHubScheduler(GITHUB_TOKENS)
+
+
+async def _rate_limit_wait(response, state):
+    """Seconds to pause when a 403/429 is a rate limit, otherwise None"""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        return float(retry_after)
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        return max(1.0, state.reset_at - time.time() + 1)
+    if response.status == 429 or 'rate limit' in (await response.text()).lower():
+        return SECONDARY_LIMIT_WAIT
+    return None
+
+
+async def _github_request(method, url, session, payload=None, cached=None):
+    """Send one GitHub request through the scheduler, retrying until it succeeds
+
+    Returns the raw body (or the stored body when a conditional request
+    comes back 304) and the response headers.
+    """
+    last_error = None
+    failures = 0
+
+    for _ in range(GITHUB_MAX_RETRIES + 1):
+        state = await scheduler.acquire()
+        await github_limiter.acquire_async()
+        headers = {**GITHUB_HEADERS, **http_cache.conditional_headers(cached)}
+        if state.token:
+            headers["Authorization"] = f"token {state.token}"
+
+        try:
+            async with session.request(method, url, headers=headers, json=payload) as response:
+                scheduler.update(state, response.headers)
+                if response.status == 304 and cached:
+                    http_cache.not_modified += 1
+                    return http_cache.body(cached), response.headers
+
+                if response.status in (403, 429):
+                    wait = await _rate_limit_wait(response, state)
+                    if wait is not None:
+                        print(f"    GitHub rate limit hit ({state.label}), retrying {url} in {wait:.0f}s")
+                        scheduler.back_off(state, wait)
+                        last_error = f"rate limited ({response.status})"
+                        continue
+
+                if response.status >= 500:
+                    last_error = f"server error ({response.status})"
+                else:
+                    response.raise_for_status()
+                    body = await response.read()
+                    if method == 'GET':
+                        http_cache.modified += 1
+                        await asyncio.to_thread(http_cache.put, url, response.headers.get('ETag'),
+                                                response.headers.get('Last-Modified'), body)
+                    return body, response.headers
+        except aiohttp.ClientResponseError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            last_error = e
+
+        # Transient failure: exponential back-off before retrying
+        delay = min(2 ** failures, 30)
+        failures += 1
+        print(f"    GitHub request failed ({last_error}), retrying {url} in {delay}s")
+        await asyncio.sleep(delay)
+
+    raise GitHubError(f"Giving up on {url} after {GITHUB_MAX_RETRIES + 1} attempts: {last_error}")
+
+
+async def github_get_json(url, session):
+    """GET a GitHub API URL and return the decoded JSON body"""
+    cached = await asyncio.to_thread(http_cache.get, url)
+    body, _ = await _github_request('GET', url, session, cached=cached)
+    return json.loads(body)
+
+
+def last_page_from_link(link):
+    """Page number of the rel="last" URL in a Link header, or None"""
+    match = re.search(r'<([^>]+)>;\s*rel="last"', link or '')
+    if not match:
+        return None
+    page = parse_qs(urlparse(match.group(1)).query).get('page')
+    return int(page[0]) if page else None
+
+
+async def github_get_page(url, session):
+    """GET one page of a paginated list; returns (items, last page number or None)"""
+    cached = await asyncio.to_thread(http_cache.get, url)
+    body, headers = await _github_request('GET', url, session, cached=cached)
+    return json.loads(body), last_page_from_link(headers.get('Link'))
+
+
+async def github_graphql(query, variables, session):
+    """Run a GraphQL query and return its data
+
+    Errors that only affect part of the result (e.g. one aliased repository
+    that does not exist) are logged and leave that field null.
+    """
+    if not GITHUB_TOKENS:
+        raise GitHubError("The GraphQL API requires GITHUB_TOKEN or GITHUB_TOKENS")
+    body, _ = await _github_request('POST', GITHUB_GRAPHQL_URL, session,
+                                    payload={'query': query, 'variables': variables})
+    result = json.loads(body)
+    for error in result.get('errors') or []:
+        print(f"    GraphQL error: {error.get('message')}")
+    if result.get('data') is None:
+        raise GitHubError("GraphQL query returned no data")
+    return result['data']
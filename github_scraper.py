@@ -8,19 +8,21 @@ import requests
 import re
 import json
 import os
+import sys
 import asyncio
 import aiohttp
 from datetime import datetime, date
 from database import db
 from models import Project, Version
-import markdownify
+from pipeline import Pipeline, Stage
+from translation import translate_to_chinese, translator
+from scrape_common import clean_html_content, content_digest, load_source_hashes, PersistStage, CLEAN_CONCURRENCY, TRANSLATE_CONCURRENCY
+from github_client import GITHUB_TOKENS, github_get_json, github_get_page, github_graphql, scheduler
+from http_cache import http_cache
+from sources import list_sources, record_poll
+from job_queue import JobQueue, JobStage, MAX_ATTEMPTS
 from bs4 import BeautifulSoup
 import time
-from concurrent.futures import ThreadPoolExecutor
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
 from dotenv import load_dotenv
 
 # Load environment variables from backend directory
@@ -28,22 +30,18 @@ backend_dir = os.path.dirname(__file__)
 os.chdir(backend_dir)
 load_dotenv()
 
-# GitHub repositories to scrape
-GITHUB_REPOS = [
-    "https://github.com/vercel/next.js",
-    "https://github.com/facebook/react"
-]
+# 'graphql' fetches many repositories per request and needs a token; 'rest' is one repo at a time
+GITHUB_FETCHER = os.getenv('GITHUB_FETCHER', 'graphql' if GITHUB_TOKENS else 'rest')
+# Repositories per aliased GraphQL query
+GRAPHQL_REPOS_PER_QUERY = int(os.getenv('GITHUB_GRAPHQL_REPOS_PER_QUERY', 20))
 
-# GitHub API headers
-GITHUB_HEADERS = {
-    "Accept": "application/vnd.github.v3+json",
-    "User-Agent": "GitHub-Release-Scraper"
-}
+# Set to re-walk every repository's full release history, ignoring high-water marks
+GITHUB_FULL_SCAN = os.getenv('GITHUB_FULL_SCAN', '').lower() in ('1', 'true', 'yes')
+GITHUB_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
 
-# Add GitHub token if available
-github_token = os.getenv('GITHUB_TOKEN')
-if github_token:
-    GITHUB_HEADERS["Authorization"] = f"token {github_token}"
+RELEASES_PER_PAGE = 100  # Maximum per page
+# Pages fetched at once when backfilling a repository's full history
+BACKFILL_CONCURRENCY = int(os.getenv('GITHUB_BACKFILL_CONCURRENCY', 8))
 
 def parse_github_repo_url(url):
     """Parse GitHub repository URL to get owner and repo name"""
@@ -59,373 +57,479 @@ def extract_version_from_tag(tag):
     # Ensure it starts with 'v' as per project convention
     return f"v{version}"
 
-def clean_html_content(content):
-    """Convert HTML content to Markdown format and remove HTML tags"""
-    if not content:
-        return ""
-    try:
-        if isinstance(content, bytes):
-            content = content.decode('utf-8')
-        
-        # Use markdownify to convert HTML to Markdown with better formatting
-        md_content = markdownify.markdownify(content, heading_style="ATX")
-        # Clean up extra whitespace and newlines
-        md_content = re.sub(r'\n\s*\n', '\n\n', md_content)
-        md_content = re.sub(r'\n{3,}', '\n\n', md_content)  # Limit consecutive newlines to 2
-        md_content = md_content.strip()
-        return md_content
-    except Exception as e:
-        print(f"Error cleaning HTML content: {e}")
-        # Fallback to simple tag removal
-        clean = re.compile('<.*?>')
-        cleaned_content = re.sub(clean, '', content).strip()
-        return cleaned_content
+def is_newer(release, since):
+    """True if release was published after the high-water mark `since`"""
+    # ISO-8601 UTC timestamps compare correctly as strings
+    return since is None or (release.get('published_at') or '') > since
 
-def translate_to_chinese_sync(text):
-    """Translate text to Chinese using Tencent Translate API (synchronous version)"""
-    if not text or not isinstance(text, str) or not any(c.isalpha() for c in text):
-        return text
+def releases_page_url(owner, repo, page):
+    return f"https://api.github.com/repos/{owner}/{repo}/releases?page={page}&per_page={RELEASES_PER_PAGE}"
+
+async def iter_release_pages(owner, repo, session, since=None):
+    """Yield pages of releases from GitHub API, newest first
+
+    With `since` (a published_at high-water mark) pages are walked one at a
+    time, pagination stops at the first page that reaches back to the mark,
+    and only newer releases are yielded. Without a mark (a backfill) the page count
+    is read from page 1's Link: rel="last" header and the remaining pages
+    are fetched concurrently, still yielded in order as they arrive.
+    Raises instead of ending early when a page cannot be fetched even after
+    the client's retries.
+    """
+    page = 1
+    seen = set()
+
+    def new_releases(releases):
+        # Releases published mid-backfill shift pages; drop the duplicates
+        fresh = [r for r in releases if is_newer(r, since) and r['tag_name'] not in seen]
+        seen.update(r['tag_name'] for r in fresh)
+        return fresh
 
     try:
-        secret_id = os.getenv('TENCENT_SECRET_ID')
-        secret_key = os.getenv('TENCENT_SECRET_KEY')
-        region = os.getenv('TENCENT_REGION', 'ap-beijing')
-        
-        if not secret_id or not secret_key:
-            raise ValueError("Tencent translation credentials not found")
-
-        cred = credential.Credential(secret_id, secret_key)
-        http_profile = HttpProfile(endpoint="tmt.tencentcloudapi.com")
-        client_profile = ClientProfile(httpProfile=http_profile)
-        client = tmt_client.TmtClient(cred, region, client_profile)
-        
-        # If text is too long, split it into chunks
-        max_length = 5000  # Leave some buffer for API limit
-        if len(text) > max_length:
-            print(f"    Text is too long ({len(text)} chars), splitting into chunks...")
-            return translate_long_text(text, client)
-        
-        req = models.TextTranslateRequest()
-        req.SourceText = text
-        req.Source = "en"
-        req.Target = "zh"
-        req.ProjectId = 0
-        
-        resp = client.TextTranslate(req)
-        
-        if resp.TargetText and any('\u4e00' <= char <= '\u9fff' for char in resp.TargetText):
-            return resp.TargetText
-        else:
-            raise ValueError(f"Translation result did not contain Chinese characters. API response: {resp.TargetText}")
+        # Unchanged pages come back as 304s and are served from the HTTP cache
+        releases, last_page = await github_get_page(releases_page_url(owner, repo, page), session)
+        print(f"    Fetched page {page}: {len(releases)} releases")
+        yield new_releases(releases)
 
-    except Exception as e:
-        print(f"Translation error occurred: {e}")
-        raise
+        if since is None and last_page and last_page > 1:
+            print(f"    Backfilling pages 2-{last_page} concurrently...")
+            semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
 
-def translate_long_text(text, client):
-    """Translate long text by splitting into chunks"""
-    max_length = 5000
-    chunks = []
-    
-    # Split by paragraphs first to preserve structure
-    paragraphs = text.split('\n\n')
-    current_chunk = ""
-    
-    for para in paragraphs:
-        # If adding this paragraph would exceed the limit, save current chunk and start new one
-        if len(current_chunk) + len(para) + 2 > max_length and current_chunk:
-            chunks.append(current_chunk)
-            current_chunk = para
-        else:
-            if current_chunk:
-                current_chunk += '\n\n' + para
-            else:
-                current_chunk = para
-    
-    # Add the last chunk
-    if current_chunk:
-        chunks.append(current_chunk)
-    
-    print(f"    Split into {len(chunks)} chunks")
-    
-    # Translate each chunk
-    translated_chunks = []
-    for i, chunk in enumerate(chunks):
-        print(f"    Translating chunk {i+1}/{len(chunks)} ({len(chunk)} chars)...")
-        req = models.TextTranslateRequest()
-        req.SourceText = chunk
-        req.Source = "en"
-        req.Target = "zh"
-        req.ProjectId = 0
-        
-        resp = client.TextTranslate(req)
-        if resp.TargetText:
-            translated_chunks.append(resp.TargetText)
-            # Small delay to avoid rate limiting
-            time.sleep(0.1)
-        else:
-            # If translation fails, keep original chunk
-            translated_chunks.append(chunk)
-    
-    # Combine translated chunks
-    return '\n\n'.join(translated_chunks)
+            async def fetch_page(n):
+                async with semaphore:
+                    return await github_get_json(releases_page_url(owner, repo, n), session)
 
-async def translate_to_chinese(text):
-    """Translate text to Chinese using Tencent Translate API (asynchronous version)"""
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor() as executor:
-        return await loop.run_in_executor(executor, translate_to_chinese_sync, text)
+            tasks = [asyncio.create_task(fetch_page(n)) for n in range(2, last_page + 1)]
+            try:
+                for page, task in enumerate(tasks, start=2):
+                    releases = await task
+                    print(f"    Fetched page {page}: {len(releases)} releases")
+                    yield new_releases(releases)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        # Walk on one page at a time until a short page, or one whose oldest
+        # release is not newer than the mark (the next page would be all older)
+        while len(releases) == RELEASES_PER_PAGE and is_newer(releases[-1], since):
+            page += 1
+            releases = await github_get_json(releases_page_url(owner, repo, page), session)
+            print(f"    Fetched page {page}: {len(releases)} releases")
+            yield new_releases(releases)
+    except Exception as e:
+        print(f"Error fetching releases for {owner}/{repo} (page {page}): {e}")
+        raise
 
-async def fetch_github_releases(owner, repo, session):
-    """Fetch releases from GitHub API"""
+async def fetch_github_releases(owner, repo, session, since=None):
+    """Fetch releases from GitHub API as one list (see iter_release_pages)"""
     all_releases = []
-    page = 1
-    per_page = 100  # Maximum per page
-    
-    while True:
-        releases_url = f"https://api.github.com/repos/{owner}/{repo}/releases?page={page}&per_page={per_page}"
-        try:
-            async with session.get(releases_url, headers=GITHUB_HEADERS) as response:
-                response.raise_for_status()
-                releases = await response.json()
-                
-                if not releases:
-                    break
-                    
-                all_releases.extend(releases)
-                print(f"    Fetched page {page}: {len(releases)} releases")
-                
-                # If we got less than per_page, we're done
-                if len(releases) < per_page:
-                    break
-                    
-                page += 1
-                
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.5)
-                
-        except Exception as e:
-            print(f"Error fetching releases for {owner}/{repo}: {e}")
-            break
-    
+    async for releases in iter_release_pages(owner, repo, session, since):
+        all_releases.extend(releases)
     print(f"    Total releases fetched: {len(all_releases)}")
     return all_releases
 
-async def process_release(release, project_id, existing_versions, owner, repo):
-    """Process a single GitHub release"""
+def build_releases_query(batch):
+    """Aliased GraphQL query for one page of releases of each repository in batch"""
+    params = []
+    fields = []
+    for i in range(len(batch)):
+        params.append(f"$o{i}: String!, $n{i}: String!, $c{i}: String")
+        # Only the fields prepare_release uses, in the REST API's order (newest first)
+        fields.append(
+            f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ "
+            f"releases(first: 100, after: $c{i}, orderBy: {{field: CREATED_AT, direction: DESC}}) {{ "
+            f"pageInfo {{ hasNextPage endCursor }} "
+            f"nodes {{ tagName name isPrerelease publishedAt description }} }} }}"
+        )
+    return f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+
+def graphql_release_to_rest(node, owner, repo):
+    """Shape a GraphQL release node like a REST release"""
+    return {
+        'tag_name': node['tagName'],
+        'name': node['name'],
+        'prerelease': node['isPrerelease'],
+        'published_at': node['publishedAt'],
+        'body': node['description'],
+        'zipball_url': f"https://api.github.com/repos/{owner}/{repo}/zipball/{node['tagName']}",
+    }
+
+async def fetch_releases_graphql(repos, session, marks=None):
+    """Fetch all releases of many repositories with aliased GraphQL queries
+
+    Returns {(owner, repo): releases} for the repositories that could be
+    fetched completely; missing ones are left to the caller. `marks` maps
+    repositories to high-water marks as in fetch_github_releases.
+    """
+    marks = marks or {}
+    releases = {key: [] for key in repos}
+    cursors = {key: None for key in repos}
+    pending = list(repos)
+    page = 1
+
+    while pending:
+        next_pending = []
+        for start in range(0, len(pending), GRAPHQL_REPOS_PER_QUERY):
+            batch = pending[start:start + GRAPHQL_REPOS_PER_QUERY]
+            variables = {}
+            for i, (owner, repo) in enumerate(batch):
+                variables.update({f"o{i}": owner, f"n{i}": repo, f"c{i}": cursors[(owner, repo)]})
+            data = await github_graphql(build_releases_query(batch), variables, session)
+
+            for i, (owner, repo) in enumerate(batch):
+                repository = data.get(f"r{i}")
+                if not repository:
+                    print(f"    GraphQL returned no data for {owner}/{repo}")
+                    releases.pop((owner, repo), None)
+                    continue
+                connection = repository['releases']
+                page_releases = [
+                    graphql_release_to_rest(node, owner, repo)
+                    for node in connection['nodes'] if node and node['publishedAt']
+                ]
+                since = marks.get((owner, repo))
+                releases[(owner, repo)].extend(r for r in page_releases if is_newer(r, since))
+                if connection['pageInfo']['hasNextPage'] and page_releases and is_newer(page_releases[-1], since):
+                    cursors[(owner, repo)] = connection['pageInfo']['endCursor']
+                    next_pending.append((owner, repo))
+        print(f"    GraphQL page {page}: {len(pending)} repositories, {len(next_pending)} with more releases")
+        pending = next_pending
+        page += 1
+
+    return releases
+
+async def as_pages(releases):
+    """Present an already fetched release list like iter_release_pages"""
+    yield releases
+
+async def prefetch_releases_graphql(repos, session, marks=None):
+    """GraphQL bulk fetch of the repositories with a high-water mark
+
+    Returns {} if disabled or failed. GraphQL pages with sequential cursors,
+    so it only serves incremental polls; repositories without a mark (first
+    imports, full scans) are left to the concurrent REST backfill.
+    """
+    if GITHUB_FETCHER != 'graphql':
+        return {}
+    incremental = [(owner, repo) for owner, repo in repos if (owner, repo) in (marks or {})]
+    if not incremental:
+        return {}
     try:
-        # Skip pre-releases
-        if release.get('prerelease', False):
-            print(f"\nSkipping pre-release: {release['name'] or release['tag_name']}")
-            return None
-        
-        print(f"\nProcessing release: {release['name'] or release['tag_name']}")
-        start_time = time.time()
-        
-        # Extract version from tag
-        version = extract_version_from_tag(release['tag_name'])
-        
+        return await fetch_releases_graphql(incremental, session, marks)
+    except Exception as e:
+        print(f"GraphQL release fetch failed, falling back to REST: {e}")
+        return {}
+
+async def fetch_releases_bulk(repos, session, marks=None):
+    """Fetch releases for every (owner, repo), via GraphQL when configured
+
+    Only releases newer than each repository's high-water mark in `marks`
+    are returned. Repositories without a mark, or that GraphQL could not
+    serve, are fetched from REST.
+    A repository whose releases could not be fetched at all maps to None.
+    """
+    results = await prefetch_releases_graphql(repos, session, marks)
+    for owner, repo in repos:
+        if (owner, repo) in results:
+            continue
+        try:
+            results[(owner, repo)] = await fetch_github_releases(owner, repo, session, (marks or {}).get((owner, repo)))
+        except Exception:
+            results[(owner, repo)] = None
+    return results
+
+def load_high_water_marks(scraper):
+    """{(owner, repo): published_at} of the newest release `scraper` has processed"""
+    if GITHUB_FULL_SCAN:
+        print("Full scan requested, ignoring high-water marks")
+        return {}
+    rows = db.execute_query("SELECT owner, repo, last_published_at FROM repo_state WHERE scraper = %s", (scraper,)) or []
+    return {(row['owner'], row['repo']): row['last_published_at'].strftime(GITHUB_TIME_FORMAT) for row in rows}
+
+def newest_release(releases):
+    return max(releases, key=lambda r: r.get('published_at') or '')
+
+def settle_high_water_marks(fetched):
+    """{(owner, repo): release} marks covering only releases that were saved
+
+    `fetched` holds what iter_repo_releases read from each repository. A
+    release counts as saved once its version is stored with the release's
+    source hash; one that failed, is still queued for a retry, or was saved
+    untranslated (no hash) holds the mark just below it, so the next run
+    fetches it again. Repositories with nothing new keep their mark.
+    """
+    marks = {}
+    for (owner, repo), state in fetched.items():
+        releases = state['releases']
+        if not releases:
+            continue
+        stored_hashes = load_source_hashes(db, state['project_id'])
+        unsaved = [
+            r['published_at'] for r in releases
+            if not r['prerelease'] and stored_hashes.get(extract_version_from_tag(r['tag_name'])) != r['source_hash']
+        ]
+        if unsaved:
+            oldest = min(unsaved)
+            releases = [r for r in releases if r['published_at'] < oldest]
+            print(f"{len(unsaved)} releases of {owner}/{repo} are not saved yet; holding its high-water mark before {oldest}")
+        if releases:
+            marks[(owner, repo)] = newest_release(releases)
+    return marks
+
+def save_high_water_marks(scraper, new_marks):
+    """Advance the marks once a run has processed everything up to them"""
+    query = """
+        INSERT INTO repo_state (scraper, owner, repo, last_published_at, last_tag)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE last_published_at = VALUES(last_published_at), last_tag = VALUES(last_tag)
+    """
+    for (owner, repo), release in new_marks.items():
+        published_at = datetime.strptime(release['published_at'], GITHUB_TIME_FORMAT)
+        db.execute_query(query, (scraper, owner, repo, published_at, release['tag_name']))
+        print(f"High-water mark for {owner}/{repo}: {release['tag_name']} ({release['published_at']})")
+
+def prepare_release(item):
+    """Clean stage: skip pre-releases and convert the release body to Markdown"""
+    release = item['release']
+    # Skip pre-releases
+    if release.get('prerelease', False):
+        print(f"\nSkipping pre-release: {release['name'] or release['tag_name']}")
+        return None
+
+    print(f"\nProcessing release: {release['name'] or release['tag_name']}")
+    owner, repo = item['owner'], item['repo']
+
+    # Extract version from tag
+    version = extract_version_from_tag(release['tag_name'])
+
+    # Get release content
+    content = release['body'] or f"Release {release['tag_name']}"
+
+    return {
+        'name': release['name'] or release['tag_name'],
+        'version': version,
         # Parse release date
-        release_date = datetime.strptime(release['published_at'], '%Y-%m-%dT%H:%M:%SZ').date()
-        
-        # Get release content
-        content = release['body'] or f"Release {release['tag_name']}"
-        
+        'update_date': datetime.strptime(release['published_at'], '%Y-%m-%dT%H:%M:%SZ').date(),
         # Clean HTML content
-        clean_content = clean_html_content(content)
-        
-        # Try to translate content to Chinese, fallback to original content
-        try:
-            print(f"    Translating content for version {version}...")
-            translated_content = await translate_to_chinese(clean_content)
-            print(f"    Translation successful for version {version}.")
-        except Exception as e:
-            print(f"    Translation failed for version {version}: {e}")
-            print(f"    Using original content without translation.")
-            translated_content = clean_content
-        
+        'content': clean_html_content(content),
         # Get download URL (use zipball URL)
-        download_url = release.get('zipball_url', f"https://github.com/{owner}/{repo}/archive/refs/tags/{release['tag_name']}.zip")
-        
-        print(f"Finished processing release: {release['name'] or release['tag_name']}. Took {time.time() - start_time:.2f} seconds.")
-        
-        return {
-            'version': version,
-            'update_date': release_date,
-            'content': translated_content,
-            'download_url': download_url,
-            'project_id': project_id,
-            'is_new': version not in existing_versions
-        }
-    except Exception as e:
-        print(f"  Error processing release '{release.get('name', 'Unknown')}': {e}")
-        return None
+        'download_url': release.get('zipball_url', f"https://github.com/{owner}/{repo}/archive/refs/tags/{release['tag_name']}.zip"),
+        'project_id': item['project_id'],
+        'source_hash': item.get('source_hash'),
+        'start_time': time.time()
+    }
+
+def release_source_hash(release):
+    """Hash of the release fields a stored version is built from"""
+    return content_digest(release['tag_name'], release.get('name'), release.get('body'), release.get('published_at'),
+                          release.get('zipball_url'), bool(release.get('prerelease')))
 
-def save_versions_to_db(versions_data):
-    """Save all version data to database in batches"""
+async def translate_release(item):
+    """Translate stage: a failed translation is retried through the job queue
+
+    On the job's last attempt the cleaned content is saved untranslated,
+    without a source hash, so a later scrape of the release redoes it.
+    """
+    version = item['version']
     try:
-        # Separate new and existing versions
-        new_versions = [v for v in versions_data if v['is_new']]
-        existing_versions = [v for v in versions_data if not v['is_new']]
-        
-        # Batch insert new versions
-        if new_versions:
-            print(f"\nAdding {len(new_versions)} new versions...")
-            start_time = time.time()
-            insert_query = "INSERT INTO versions (project_id, version, update_time, content, download_url) VALUES (%s, %s, %s, %s, %s)"
-            # Prepare data for batch insert
-            insert_data = [
-                (v['project_id'], v['version'], v['update_date'], v['content'], v['download_url'])
-                for v in new_versions
-            ]
-            # Execute batch insert
-            for data in insert_data:
-                db.execute_query(insert_query, data)
-            print(f"Added {len(new_versions)} new versions. Took {time.time() - start_time:.2f} seconds.")
-        
-        # Batch update existing versions
-        if existing_versions:
-            print(f"\nUpdating {len(existing_versions)} existing versions...")
-            start_time = time.time()
-            update_query = "UPDATE versions SET update_time = %s, content = %s, download_url = %s WHERE project_id = %s AND version = %s"
-            # Prepare data for batch update
-            update_data = [
-                (v['update_date'], v['content'], v['download_url'], v['project_id'], v['version'])
-                for v in existing_versions
-            ]
-            # Execute batch update
-            for data in update_data:
-                db.execute_query(update_query, data)
-            print(f"Updated {len(existing_versions)} existing versions. Took {time.time() - start_time:.2f} seconds.")
-        
-        return True
+        print(f"    Translating content for version {version}...")
+        item['content'] = await translate_to_chinese(item['content'])
+        print(f"    Translation successful for version {version}.")
     except Exception as e:
-        print(f"Error saving versions to database: {e}")
-        return False
+        print(f"    Translation failed for version {version}: {e}")
+        job = item.get('job')
+        if job and job['attempts'] < MAX_ATTEMPTS:
+            raise
+        print(f"    Using original content without translation.")
+        item['source_hash'] = None
+    print(f"Finished processing release: {item['name']}. Took {time.time() - item['start_time']:.2f} seconds.")
+    return item
 
-async def scrape_github_releases():
-    """Scrape GitHub releases from all configured repositories"""
+async def get_or_create_project(owner, repo, session):
+    """Look up the project for a repository, creating it if needed"""
+    project_name = f"{owner}/{repo}"
+    project_query = "SELECT id FROM projects WHERE name = %s LIMIT 1"
+    existing_project = db.execute_query(project_query, (project_name,))
+
+    if existing_project:
+        project_id = existing_project[0]['id']
+        print(f"Found existing project '{project_name}' with ID: {project_id}")
+        return project_id
+
+    print(f"Creating new project '{project_name}'...")
+    # Try to get repository info for icon
+    icon = 'PKG'
+    repo_info_url = f"https://api.github.com/repos/{owner}/{repo}"
     try:
-        if not db.connect():
-            print("Failed to connect to database")
-            return False
+        repo_info = await github_get_json(repo_info_url, session)
+        # Use language as icon or default to PKG
+        language_icons = {
+            'JavaScript': 'JS', 'TypeScript': 'TS', 'Python': 'PY',
+            'Java': 'JV', 'Go': 'GO', 'Rust': 'RS'
+        }
+        icon = language_icons.get(repo_info.get('language'), 'PKG')
+    except:
+        icon = 'PKG'
 
-        async with aiohttp.ClientSession() as session:
-            all_processed_data = []
-            
-            for repo_url in GITHUB_REPOS:
-                owner, repo = parse_github_repo_url(repo_url)
-                if not owner or not repo:
-                    print(f"Invalid repository URL: {repo_url}")
-                    continue
-                
-                print(f"\n{'='*50}")
-                print(f"Processing repository: {owner}/{repo}")
-                print(f"{'='*50}")
-                
-                # Get or create the project
-                project_name = f"{owner}/{repo}"
-                project_query = "SELECT id FROM projects WHERE name = %s LIMIT 1"
-                existing_project = db.execute_query(project_query, (project_name,))
-                project_id = None
-                
-                if existing_project:
-                    project_id = existing_project[0]['id']
-                    print(f"Found existing project '{project_name}' with ID: {project_id}")
-                else:
-                    print(f"Creating new project '{project_name}'...")
-                    # Try to get repository info for icon
-                    repo_info_url = f"https://api.github.com/repos/{owner}/{repo}"
-                    try:
-                        async with session.get(repo_info_url, headers=GITHUB_HEADERS) as response:
-                            if response.status == 200:
-                                repo_info = await response.json()
-                                # Use language as icon or default to 📦
-                                icon = repo_info.get('language', 'PKG')
-                                if icon == 'JavaScript':
-                                    icon = 'JS'
-                                elif icon == 'TypeScript':
-                                    icon = 'TS'
-                                elif icon == 'Python':
-                                    icon = 'PY'
-                                elif icon == 'Java':
-                                    icon = 'JV'
-                                elif icon == 'Go':
-                                    icon = 'GO'
-                                elif icon == 'Rust':
-                                    icon = 'RS'
-                                else:
-                                    icon = 'PKG'
-                    except:
-                        icon = 'PKG'
-                    
-                    insert_query = "INSERT INTO projects (icon, name) VALUES (%s, %s)"
-                    project_id = db.execute_query(insert_query, (icon, project_name))
-                    if project_id:
-                        print(f"Created new project '{project_name}' with ID: {project_id}")
-                    else:
-                        print(f"Failed to create project '{project_name}'")
-                        continue
-                
-                # Fetch existing versions for this project
-                print(f"Fetching existing versions for {project_name}...")
-                versions_query = "SELECT version FROM versions WHERE project_id = %s"
-                results = db.execute_query(versions_query, (project_id,))
-                existing_versions = {row['version'] for row in results} if results else set()
-                print(f"Found {len(existing_versions)} existing versions")
-                
-                # Fetch releases from GitHub
-                print(f"Fetching releases from GitHub API...")
-                releases = await fetch_github_releases(owner, repo, session)
+    insert_query = "INSERT INTO projects (icon, name) VALUES (%s, %s)"
+    project_id = db.execute_query(insert_query, (icon, project_name))
+    if project_id:
+        print(f"Created new project '{project_name}' with ID: {project_id}")
+    else:
+        print(f"Failed to create project '{project_name}'")
+    return project_id
+
+async def iter_repo_releases(session, repos, marks, fetched, release_times):
+    """Pipeline source: yields the new releases of every given repository
+
+    Once a repository has been read completely, its project and a summary
+    of every new release are recorded in fetched (see
+    settle_high_water_marks), and the publish times in release_times.
+    """
+    # GraphQL serves many repositories per request up front; the rest are
+    # streamed page by page from REST while earlier pages are processed
+    print(f"Fetching releases from GitHub API ({GITHUB_FETCHER})...")
+    prefetched = await prefetch_releases_graphql(repos, session, marks)
+
+    for owner, repo in repos:
+        print(f"\n{'='*50}")
+        print(f"Processing repository: {owner}/{repo}")
+        print(f"{'='*50}")
+
+        project_id = await get_or_create_project(owner, repo, session)
+        if not project_id:
+            continue
+
+        # Versions whose release is unchanged since it was stored are skipped
+        stored_hashes = load_source_hashes(db, project_id)
+
+        if (owner, repo) in prefetched:
+            pages = as_pages(prefetched[(owner, repo)])
+        else:
+            pages = iter_release_pages(owner, repo, session, marks.get((owner, repo)))
+
+        newest = None
+        seen = []
+        unchanged = 0
+        try:
+            async for releases in pages:
                 if not releases:
-                    print(f"No releases found for {owner}/{repo}")
                     continue
-                
-                print(f"Found {len(releases)} releases")
-                
-                # Process releases in batches
-                batch_size = 3
-                repo_processed_data = []
-                
-                for i in range(0, len(releases), batch_size):
-                    batch = releases[i:i+batch_size]
-                    print(f"\nProcessing batch {i//batch_size + 1} ({len(batch)} releases)...")
-                    
-                    # Create tasks for processing releases in this batch
-                    tasks = [process_release(release, project_id, existing_versions, owner, repo) for release in batch]
-                    
-                    # Wait for all tasks in this batch to complete
-                    batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-                    
-                    # Collect results
-                    for result in batch_results:
-                        if result and not isinstance(result, Exception):
-                            repo_processed_data.append(result)
-                    
-                    # Small delay between batches
-                    if i + batch_size < len(releases):
-                        print("Waiting 2 seconds before next batch...")
-                        await asyncio.sleep(2)
-                
-                # Add processed data to overall collection
-                all_processed_data.extend(repo_processed_data)
-                
-                # Update project's latest version info
-                if releases:
+                if newest is None:
+                    # Update project's latest version info from the newest release
                     latest_release = releases[0]
                     latest_version = extract_version_from_tag(latest_release['tag_name'])
                     latest_date = datetime.strptime(latest_release['published_at'], '%Y-%m-%dT%H:%M:%SZ').date()
-                    print(f"\nUpdating project's latest version info...")
                     update_project_query = "UPDATE projects SET latest_version = %s, latest_update_time = %s WHERE id = %s"
                     db.execute_query(update_project_query, (latest_version, latest_date, project_id))
                     print(f"Updated project to latest version: {latest_version}")
-            
-            # Save all collected data to database
-            if all_processed_data:
-                print(f"\n{'='*50}")
-                print(f"Saving {len(all_processed_data)} processed releases to database...")
-                print(f"{'='*50}")
-                save_versions_to_db(all_processed_data)
+                newest = releases[0]
+
+                for release in releases:
+                    source_hash = release_source_hash(release)
+                    seen.append({'tag_name': release['tag_name'], 'published_at': release['published_at'],
+                                 'prerelease': bool(release.get('prerelease')), 'source_hash': source_hash})
+                    if stored_hashes.get(extract_version_from_tag(release['tag_name'])) == source_hash:
+                        unchanged += 1
+                        continue
+                    yield {
+                        # Only the fields prepare_release reads, so the job payload stays small
+                        'release': {key: release.get(key) for key in ('tag_name', 'name', 'prerelease', 'published_at', 'body', 'zipball_url')},
+                        'owner': owner,
+                        'repo': repo,
+                        'project_id': project_id,
+                        'source_hash': source_hash
+                    }
+        except Exception:
+            # Releases already yielded are still processed, but the mark stays put
+            print(f"Stopped {owner}/{repo} early; its high-water mark is not advanced this run")
+            continue
+
+        if unchanged:
+            print(f"Skipped {unchanged} unchanged releases of {owner}/{repo}")
+        release_times[(owner, repo)] = [datetime.strptime(r['published_at'], GITHUB_TIME_FORMAT) for r in seen]
+        if newest is None:
+            print(f"No new releases for {owner}/{repo}")
+        fetched[(owner, repo)] = {'project_id': project_id, 'releases': seen}
+
+async def iter_release_jobs(queue, releases=None, claim_size=RELEASES_PER_PAGE):
+    """Pipeline source: records releases as durable jobs and yields claimed jobs
+
+    New releases are enqueued as they arrive and claimed back a batch at a
+    time, so due retries and jobs left by interrupted runs are picked up
+    alongside them. Without `releases` it only drains the queue.
+    """
+    if releases is not None:
+        pending = 0
+        async for item in releases:
+            release = item['release']
+            await asyncio.to_thread(queue.enqueue, f"{item['owner']}/{item['repo']}@{release['tag_name']}", item)
+            pending += 1
+            if pending >= claim_size:
+                for job in await asyncio.to_thread(queue.claim, claim_size):
+                    yield job
+                pending = 0
+
+    while True:
+        jobs = await asyncio.to_thread(queue.claim, claim_size)
+        if not jobs:
+            break
+        for job in jobs:
+            yield job
+
+def release_pipeline(queue, persist):
+    """clean -> translate -> persist, checkpointed on each release's job"""
+    return Pipeline('github', [
+        JobStage(queue, Stage('clean', prepare_release, concurrency=CLEAN_CONCURRENCY, mode='thread')),
+        JobStage(queue, Stage('translate', translate_release, concurrency=TRANSLATE_CONCURRENCY)),
+        JobStage(queue, persist, final=True),
+    ])
+
+async def drain_release_jobs():
+    """Worker mode: process queued release jobs until none are due
+
+    Several workers can run at once; each claims its own jobs.
+    """
+    with JobQueue('github_release') as queue, PersistStage() as persist:
+        await release_pipeline(queue, persist).run(iter_release_jobs(queue))
+        translator.report()
+        print(f"Release jobs: {queue.stats()}")
+    return True
+
+async def scrape_github_releases():
+    """Scrape GitHub releases from every registered repository that is due"""
+    try:
+        if not db.connect():
+            print("Failed to connect to database")
+            return False
+
+        sources = list_sources(db, 'github', 'github')
+        if not sources:
+            print("No GitHub repositories are due for polling")
+            return True
+        repos = [(source['owner'], source['repo']) for source in sources]
+
+        # Releases are recorded as jobs as they stream in, then flow through
+        # per-stage worker pools and are saved as soon as they are translated
+        async with aiohttp.ClientSession() as session:
+            with JobQueue('github_release') as queue, PersistStage() as persist:
+                marks = load_high_water_marks('github')
+                fetched = {}
+                release_times = {}
+                releases = iter_repo_releases(session, repos, marks, fetched, release_times)
+                await release_pipeline(queue, persist).run(iter_release_jobs(queue, releases))
+                translator.report()
+                print(f"Release jobs: {queue.stats()}")
+                print(f"GitHub HTTP cache: {http_cache.stats()}")
+                print(f"GitHub tokens: {scheduler.stats()}")
+
+        # Marks only pass releases that are saved; failed or untranslated ones
+        # are fetched again next run, even when their job has given up
+        save_high_water_marks('github', settle_high_water_marks(fetched))
+
+        for source in sources:
+            key = (source['owner'], source['repo'])
+            record_poll(db, source, release_times.get(key), success=key in release_times)
 
         print("\nGitHub releases scraping completed successfully!")
         return True
@@ -444,4 +548,8 @@ if __name__ == "__main__":
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     
-    asyncio.run(scrape_github_releases())
\ No newline at end of file
+    # `python github_scraper.py drain` only works through queued jobs
+    if len(sys.argv) > 1 and sys.argv[1] == 'drain':
+        asyncio.run(drain_release_jobs())
+    else:
+        asyncio.run(scrape_github_releases())
\ No newline at end of file
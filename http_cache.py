@@ -0,0 +1,86 @@
+"""
+Persistent HTTP validator cache
+Stores the ETag / Last-Modified validators and body of upstream responses
+per URL, so scrapers can send conditional requests and reuse the stored
+body when the server answers 304 Not Modified. Lookups block on MySQL, so
+async callers go through asyncio.to_thread.
+"""
+
+import hashlib
+
+from content_codec import compress_content, decompress_content
+from database import LockedConnection
+
+
+class HttpCache:
+    """MySQL-backed store of response validators and bodies
+
+    Like the translation cache it uses a dedicated LockedConnection and
+    turns itself off if the database is unreachable, in which case every
+    request is simply made unconditionally.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.connection = LockedConnection()
+        self.not_modified = 0
+        self.modified = 0
+
+    def _available(self):
+        if self.enabled and not self.connection.ensure_connected():
+            print("HTTP cache unavailable, making unconditional requests")
+            self.enabled = False
+        return self.enabled
+
+    def get(self, url):
+        """Return the stored entry for url as a dict, or None"""
+        if not self.enabled:
+            return None
+        try:
+            if not self._available():
+                return None
+            return self.connection.execute(
+                "SELECT etag, last_modified, body FROM http_cache WHERE url_hash = %s",
+                (hashlib.sha256(url.encode('utf-8')).hexdigest(),), fetch='one', dictionary=True
+            )
+        except Exception as e:
+            print(f"HTTP cache lookup failed: {e}")
+            return None
+
+    def put(self, url, etag, last_modified, body):
+        """Remember the validators and body of a 200 response"""
+        if not self.enabled or not (etag or last_modified):
+            return
+        try:
+            if not self._available():
+                return
+            self.connection.execute(
+                "INSERT INTO http_cache (url_hash, url, etag, last_modified, body) VALUES (%s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE etag = VALUES(etag), last_modified = VALUES(last_modified), body = VALUES(body)",
+                (hashlib.sha256(url.encode('utf-8')).hexdigest(), url[:1000], etag, last_modified,
+                 compress_content(body.decode('utf-8')))
+            )
+        except Exception as e:
+            print(f"HTTP cache store failed: {e}")
+
+    def conditional_headers(self, entry):
+        """Request headers that let the server answer 304 for a stored entry"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def body(self, entry):
+        return decompress_content(entry['body']).encode('utf-8')
+
+    def stats(self):
+        return {'not_modified': self.not_modified, 'modified': self.modified}
+
+    def close(self):
+        self.connection.close()
+
+
+http_cache = HttpCache()
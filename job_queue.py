@@ -0,0 +1,219 @@
+"""
+Durable scrape job queue
+Work that is expensive to redo (cleaning and translating a release) is
+recorded as one row per release in the scrape_jobs table. Workers claim
+jobs under a lease with SELECT ... FOR UPDATE SKIP LOCKED, so several
+workers can drain the queue at once. The output of each completed stage is
+checkpointed on the job, failed jobs are retried with exponential back-off,
+and jobs left behind by a crashed worker are picked up again once their
+lease expires.
+"""
+
+import asyncio
+import json
+import os
+import socket
+
+from database import LockedConnection
+from pipeline import Stage
+
+LEASE_SECONDS = int(os.getenv('SCRAPE_JOB_LEASE_SECONDS', 600))
+MAX_ATTEMPTS = int(os.getenv('SCRAPE_JOB_MAX_ATTEMPTS', 5))
+RETRY_BASE_SECONDS = int(os.getenv('SCRAPE_JOB_RETRY_SECONDS', 60))
+RETRY_MAX_SECONDS = 6 * 3600
+# Finished jobs are kept this long for inspection
+DONE_RETENTION_DAYS = int(os.getenv('SCRAPE_JOB_RETENTION_DAYS', 7))
+
+
+class JobQueue:
+    """One kind of job in the scrape_jobs table
+
+    The queue uses a dedicated LockedConnection, so it can be used from
+    stage worker threads; async callers go through asyncio.to_thread.
+    """
+
+    def __init__(self, kind, worker_id=None):
+        self.kind = kind
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.connection = LockedConnection()
+        self.enqueued = 0
+        self.claimed = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def __enter__(self):
+        if not self.connection.ensure_connected():
+            raise RuntimeError("Failed to connect to database")
+        self.purge_done()
+        return self
+
+    def __exit__(self, *exc):
+        self.connection.close()
+
+    def _execute(self, query, params=None):
+        return self.connection.execute(query, params)
+
+    def enqueue(self, job_key, payload):
+        """Add a job, or re-open an existing one with the same key
+
+        A job another worker is running keeps its lease; a finished job is
+        reset with the new payload and no checkpoint. A job waiting for a
+        retry keeps its attempts and back-off, since scrapers enqueue
+        releases again until they are saved.
+        """
+        self._execute(
+            """
+            INSERT INTO scrape_jobs (kind, job_key, payload) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                payload = IF(status = 'running', payload, VALUES(payload)),
+                checkpoint = IF(status = 'running', checkpoint, NULL),
+                attempts = IF(status IN ('running', 'pending'), attempts, 0),
+                next_attempt_at = IF(status IN ('running', 'pending'), next_attempt_at, NOW()),
+                status = IF(status = 'running', status, 'pending')
+            """,
+            (self.kind, job_key, json.dumps(payload, default=str))
+        )
+        self.enqueued += 1
+
+    def claim(self, limit):
+        """Lease up to `limit` due jobs to this worker
+
+        Pending jobs whose retry time has come and running jobs whose lease
+        expired are both eligible. Rows locked by another worker's claim are
+        skipped rather than waited for.
+        """
+        with self.connection.transaction(dictionary=True) as cursor:
+            cursor.execute(
+                """
+                SELECT id, job_key, payload, checkpoint, attempts FROM scrape_jobs
+                WHERE kind = %s AND (
+                    (status = 'pending' AND next_attempt_at <= NOW())
+                    OR (status = 'running' AND lease_expires_at < NOW())
+                )
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+                """,
+                (self.kind, limit)
+            )
+            rows = cursor.fetchall()
+            if rows:
+                ids = [row['id'] for row in rows]
+                cursor.execute(
+                    f"""
+                    UPDATE scrape_jobs
+                    SET status = 'running', lease_owner = %s, attempts = attempts + 1,
+                        lease_expires_at = NOW() + INTERVAL %s SECOND
+                    WHERE id IN ({', '.join(['%s'] * len(ids))})
+                    """,
+                    (self.worker_id, LEASE_SECONDS, *ids)
+                )
+
+        jobs = []
+        for row in rows:
+            job = {
+                'id': row['id'],
+                'key': row['job_key'],
+                'attempts': row['attempts'] + 1,
+                'checkpoint': json.loads(row['checkpoint']) if row['checkpoint'] else None,
+            }
+            jobs.append({**json.loads(row['payload']), 'job': job})
+        self.claimed += len(jobs)
+        return jobs
+
+    def checkpoint(self, job, stage, item):
+        """Save a stage's output on the job and extend the lease"""
+        stages = (job['checkpoint'] or {}).get('stages', []) + [stage]
+        job['checkpoint'] = {'stages': stages, 'item': {k: v for k, v in item.items() if k != 'job'}}
+        self._execute(
+            "UPDATE scrape_jobs SET checkpoint = %s, lease_expires_at = NOW() + INTERVAL %s SECOND "
+            "WHERE id = %s AND lease_owner = %s",
+            (json.dumps(job['checkpoint'], default=str), LEASE_SECONDS, job['id'], self.worker_id)
+        )
+
+    def complete(self, job):
+        self._execute(
+            "UPDATE scrape_jobs SET status = 'done', checkpoint = NULL, lease_owner = NULL, "
+            "lease_expires_at = NULL, last_error = NULL WHERE id = %s AND lease_owner = %s",
+            (job['id'], self.worker_id)
+        )
+        self.completed += 1
+
+    def fail(self, job, error):
+        """Schedule a retry with exponential back-off, or give up after MAX_ATTEMPTS"""
+        if job['attempts'] >= MAX_ATTEMPTS:
+            status, delay = 'failed', 0
+            self.failed += 1
+        else:
+            status, delay = 'pending', min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (job['attempts'] - 1))
+            self.retried += 1
+        self._execute(
+            "UPDATE scrape_jobs SET status = %s, next_attempt_at = NOW() + INTERVAL %s SECOND, "
+            "lease_owner = NULL, lease_expires_at = NULL, last_error = %s WHERE id = %s AND lease_owner = %s",
+            (status, delay, str(error)[:2000], job['id'], self.worker_id)
+        )
+        print(f"Job {job['key']} failed (attempt {job['attempts']}): {error}"
+              + ("; giving up" if status == 'failed' else f"; retrying in {delay}s"))
+
+    def purge_done(self):
+        removed = self._execute(
+            "DELETE FROM scrape_jobs WHERE kind = %s AND status = 'done' AND updated_at < NOW() - INTERVAL %s DAY",
+            (self.kind, DONE_RETENTION_DAYS)
+        )
+        if removed:
+            print(f"Purged {removed} finished {self.kind} jobs")
+
+    def stats(self):
+        return {
+            'enqueued': self.enqueued,
+            'claimed': self.claimed,
+            'completed': self.completed,
+            'retried': self.retried,
+            'failed': self.failed,
+        }
+
+
+class JobStage(Stage):
+    """Wraps a pipeline stage so it runs against claimed jobs
+
+    Items are job dicts from JobQueue.claim. A stage an earlier attempt
+    already completed is skipped and its checkpointed output reused. A
+    stage failure schedules the job's retry; an item dropped by a stage, or
+    finishing the final stage, completes the job.
+    """
+
+    def __init__(self, queue, stage, final=False):
+        super().__init__(stage.name, stage.func, stage.concurrency, stage.mode)
+        self.stage = stage
+        self.queue = queue
+        self.final = final
+
+    async def call(self, item):
+        job = item['job']
+        checkpoint = job['checkpoint']
+        if checkpoint and self.name in checkpoint['stages']:
+            return {**checkpoint['item'], 'job': job}
+
+        try:
+            # The pipeline sets up this wrapper's executor; the wrapped stage runs on it
+            self.stage.executor = self.executor
+            result = await self.stage.call(item)
+        except Exception as e:
+            await asyncio.to_thread(self.queue.fail, job, e)
+            raise
+
+        if result is None or self.final:
+            await asyncio.to_thread(self.queue.complete, job)
+            return result
+        await asyncio.to_thread(self.queue.checkpoint, job, self.name, result)
+        # Stages may build a fresh dict (or run in another process); keep the job attached
+        result['job'] = job
+        return result
+
+    def input_done(self):
+        self.stage.input_done()
+
+    def stats(self):
+        # The pipeline counts on the wrapper; keep any extra stats the wrapped stage reports
+        return {**self.stage.stats(), **super().stats()}
@@ -1,8 +1,18 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from fastapi.responses import JSONResponse
+from typing import Dict, List, Optional
 from models import Project, ProjectCreate, Version, VersionCreate
 from database import db
+from admission import admission, Overloaded
+from coalesce import CoalesceMiddleware, SingleFlight
+from snapshot import SnapshotDatabase
+from content_codec import compress_content
+from rendering import html_cache
+import functools
+import math
+import os
+import threading
 from datetime import date
 from pydantic import BaseModel
 
@@ -13,8 +23,89 @@ class PaginatedResponse(BaseModel):
     per_page: int
     total_pages: int
 
+class BatchProjectsResponse(BaseModel):
+    data: Dict[str, Project]
+    missing: List[str]
+
+# Upper bound on identifiers accepted by the batch endpoint
+MAX_BATCH_IDS = 100
+
+# Snapshot mode: serve GET endpoints from a local read-only SQLite file built
+# by `python snapshot.py build`. Writes go to MySQL ("forward") or are
+# refused ("reject") so the API can run with no primary database at all.
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH')
+SNAPSHOT_WRITES = os.getenv('SNAPSHOT_WRITES', 'forward')
+
+def get_read_db():
+    """Database handle for read endpoints: snapshot file or a fresh MySQL connection"""
+    if SNAPSHOT_PATH:
+        return SnapshotDatabase(SNAPSHOT_PATH)
+    return db.__class__()
+
+# Query parameter shared by endpoints that return version content
+CONTENT_FORMAT_QUERY = Query("markdown", pattern="^(markdown|html)$", description="Version content format: markdown or html")
+
+def format_versions(versions, content_format):
+    """Swap markdown content for cached, sanitized HTML when format=html"""
+    if content_format == "html":
+        for version in versions:
+            version.content = html_cache.render(version.id, version.content)
+    return versions
+
+# DB-bound handlers are plain `def`s: FastAPI runs them on its threadpool, so
+# the admission slots bound parallel DB work instead of queueing blocking
+# calls on the event loop. Handlers writing through the shared `db`
+# connection take this lock, since a connection must not be used by two
+# threads at once.
+shared_db_lock = threading.Lock()
+
+def uses_shared_db(handler):
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        with shared_db_lock:
+            return handler(*args, **kwargs)
+    return wrapper
+
+def ensure_writable():
+    if SNAPSHOT_PATH and SNAPSHOT_WRITES == 'reject':
+        raise HTTPException(status_code=503, detail="API is serving a read-only snapshot")
+
 app = FastAPI(title="Project Updates API", version="1.0.0")
 
+# Identical concurrent GETs are coalesced inside admission control: every
+# request is charged to its own client's rate limit first, then only the
+# group's shared fetch takes a route-class slot and hits the database
+read_flight = SingleFlight()
+app.add_middleware(CoalesceMiddleware, flight=read_flight, classify=admission.classify, admit=admission.run)
+
+# Admission control is registered before CORS so that CORS stays the
+# outermost middleware and rejected responses still carry CORS headers
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    route_class = admission.classify(request.method, request.url.path)
+    if route_class is None:
+        return await call_next(request)
+
+    # Behind Vercel the real client is the first X-Forwarded-For entry
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for:
+        client_key = forwarded_for.split(",")[0].strip()
+    else:
+        client_key = request.client.host if request.client else "unknown"
+
+    try:
+        admission.check_client(client_key)
+        if request.method == "GET":
+            # CoalesceMiddleware takes the route-class slot for the shared fetch
+            return await call_next(request)
+        return await admission.run(route_class, lambda: call_next(request))
+    except Overloaded as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"detail": e.reason},
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +120,10 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
+    if SNAPSHOT_PATH:
+        print(f"Serving reads from snapshot: {SNAPSHOT_PATH} (writes: {SNAPSHOT_WRITES})")
+        if SNAPSHOT_WRITES == 'reject':
+            return
     if not db.connect():
         print("Failed to connect to database on startup")
     else:
@@ -43,7 +138,7 @@ async def root():
     return {"message": "Project Updates API"}
 
 @app.get("/projects", response_model=PaginatedResponse)
-async def get_projects(
+def get_projects(
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page")
 ):
@@ -51,7 +146,7 @@ async def get_projects(
     local_db = None
     try:
         # Create new database connection for this request
-        local_db = db.__class__()
+        local_db = get_read_db()
         if not local_db.connect():
             print("Failed to connect to database")
             return PaginatedResponse(data=[], total=0, page=page, per_page=per_page, total_pages=0)
@@ -122,13 +217,110 @@ async def get_projects(
         if local_db:
             local_db.disconnect()
 
+@app.get("/projects/batch", response_model=BatchProjectsResponse)
+def get_projects_batch(
+    ids: str = Query(..., description="Comma-separated project IDs or slugs"),
+    include_versions: bool = Query(False, description="Include versions for each project"),
+    versions_limit: int = Query(10, ge=1, le=100, description="Max versions per project"),
+    format: str = CONTENT_FORMAT_QUERY
+):
+    """批量获取项目详情 - 支持ID或slug混合"""
+    # Keep request order and drop duplicates / empty entries
+    identifiers = list(dict.fromkeys(i.strip() for i in ids.split(',') if i.strip()))
+    if not identifiers:
+        raise HTTPException(status_code=400, detail="No project IDs or slugs provided")
+    if len(identifiers) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Too many identifiers (max {MAX_BATCH_IDS})")
+
+    # Same rule as get_project: integers are IDs, anything else is a slug
+    id_params = []
+    slug_params = []
+    for identifier in identifiers:
+        try:
+            id_params.append(int(identifier))
+        except ValueError:
+            slug_params.append(identifier)
+
+    local_db = None
+    try:
+        # Create new database connection for this request
+        local_db = get_read_db()
+        if not local_db.connect():
+            raise HTTPException(status_code=500, detail="Failed to connect to database")
+
+        # Resolve all IDs and slugs with a single IN (...) query
+        conditions = []
+        params = []
+        if id_params:
+            conditions.append(f"id IN ({', '.join(['%s'] * len(id_params))})")
+            params.extend(id_params)
+        if slug_params:
+            conditions.append(f"slug IN ({', '.join(['%s'] * len(slug_params))})")
+            params.extend(slug_params)
+
+        projects_query = f"""
+        SELECT id, icon, name, slug, latest_version, latest_update_time, `describe`, summar, author, type 
+        FROM projects 
+        WHERE {' OR '.join(conditions)}
+        """
+        projects_data = local_db.execute_query(projects_query, tuple(params)) or []
+
+        by_id = {row['id']: row for row in projects_data}
+        by_slug = {row['slug']: row for row in projects_data if row['slug']}
+
+        # Load versions for every matched project in one grouped query,
+        # keeping only the newest `versions_limit` rows per project
+        versions_by_project = {}
+        if include_versions and by_id:
+            project_ids = list(by_id.keys())
+            versions_query = f"""
+            SELECT id, project_id, version, update_time, content, download_url
+            FROM (
+                SELECT id, project_id, version, update_time, content, download_url,
+                       ROW_NUMBER() OVER (PARTITION BY project_id ORDER BY update_time DESC) AS rn
+                FROM versions
+                WHERE project_id IN ({', '.join(['%s'] * len(project_ids))})
+            ) ranked
+            WHERE rn <= %s
+            ORDER BY project_id, update_time DESC
+            """
+            versions_data = local_db.execute_query(versions_query, (*project_ids, versions_limit)) or []
+            for version in format_versions([Version(**row) for row in versions_data], format):
+                versions_by_project.setdefault(version.project_id, []).append(version)
+
+        # Key results by the identifier the client asked for
+        data = {}
+        missing = []
+        for identifier in identifiers:
+            try:
+                row = by_id.get(int(identifier))
+            except ValueError:
+                row = by_slug.get(identifier)
+            if not row:
+                missing.append(identifier)
+                continue
+            data[identifier] = Project(**row, versions=versions_by_project.get(row['id'], []))
+
+        return BatchProjectsResponse(data=data, missing=missing)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_projects_batch: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error fetching projects: {str(e)}")
+    finally:
+        # Ensure database connection is closed
+        if local_db:
+            local_db.disconnect()
+
 @app.get("/projects/{project_id_or_slug}", response_model=Project)
-async def get_project(project_id_or_slug: str):
+def get_project(project_id_or_slug: str, format: str = CONTENT_FORMAT_QUERY):
     """获取单个项目详情 - 支持ID或slug"""
     local_db = None
     try:
         # Create new database connection for this request
-        local_db = db.__class__()
+        local_db = get_read_db()
         if not local_db.connect():
             raise HTTPException(status_code=500, detail="Failed to connect to database")
         
@@ -165,6 +357,7 @@ async def get_project(project_id_or_slug: str):
         versions_data = local_db.execute_query(versions_query, (project_id,))
         
         versions = [Version(**version) for version in versions_data] if versions_data else []
+        versions = format_versions(versions, format)
         
         project = Project(
             **project_data[0],
@@ -184,8 +377,8 @@ async def get_project(project_id_or_slug: str):
         if local_db:
             local_db.disconnect()
 
-@app.post("/projects", response_model=Project)
-async def create_project(project: ProjectCreate):
+@app.post("/projects", response_model=Project, dependencies=[Depends(ensure_writable)])
+def create_project(project: ProjectCreate):
     """创建新项目"""
     local_db = None
     try:
@@ -260,8 +453,9 @@ async def create_project(project: ProjectCreate):
         if local_db:
             local_db.disconnect()
 
-@app.post("/versions", response_model=Version)
-async def create_version(version: VersionCreate):
+@app.post("/versions", response_model=Version, dependencies=[Depends(ensure_writable)])
+@uses_shared_db
+def create_version(version: VersionCreate):
     """为项目创建新版本"""
     try:
         # Check if project exists
@@ -269,6 +463,11 @@ async def create_version(version: VersionCreate):
         if not project_check:
             raise HTTPException(status_code=404, detail="Project not found")
         
+        # (project_id, version) is unique
+        existing = db.execute_query("SELECT id FROM versions WHERE project_id = %s AND version = %s", (version.project_id, version.version))
+        if existing:
+            raise HTTPException(status_code=400, detail="Version already exists")
+        
         # Insert version
         insert_query = """
         INSERT INTO versions (project_id, version, update_time, content, download_url) 
@@ -276,7 +475,7 @@ async def create_version(version: VersionCreate):
         """
         version_id = db.execute_query(
             insert_query,
-            (version.project_id, version.version, version.update_time, version.content, version.download_url)
+            (version.project_id, version.version, version.update_time, compress_content(version.content), version.download_url)
         )
         
         # Check if insertion was successful
@@ -314,25 +513,37 @@ async def create_version(version: VersionCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating version: {str(e)}")
 
-@app.put("/versions/{version_id}", response_model=Version)
-async def update_version(version_id: int, version: VersionCreate):
+@app.put("/versions/{version_id}", response_model=Version, dependencies=[Depends(ensure_writable)])
+@uses_shared_db
+def update_version(version_id: int, version: VersionCreate):
     """更新版本信息"""
     try:
         # Check if version exists
-        version_check = db.execute_query("SELECT id FROM versions WHERE id = %s", (version_id,))
+        version_check = db.execute_query("SELECT id, project_id FROM versions WHERE id = %s", (version_id,))
         if not version_check:
             raise HTTPException(status_code=404, detail="Version not found")
         
+        # (project_id, version) is unique; another row may already have the new version
+        existing = db.execute_query(
+            "SELECT id FROM versions WHERE project_id = %s AND version = %s AND id <> %s",
+            (version_check[0]['project_id'], version.version, version_id)
+        )
+        if existing:
+            raise HTTPException(status_code=400, detail="Version already exists")
+        
         # Update version
         update_query = """
         UPDATE versions 
         SET version = %s, update_time = %s, content = %s, download_url = %s 
         WHERE id = %s
         """
-        db.execute_query(
+        result = db.execute_query(
             update_query,
-            (version.version, version.update_time, version.content, version.download_url, version_id)
+            (version.version, version.update_time, compress_content(version.content), version.download_url, version_id)
         )
+        if result is None:
+            raise HTTPException(status_code=500, detail="Failed to update version")
+        html_cache.invalidate(version_id)
         
         # Update project's latest version if this is newer
         update_project_query = """
@@ -359,8 +570,9 @@ async def update_version(version_id: int, version: VersionCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating version: {str(e)}")
 
-@app.delete("/versions/{version_id}")
-async def delete_version(version_id: int):
+@app.delete("/versions/{version_id}", dependencies=[Depends(ensure_writable)])
+@uses_shared_db
+def delete_version(version_id: int):
     """删除版本"""
     try:
         # Check if version exists
@@ -371,6 +583,7 @@ async def delete_version(version_id: int):
         # Delete version
         delete_query = "DELETE FROM versions WHERE id = %s"
         db.execute_query(delete_query, (version_id,))
+        html_cache.invalidate(version_id)
         
         return {"message": "Version deleted successfully"}
     except HTTPException:
@@ -378,8 +591,8 @@ async def delete_version(version_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting version: {str(e)}")
 
-@app.post("/projects/{project_id}/update", response_model=Project)
-async def update_project(project_id: int, project: ProjectCreate):
+@app.post("/projects/{project_id}/update", response_model=Project, dependencies=[Depends(ensure_writable)])
+def update_project(project_id: int, project: ProjectCreate):
     """更新项目信息"""
     print(f"Received update request for project_id: {project_id}")
     print(f"Project data: {project}")
@@ -452,12 +665,12 @@ async def update_project(project_id: int, project: ProjectCreate):
             local_db.disconnect()
 
 @app.get("/projects/{project_id}/versions", response_model=List[Version])
-async def get_project_versions(project_id: int):
+def get_project_versions(project_id: int, format: str = CONTENT_FORMAT_QUERY):
     """获取特定项目的版本列表"""
     local_db = None
     try:
         # Create new database connection for this request
-        local_db = db.__class__()
+        local_db = get_read_db()
         if not local_db.connect():
             raise HTTPException(status_code=500, detail="Failed to connect to database")
 
@@ -477,7 +690,7 @@ async def get_project_versions(project_id: int):
 
         versions = [Version(**version) for version in versions_data] if versions_data else []
 
-        return versions
+        return format_versions(versions, format)
     except HTTPException:
         raise
     except Exception as e:
@@ -490,8 +703,9 @@ async def get_project_versions(project_id: int):
         if local_db:
             local_db.disconnect()
 
-@app.delete("/projects/{project_id}")
-async def delete_project(project_id: int):
+@app.delete("/projects/{project_id}", dependencies=[Depends(ensure_writable)])
+@uses_shared_db
+def delete_project(project_id: int):
     """删除项目"""
     try:
         # Check if project exists
@@ -0,0 +1,9 @@
+-- Store version content as bytes so it can hold compressed payloads
+-- (MySQL 8.0+). Existing UTF-8 text is kept byte-for-byte and is still
+-- readable as uncompressed content; run compress_versions.py afterwards
+-- to compress existing rows in batches.
+
+ALTER TABLE versions MODIFY content MEDIUMBLOB NOT NULL;
+
+-- Verify the column type
+DESCRIBE versions;
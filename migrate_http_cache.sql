@@ -0,0 +1,14 @@
+-- Stored ETag / Last-Modified validators and bodies for conditional
+-- upstream requests (http_cache.py). Bodies are stored compressed.
+
+CREATE TABLE IF NOT EXISTS http_cache (
+    url_hash CHAR(64) NOT NULL PRIMARY KEY,
+    url VARCHAR(1000) NOT NULL,
+    etag VARCHAR(255),
+    last_modified VARCHAR(64),
+    body MEDIUMBLOB NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Verify the table
+DESCRIBE http_cache;
@@ -0,0 +1,15 @@
+-- Per-scraper, per-repository high-water marks for incremental GitHub
+-- scraping: the newest release each scraper has already processed.
+
+CREATE TABLE IF NOT EXISTS repo_state (
+    scraper VARCHAR(50) NOT NULL,
+    owner VARCHAR(100) NOT NULL,
+    repo VARCHAR(100) NOT NULL,
+    last_published_at DATETIME NOT NULL,
+    last_tag VARCHAR(255),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (scraper, owner, repo)
+);
+
+-- Verify the table
+DESCRIBE repo_state;
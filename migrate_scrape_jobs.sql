@@ -0,0 +1,24 @@
+-- Durable scrape job queue: one row per unit of work (e.g. a release to
+-- clean, translate and save), with its lease, retry schedule and the
+-- checkpointed output of the stages already completed.
+
+CREATE TABLE IF NOT EXISTS scrape_jobs (
+    id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    job_key VARCHAR(255) NOT NULL,
+    payload MEDIUMTEXT NOT NULL,
+    checkpoint MEDIUMTEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INT UNSIGNED NOT NULL DEFAULT 0,
+    lease_owner VARCHAR(100),
+    lease_expires_at DATETIME,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uniq_job (kind, job_key),
+    INDEX idx_claim (kind, status, next_attempt_at)
+);
+
+-- Verify the table
+DESCRIBE scrape_jobs;
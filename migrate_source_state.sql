@@ -0,0 +1,35 @@
+-- Per-scraper polling state for release sources. The GitHub and stable-only
+-- scrapers poll the same sources; with one shared schedule the first to run
+-- pushed next_due_at forward and the other found nothing due.
+
+CREATE TABLE IF NOT EXISTS source_state (
+    source_id INT(10) UNSIGNED NOT NULL,
+    scraper VARCHAR(50) NOT NULL,
+    poll_interval_seconds INT UNSIGNED,
+    cadence_seconds DOUBLE,
+    last_release_at DATETIME,
+    last_success_at DATETIME,
+    next_due_at DATETIME,
+    PRIMARY KEY (source_id, scraper),
+    INDEX idx_due (scraper, next_due_at),
+    FOREIGN KEY (source_id) REFERENCES sources(id) ON DELETE CASCADE
+);
+
+-- Carry the shared state over to every scraper of each source type
+INSERT IGNORE INTO source_state (source_id, scraper, poll_interval_seconds, cadence_seconds, last_release_at, last_success_at, next_due_at)
+SELECT s.id, scrapers.name, s.poll_interval_seconds, s.cadence_seconds, s.last_release_at, s.last_success_at, s.next_due_at
+FROM sources s
+JOIN (SELECT 'github' AS type, 'github' AS name UNION ALL
+      SELECT 'github', 'stable' UNION ALL
+      SELECT 'feed', 'vscode') scrapers ON scrapers.type = s.type;
+
+ALTER TABLE sources
+    DROP INDEX idx_due,
+    DROP COLUMN poll_interval_seconds,
+    DROP COLUMN cadence_seconds,
+    DROP COLUMN last_release_at,
+    DROP COLUMN last_success_at,
+    DROP COLUMN next_due_at;
+
+-- Verify the table
+DESCRIBE source_state;
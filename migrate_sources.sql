@@ -0,0 +1,29 @@
+-- Registry of tracked release sources with adaptive polling (sources.py).
+-- Replaces the repository and feed lists hardcoded in the scrapers.
+
+CREATE TABLE IF NOT EXISTS sources (
+    id INT(10) UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    type VARCHAR(20) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    owner VARCHAR(100),
+    repo VARCHAR(100),
+    url VARCHAR(500),
+    enabled TINYINT(1) NOT NULL DEFAULT 1,
+    poll_interval_seconds INT UNSIGNED,
+    cadence_seconds DOUBLE,
+    last_release_at DATETIME,
+    last_success_at DATETIME,
+    next_due_at DATETIME,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uniq_github (type, owner, repo),
+    UNIQUE KEY uniq_url (type, url),
+    INDEX idx_due (type, enabled, next_due_at)
+);
+
+INSERT IGNORE INTO sources (type, name, owner, repo, url) VALUES
+('github', 'Next.js', 'vercel', 'next.js', NULL),
+('github', 'React', 'facebook', 'react', NULL),
+('feed', 'Visual Studio Code', NULL, NULL, 'https://code.visualstudio.com/feed.xml');
+
+-- Verify the table
+SELECT id, type, name, owner, repo, url FROM sources;
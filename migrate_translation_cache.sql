@@ -0,0 +1,19 @@
+-- Persistent translation cache used by translation.py
+-- Keyed by sha256(engine, source language, target language, source text);
+-- rows unused for TRANSLATION_CACHE_TTL_DAYS are pruned by the scrapers.
+
+CREATE TABLE IF NOT EXISTS translation_cache (
+    cache_key CHAR(64) NOT NULL PRIMARY KEY,
+    engine VARCHAR(32) NOT NULL,
+    source_lang VARCHAR(10) NOT NULL,
+    target_lang VARCHAR(10) NOT NULL,
+    source_length INT UNSIGNED NOT NULL,
+    translated_text MEDIUMTEXT NOT NULL,
+    hits INT UNSIGNED NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_last_used_at (last_used_at)
+) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Verify the table
+DESCRIBE translation_cache;
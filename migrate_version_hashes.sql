@@ -0,0 +1,9 @@
+-- Change detection for scraped versions: a hash of the upstream source a
+-- version was built from. Scrapers skip versions whose source hash is
+-- unchanged.
+
+ALTER TABLE versions
+    ADD COLUMN source_hash CHAR(64) NULL AFTER download_url;
+
+-- Verify the table
+DESCRIBE versions;
@@ -0,0 +1,11 @@
+-- One row per (project_id, version), so scrapers can upsert versions in bulk
+-- instead of reading existing versions first.
+
+-- Remove duplicates left by concurrent scraper runs, keeping the newest row
+DELETE v FROM versions v
+JOIN versions newer ON newer.project_id = v.project_id AND newer.version = v.version AND newer.id > v.id;
+
+ALTER TABLE versions ADD UNIQUE KEY uniq_project_version (project_id, version);
+
+-- Verify the table
+SHOW INDEX FROM versions;
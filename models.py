@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import List, Optional
 from datetime import date
+from content_codec import decompress_content
 
 class Version(BaseModel):
     id: Optional[int] = None
@@ -10,6 +11,12 @@ class Version(BaseModel):
     content: str
     download_url: str
 
+    # Stored content may be compressed; decode only when a Version is built
+    @field_validator('content', mode='before')
+    @classmethod
+    def decode_content(cls, value):
+        return decompress_content(value)
+
 from datetime import date as date_type
 
 class Project(BaseModel):
@@ -0,0 +1,162 @@
+"""
+Bounded-concurrency pipeline engine for the scrapers
+Items flow from a source through independent stages connected by bounded
+queues. Each stage runs its own number of workers, so a slow item only
+occupies one worker instead of holding back a whole batch, and a full queue
+pauses the stages in front of it (backpressure) instead of fixed sleeps.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Sentinel telling a worker that its input is exhausted
+_DONE = object()
+
+_process_pool = None
+
+
+def get_process_pool():
+    """Long-lived process pool shared by all CPU-bound stages"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=int(os.getenv('SCRAPE_PROCESS_WORKERS', os.cpu_count() or 2)))
+    return _process_pool
+
+
+class Stage:
+    """One pipeline step
+
+    func takes an item and returns the item for the next stage, or None to
+    drop it. mode selects how func runs:
+      'async'   - coroutine function awaited on the event loop (network I/O)
+      'thread'  - blocking function run on the stage's own thread pool (DB, SDK calls)
+      'process' - CPU-bound, picklable function run on the shared process pool
+    """
+
+    def __init__(self, name, func, concurrency=1, mode='async'):
+        if mode not in ('async', 'thread', 'process'):
+            raise ValueError(f"Unknown stage mode: {mode}")
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.mode = mode
+        self.executor = None
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy_time = 0.0
+
+    async def call(self, item):
+        if self.mode == 'async':
+            return await self.func(item)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.func, item)
+
+    def input_done(self):
+        """Called when no more items will arrive; stages that buffer flush here"""
+
+    def stats(self):
+        return {
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'busy_seconds': round(self.busy_time, 2),
+        }
+
+
+class Pipeline:
+    """Runs a source through a list of stages"""
+
+    def __init__(self, name, stages, queue_size=None):
+        self.name = name
+        self.stages = stages
+        # Enough buffered items to keep the next stage busy, but bounded
+        self.queue_size = queue_size or max(stage.concurrency for stage in stages) * 2
+
+    async def _feed(self, source, queue):
+        """Returns the number of items fed and the error that stopped the source, if any"""
+        fed = 0
+        try:
+            if hasattr(source, '__aiter__'):
+                async for item in source:
+                    await queue.put(item)
+                    fed += 1
+            else:
+                for item in source:
+                    await queue.put(item)
+                    fed += 1
+        except Exception as e:
+            print(f"[{self.name}] Source failed after {fed} items: {e}")
+            return fed, e
+        return fed, None
+
+    async def _worker(self, index, in_queue, out_queue):
+        stage = self.stages[index]
+        while True:
+            item = await in_queue.get()
+            if item is _DONE:
+                stage.input_done()
+                return
+            start_time = time.time()
+            try:
+                result = await stage.call(item)
+            except Exception as e:
+                stage.failed += 1
+                print(f"[{self.name}] Stage '{stage.name}' failed: {e}")
+                continue
+            finally:
+                stage.busy_time += time.time() - start_time
+            if result is None:
+                stage.dropped += 1
+                continue
+            stage.processed += 1
+            if out_queue is not None:
+                await out_queue.put(result)
+
+    async def _run_stage(self, index, in_queue, out_queue):
+        stage = self.stages[index]
+        workers = [asyncio.create_task(self._worker(index, in_queue, out_queue)) for _ in range(stage.concurrency)]
+        await asyncio.gather(*workers)
+        # All workers are done; tell every worker of the next stage to stop
+        if out_queue is not None:
+            for _ in range(self.stages[index + 1].concurrency):
+                await out_queue.put(_DONE)
+
+    async def run(self, source):
+        """Push every item from `source` (sync or async iterable) through the stages
+
+        If the source raises, the items it produced so far still finish
+        their stages, then the error is raised so the run does not count as
+        complete.
+        """
+        start_time = time.time()
+        for stage in self.stages:
+            if stage.mode == 'thread':
+                stage.executor = ThreadPoolExecutor(max_workers=stage.concurrency, thread_name_prefix=stage.name)
+            elif stage.mode == 'process':
+                stage.executor = get_process_pool()
+
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        stage_tasks = [
+            asyncio.create_task(self._run_stage(i, queues[i], queues[i + 1] if i + 1 < len(self.stages) else None))
+            for i in range(len(self.stages))
+        ]
+        try:
+            fed, source_error = await self._feed(source, queues[0])
+            for _ in range(self.stages[0].concurrency):
+                await queues[0].put(_DONE)
+            await asyncio.gather(*stage_tasks)
+        finally:
+            for stage in self.stages:
+                if stage.mode == 'thread' and stage.executor:
+                    stage.executor.shutdown(wait=False)
+
+        elapsed = time.time() - start_time
+        print(f"\n[{self.name}] {fed} items in {elapsed:.2f} seconds")
+        for stage in self.stages:
+            print(f"  {stage.name:<12} {stage.stats()}")
+        if source_error is not None:
+            raise source_error
+        return {stage.name: stage.stats() for stage in self.stages}
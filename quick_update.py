@@ -4,9 +4,13 @@ Quick update for remaining GitHub releases
 """
 
 from database import db
+from content_codec import compress_content, decompress_content
 import os
 import sys
 
+# Versions handled per run; run the script again for the next batch
+BATCH_LIMIT = 50
+
 def quick_update():
     """Quick update remaining versions"""
     try:
@@ -14,31 +18,30 @@ def quick_update():
             print("Failed to connect to database")
             return False
 
-        # Get remaining versions that haven't been updated (check for newlines)
+        # Get GitHub versions; content may be compressed, so the check for
+        # versions that haven't been updated (no newlines) happens below
         query = """
-            SELECT v.id, v.version, v.content, p.name as project_name
+            SELECT v.id, v.version, v.content
             FROM versions v
             JOIN projects p ON v.project_id = p.id
             WHERE p.name LIKE '%/%' 
-            AND v.content NOT LIKE '%\n%'
             ORDER BY v.update_time DESC
-            LIMIT 50
         """
-        versions = db.execute_query(query)
-        
-        if not versions:
-            print("No more versions to update")
-            return True
-        
-        print(f"Found {len(versions)} versions to update")
+        # Stream rows and collect the reformatted content; writes have to wait
+        # until the unbuffered result set is fully read
+        updates = []
+        candidates = 0
         
         # Update with simple formatting (add newlines for list items)
-        for v in versions:
-            version_id = v['id']
-            version = v['version']
-            content = v['content']
-            
-            print(f"Updating {version}...")
+        for version_id, version, content in db.iter_query(query, row_type='tuple'):
+            content = decompress_content(content)
+            if not content or '\n' in content:
+                continue
+            candidates += 1
+            if candidates > BATCH_LIMIT:
+                # Stopping early drains the rest of the result set
+                break
+            print(f"Formatting {version}...")
             
             # Simple formatting: replace bullet points with newlines
             if content and '- ' in content:
@@ -64,11 +67,19 @@ def quick_update():
                 formatted_content = formatted_content.replace('#', '\n#')
                 formatted_content = formatted_content.replace('\n\n#', '\n#')
                 formatted_content = formatted_content.strip()
-                
-                # Update database
-                update_query = "UPDATE versions SET content = %s WHERE id = %s"
-                db.execute_query(update_query, (formatted_content, version_id))
-                print(f"  Updated")
+                updates.append((formatted_content, version_id))
+        
+        if not updates:
+            print("No more versions to update")
+            return True
+        
+        print(f"Found {len(updates)} versions to update")
+        
+        # Update database
+        update_query = "UPDATE versions SET content = %s WHERE id = %s"
+        for formatted_content, version_id in updates:
+            db.execute_query(update_query, (compress_content(formatted_content), version_id))
+        print(f"  Updated {len(updates)} versions")
 
         print("\nQuick update completed!")
         return True
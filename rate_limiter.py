@@ -0,0 +1,97 @@
+"""
+Shared token-bucket rate limiting for upstream APIs
+Each upstream (GitHub REST, Tencent TMT, the VS Code site) gets one bucket
+whose state lives in a local SQLite file, so every coroutine, thread and
+scraper process on the machine draws from the same budget. Callers reserve
+a token and sleep exactly until it becomes available, which keeps
+throughput at the configured rate instead of fixed sleeps between calls.
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'logup_rate_limits.sqlite3'))
+
+
+class SharedTokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding up to `burst`
+
+    Reservations may take the balance below zero; the caller then waits for
+    the deficit to refill, so concurrent callers queue in order rather than
+    retrying in a loop.
+    """
+
+    def __init__(self, name, rate, burst, path=RATE_LIMIT_DB):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Invalid rate limit for {name}: rate={rate}, burst={burst}")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = None
+        self.acquired = 0
+        self.waited = 0.0
+
+    def _connect(self):
+        if self.connection is None:
+            # Autocommit mode; transactions are opened explicitly below
+            self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+        return self.connection
+
+    def reserve(self, tokens=1):
+        """Take tokens from the shared bucket and return how long to wait for them"""
+        with self.lock:
+            connection = self._connect()
+            # BEGIN IMMEDIATE takes the file's write lock, serializing processes
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = connection.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                available = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+                remaining = available - tokens
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.name, remaining, now)
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        wait = max(0.0, -remaining / self.rate)
+        self.acquired += tokens
+        self.waited += wait
+        return wait
+
+    def acquire(self, tokens=1):
+        """Blocking acquire for worker threads"""
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """Acquire without blocking the event loop"""
+        wait = await asyncio.to_thread(self.reserve, tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def stats(self):
+        return {'acquired': self.acquired, 'waited_seconds': round(self.waited, 2)}
+
+
+github_limiter = SharedTokenBucket(
+    'github', float(os.getenv('GITHUB_QPS', 1.2)), int(os.getenv('GITHUB_BURST', 10))
+)
+tmt_limiter = SharedTokenBucket(
+    'tmt', float(os.getenv('TMT_QPS', 5)), int(os.getenv('TMT_BURST', 5))
+)
+vscode_limiter = SharedTokenBucket(
+    'vscode', float(os.getenv('VSCODE_QPS', 2)), int(os.getenv('VSCODE_BURST', 4))
+)
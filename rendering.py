@@ -0,0 +1,77 @@
+"""
+Server-side HTML rendering of version content
+Release notes are stored as markdown; clients that ask for format=html get
+sanitized HTML that is rendered once per (version id, content hash) and
+kept in a bounded in-process LRU cache.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import bleach
+import markdown
+
+ALLOWED_TAGS = [
+    "a", "abbr", "b", "blockquote", "br", "code", "del", "em", "h1", "h2", "h3",
+    "h4", "h5", "h6", "hr", "i", "img", "li", "ol", "p", "pre", "strong", "sub",
+    "sup", "table", "tbody", "td", "th", "thead", "tr", "ul",
+]
+ALLOWED_ATTRIBUTES = {
+    "a": ["href", "title"],
+    "img": ["src", "alt", "title"],
+    "code": ["class"],
+    "th": ["align"],
+    "td": ["align"],
+}
+ALLOWED_PROTOCOLS = ["http", "https", "mailto"]
+
+
+def render_markdown(content):
+    """Convert markdown to HTML and strip anything outside the allowlist"""
+    html = markdown.markdown(content or "", extensions=["fenced_code", "tables", "sane_lists"])
+    return bleach.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES,
+                        protocols=ALLOWED_PROTOCOLS, strip=True)
+
+
+class HtmlRenderCache:
+    """LRU of rendered HTML keyed by version id, validated by content hash
+
+    A version whose content changed (PUT /versions, a scraper rewrite) hashes
+    differently, so its stale entry is replaced on the next read even when
+    the change was made by another process.
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, version_id, content):
+        content_hash = hashlib.sha1((content or "").encode("utf-8")).hexdigest()
+        with self.lock:
+            entry = self.entries.get(version_id)
+            if entry and entry[0] == content_hash:
+                self.entries.move_to_end(version_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Render outside the lock; a concurrent duplicate render is harmless
+        html = render_markdown(content)
+        with self.lock:
+            self.entries[version_id] = (content_hash, html)
+            self.entries.move_to_end(version_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return html
+
+    def invalidate(self, version_id):
+        with self.lock:
+            self.entries.pop(version_id, None)
+
+
+html_cache = HtmlRenderCache(int(os.getenv('HTML_CACHE_SIZE', 2048)))
@@ -23,12 +23,96 @@ CREATE TABLE IF NOT EXISTS versions (
     project_id INT(10) UNSIGNED NOT NULL,
     version VARCHAR(50) NOT NULL,
     update_time DATE NOT NULL,
-    content TEXT NOT NULL,
+    content MEDIUMBLOB NOT NULL,
     download_url VARCHAR(500) NOT NULL,
+    source_hash CHAR(64),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE,
     INDEX idx_project_id (project_id),
-    INDEX idx_version (version)
+    INDEX idx_version (version),
+    UNIQUE KEY uniq_project_version (project_id, version)
+);
+
+-- Create translation cache table
+CREATE TABLE IF NOT EXISTS translation_cache (
+    cache_key CHAR(64) NOT NULL PRIMARY KEY,
+    engine VARCHAR(32) NOT NULL,
+    source_lang VARCHAR(10) NOT NULL,
+    target_lang VARCHAR(10) NOT NULL,
+    source_length INT UNSIGNED NOT NULL,
+    translated_text MEDIUMTEXT NOT NULL,
+    hits INT UNSIGNED NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_last_used_at (last_used_at)
+) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Create HTTP validator cache table
+CREATE TABLE IF NOT EXISTS http_cache (
+    url_hash CHAR(64) NOT NULL PRIMARY KEY,
+    url VARCHAR(1000) NOT NULL,
+    etag VARCHAR(255),
+    last_modified VARCHAR(64),
+    body MEDIUMBLOB NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Create GitHub high-water mark table
+CREATE TABLE IF NOT EXISTS repo_state (
+    scraper VARCHAR(50) NOT NULL,
+    owner VARCHAR(100) NOT NULL,
+    repo VARCHAR(100) NOT NULL,
+    last_published_at DATETIME NOT NULL,
+    last_tag VARCHAR(255),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (scraper, owner, repo)
+);
+
+-- Create release source registry table
+CREATE TABLE IF NOT EXISTS sources (
+    id INT(10) UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    type VARCHAR(20) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    owner VARCHAR(100),
+    repo VARCHAR(100),
+    url VARCHAR(500),
+    enabled TINYINT(1) NOT NULL DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uniq_github (type, owner, repo),
+    UNIQUE KEY uniq_url (type, url)
+);
+
+-- Create per-scraper source polling state table
+CREATE TABLE IF NOT EXISTS source_state (
+    source_id INT(10) UNSIGNED NOT NULL,
+    scraper VARCHAR(50) NOT NULL,
+    poll_interval_seconds INT UNSIGNED,
+    cadence_seconds DOUBLE,
+    last_release_at DATETIME,
+    last_success_at DATETIME,
+    next_due_at DATETIME,
+    PRIMARY KEY (source_id, scraper),
+    INDEX idx_due (scraper, next_due_at),
+    FOREIGN KEY (source_id) REFERENCES sources(id) ON DELETE CASCADE
+);
+
+-- Create durable scrape job queue table
+CREATE TABLE IF NOT EXISTS scrape_jobs (
+    id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    job_key VARCHAR(255) NOT NULL,
+    payload MEDIUMTEXT NOT NULL,
+    checkpoint MEDIUMTEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INT UNSIGNED NOT NULL DEFAULT 0,
+    lease_owner VARCHAR(100),
+    lease_expires_at DATETIME,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uniq_job (kind, job_key),
+    INDEX idx_claim (kind, status, next_attempt_at)
 );
 
 -- Insert sample data
@@ -50,4 +134,10 @@ INSERT INTO versions (project_id, version, update_time, content, download_url) V
 
 -- Insert sample versions for Project Gamma (id=3)
 INSERT INTO versions (project_id, version, update_time, content, download_url) VALUES
-(3, 'v3.0.1', '2024-01-14', '修复关键错误\n改进用户体验\n新增配置选项', 'https://example.com/download/gamma-v3.0.1');
\ No newline at end of file
+(3, 'v3.0.1', '2024-01-14', '修复关键错误\n改进用户体验\n新增配置选项', 'https://example.com/download/gamma-v3.0.1');
+
+-- Tracked release sources
+INSERT INTO sources (type, name, owner, repo, url) VALUES
+('github', 'Next.js', 'vercel', 'next.js', NULL),
+('github', 'React', 'facebook', 'react', NULL),
+('feed', 'Visual Studio Code', NULL, NULL, 'https://code.visualstudio.com/feed.xml');
\ No newline at end of file
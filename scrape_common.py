@@ -0,0 +1,221 @@
+"""
+Shared scraping steps
+HTML cleaning and version persistence used by every scraper, plus the
+default per-stage concurrency limits for the scraping pipelines.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import markdownify
+from bs4 import BeautifulSoup
+
+from content_codec import compress_content
+from database import Database
+from pipeline import Stage
+
+# Per-stage concurrency limits (network fetch, CPU cleaning, translation)
+FETCH_CONCURRENCY = int(os.getenv('SCRAPE_FETCH_CONCURRENCY', 8))
+CLEAN_CONCURRENCY = int(os.getenv('SCRAPE_CLEAN_CONCURRENCY', 4))
+TRANSLATE_CONCURRENCY = int(os.getenv('SCRAPE_TRANSLATE_CONCURRENCY', 4))
+
+# Persisted versions are written in transactions of up to this many rows,
+# or after this many seconds, whichever comes first
+PERSIST_BATCH_SIZE = int(os.getenv('SCRAPE_PERSIST_BATCH_SIZE', 50))
+PERSIST_FLUSH_SECONDS = float(os.getenv('SCRAPE_PERSIST_FLUSH_SECONDS', 1.0))
+
+
+def clean_html_content(content):
+    """Convert HTML content to Markdown format and remove HTML tags"""
+    if not content:
+        return ""
+    try:
+        # Ensure content is properly encoded
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+
+        # Use markdownify to convert HTML to Markdown with better formatting
+        md_content = markdownify.markdownify(content, heading_style="ATX")
+        # Clean up extra whitespace and newlines
+        md_content = re.sub(r'\n\s*\n', '\n\n', md_content)
+        md_content = re.sub(r'\n{3,}', '\n\n', md_content)  # Limit consecutive newlines to 2
+        md_content = md_content.strip()
+        return md_content
+    except Exception as e:
+        print(f"Error converting HTML to Markdown: {e}")
+        # Fallback to simple tag removal
+        clean = re.compile('<.*?>')
+        cleaned_content = re.sub(clean, '', content).strip()
+        return cleaned_content
+
+
+def extract_article_content(html):
+    """Pick the main article element out of a downloaded page"""
+    if not html:
+        return ""
+    try:
+        soup = BeautifulSoup(html, 'html.parser')
+        for script in soup(["script", "style"]):
+            script.decompose()
+        content_selectors = ['article', '.content', '.main-content', '.post-content', '.entry-content', 'main', '.article-content']
+        content = ""
+        for selector in content_selectors:
+            element = soup.select_one(selector)
+            if element:
+                content = str(element)
+                break
+        if not content:
+            body = soup.find('body')
+            if body:
+                for element in body.find_all(['header', 'footer', 'nav', 'aside']):
+                    element.decompose()
+                content = str(body)
+        return content[:5000] if content else ""
+    except Exception as e:
+        print(f"Error extracting article content: {e}")
+        return ""
+
+
+def content_digest(*parts):
+    """sha256 hex digest of a sequence of text fields"""
+    text = '\0'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def load_source_hashes(database, project_id):
+    """{version: source_hash} for a project's stored versions
+
+    Scrapers compare these with the hash of the upstream source and skip
+    cleaning, translating and rewriting versions whose source is unchanged.
+    """
+    query = "SELECT version, source_hash FROM versions WHERE project_id = %s"
+    return {version: source_hash for version, source_hash in database.iter_query(query, (project_id,), row_type='tuple')}
+
+
+def save_versions_to_db(versions_data, database, overwrite=True):
+    """Upsert versions in one multi-row statement
+
+    Relies on the unique (project_id, version) key: existing versions get
+    the new date, content and download URL, or are left untouched when
+    overwrite is False. Concurrent scrapers therefore never duplicate a row.
+    The upstream source hash is saved alongside.
+    """
+    try:
+        if not versions_data:
+            return True
+        start_time = time.time()
+        if overwrite:
+            on_duplicate = (
+                "update_time = VALUES(update_time), content = VALUES(content), download_url = VALUES(download_url), "
+                "source_hash = VALUES(source_hash)"
+            )
+        else:
+            on_duplicate = "id = id"
+        upsert_query = (
+            "INSERT INTO versions (project_id, version, update_time, content, download_url, source_hash) "
+            f"VALUES (%s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE {on_duplicate}"
+        )
+        rows = [
+            (v['project_id'], v['version'], v['update_date'], compress_content(v['content']), v['download_url'],
+             v.get('source_hash'))
+            for v in versions_data
+        ]
+        affected = database.execute_many(upsert_query, rows)
+        if affected is None:
+            return False
+        # MySQL counts 1 per inserted row and 2 per updated row
+        print(f"Upserted {len(rows)} versions ({affected} rows affected). Took {time.time() - start_time:.2f} seconds.")
+        return True
+    except Exception as e:
+        print(f"Error saving versions to database: {e}")
+        return False
+
+
+class PersistStage(Stage):
+    """Final pipeline stage writing processed versions in small batches
+
+    Items are buffered as they complete and flushed by `save(items,
+    database)` once batch_size are waiting or flush_seconds after the first
+    one arrived, so rows become visible progressively and each flush costs
+    one transaction. The last partial batch is flushed as soon as the input
+    ends. A call returns only after its item's batch is saved (or raises if
+    it failed). Flushes run one at a time on a dedicated
+    connection and thread, never on the event loop.
+    """
+
+    def __init__(self, name='persist', save=save_versions_to_db, batch_size=PERSIST_BATCH_SIZE, flush_seconds=PERSIST_FLUSH_SECONDS):
+        self.database = Database()
+        self.save = save
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.timer = None
+        self.flush_tasks = set()
+        self.flush_executor = None
+        self.flushes = 0
+        self.flush_time = 0.0
+        self.max_flush_time = 0.0
+        # One waiting worker per buffered item, so a full batch can build up
+        super().__init__(name, None, concurrency=batch_size, mode='async')
+
+    async def call(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self.buffer.append((item, future))
+        if len(self.buffer) >= self.batch_size:
+            self._flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.flush_seconds, self._flush)
+        return await future
+
+    def input_done(self):
+        self._flush()
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.buffer = self.buffer, []
+        if batch:
+            task = asyncio.create_task(self._write(batch))
+            self.flush_tasks.add(task)
+            task.add_done_callback(self.flush_tasks.discard)
+
+    async def _write(self, batch):
+        items = [item for item, _ in batch]
+        start_time = time.time()
+        try:
+            saved = await asyncio.get_running_loop().run_in_executor(self.flush_executor, self.save, items, self.database)
+            error = None if saved else RuntimeError(f"Failed to save {len(items)} versions")
+        except Exception as e:
+            error = e
+        elapsed = time.time() - start_time
+        self.flushes += 1
+        self.flush_time += elapsed
+        self.max_flush_time = max(self.max_flush_time, elapsed)
+        print(f"[{self.name}] Flushed {len(items)} versions in {elapsed:.3f}s" + (f" (failed: {error})" if error else ""))
+        for item, future in batch:
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(item)
+
+    def stats(self):
+        stats = super().stats()
+        stats['flushes'] = self.flushes
+        stats['avg_flush_seconds'] = round(self.flush_time / self.flushes, 3) if self.flushes else 0.0
+        stats['max_flush_seconds'] = round(self.max_flush_time, 3)
+        return stats
+
+    def __enter__(self):
+        if not self.database.connect():
+            raise RuntimeError("Failed to connect to database")
+        self.flush_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.flush_executor.shutdown(wait=True)
+        self.database.disconnect()
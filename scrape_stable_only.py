@@ -3,16 +3,19 @@
 Efficient GitHub releases scraper for stable versions only
 """
 
-import requests
+import asyncio
+import aiohttp
 import json
 import os
-import time
 from datetime import datetime
 from database import db
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
+from github_scraper import fetch_releases_bulk, load_high_water_marks, newest_release, release_source_hash, save_high_water_marks
+from github_client import scheduler
+from http_cache import http_cache
+from pipeline import Pipeline, Stage
+from translation import translate_to_chinese, translator
+from scrape_common import PersistStage, load_source_hashes, save_versions_to_db, TRANSLATE_CONCURRENCY
+from sources import list_sources, record_poll
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -20,185 +23,151 @@ backend_dir = os.path.dirname(__file__)
 os.chdir(backend_dir)
 load_dotenv()
 
-def translate_text(text):
-    """Simple translation function with fallback"""
-    if not text or len(text.strip()) == 0:
-        return text
-    
-    try:
-        secret_id = os.getenv('TENCENT_SECRET_ID')
-        secret_key = os.getenv('TENCENT_SECRET_KEY')
-        region = os.getenv('TENCENT_REGION', 'ap-beijing')
-        
-        if not secret_id or not secret_key:
-            return text
+def stable_releases(releases):
+    """Filter only stable releases"""
+    return [r for r in releases if not r.get('prerelease', False)]
+
+def release_version(release):
+    tag_name = release.get('tag_name', '')
+    version = tag_name.lstrip('v')
+    if not version.startswith('v'):
+        version = f"v{version}"
+    return version
+
+async def iter_new_releases(repos, session, marks, new_marks, release_times):
+    """Pipeline source: yields stable releases not yet in the database"""
+    # All repositories are fetched together (one GraphQL query covers many),
+    # and only releases published after each high-water mark come back
+    print("Fetching new releases...")
+    releases_by_repo = await fetch_releases_bulk(repos, session, marks)
+
+    for owner, repo in repos:
+        print(f"\n{'='*60}")
+        print(f"Scraping {owner}/{repo}")
+        print(f"{'='*60}")
         
-        # Skip if too long
-        if len(text) > 5000:
-            return text[:2000] + "\n\n[内容过长，已截断]"
+        # Get or create project
+        project_name = f"{owner}/{repo}"
+        project = db.execute_query("SELECT id FROM projects WHERE name = %s", (project_name,))
         
-        cred = credential.Credential(secret_id, secret_key)
-        http_profile = HttpProfile(endpoint="tmt.tencentcloudapi.com")
-        client_profile = ClientProfile(httpProfile=http_profile)
-        client = tmt_client.TmtClient(cred, region, client_profile)
+        if project:
+            project_id = project[0]['id']
+            print(f"Found existing project: {project_name} (ID: {project_id})")
+        else:
+            # Create project
+            icon = "JS"  # Default icon
+            project_id = db.execute_query("INSERT INTO projects (icon, name) VALUES (%s, %s)", (icon, project_name))
+            print(f"Created new project: {project_name} (ID: {project_id})")
         
-        req = models.TextTranslateRequest()
-        req.SourceText = text
-        req.Source = "en"
-        req.Target = "zh"
-        req.ProjectId = 0
+        releases = releases_by_repo.get((owner, repo))
+        if releases is None:
+            print(f"Skipping {owner}/{repo} this run rather than processing a partial release list")
+            continue
+        fetched = releases
+        releases = stable_releases(releases)
+        print(f"Total stable releases found: {len(releases)}")
         
-        resp = client.TextTranslate(req)
-        return resp.TargetText if resp.TargetText else text
-    except:
-        return text
-
-def get_all_releases(owner, repo):
-    """Get all releases with pagination"""
-    all_releases = []
-    page = 1
-    per_page = 100
-    
-    while True:
-        url = f"https://api.github.com/repos/{owner}/{repo}/releases?page={page}&per_page={per_page}"
-        headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "User-Agent": "GitHub-Release-Scraper"
-        }
+        # Update project latest version
+        if releases:
+            latest = releases[0]
+            latest_version = release_version(latest)
+            latest_date = datetime.strptime(latest.get('published_at', '').split('T')[0], '%Y-%m-%d').date()
+            
+            db.execute_query(
+                "UPDATE projects SET latest_version = %s, latest_update_time = %s WHERE id = %s",
+                (latest_version, latest_date, project_id)
+            )
+            print(f"\nUpdated project latest version: {latest_version}")
         
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code == 200:
-                releases = response.json()
-                if not releases:
-                    break
-                
-                # Filter only stable releases
-                stable_releases = [r for r in releases if not r.get('prerelease', False)]
-                all_releases.extend(stable_releases)
-                
-                print(f"  Page {page}: {len(stable_releases)} stable releases")
-                
-                if len(releases) < per_page:
-                    break
-                
-                page += 1
-                time.sleep(0.5)  # Avoid rate limiting
+        # Process releases (latest first); the high-water mark bounds each run.
+        # Stored versions are never overwritten here, so they are not reprocessed either
+        stored_hashes = load_source_hashes(db, project_id)
+        seen_versions = set(stored_hashes)
+        for release in releases:
+            version = release_version(release)
+            
+            # Several tags can map to one version; translate it once
+            if version in seen_versions:
+                continue
+            seen_versions.add(version)
+            
+            # Parse date
+            published_at = release.get('published_at', '')
+            if published_at:
+                update_date = datetime.strptime(published_at.split('T')[0], '%Y-%m-%d').date()
             else:
-                print(f"  Error fetching page {page}: {response.status_code}")
-                break
-        except Exception as e:
-            print(f"  Error: {e}")
-            break
-    
-    return all_releases
+                update_date = datetime.now().date()
+            
+            tag_name = release.get('tag_name', '')
+            yield {
+                'project_id': project_id,
+                'version': version,
+                'update_date': update_date,
+                # Get content
+                'content': release.get('body') or '',
+                'download_url': release.get('zipball_url', f"https://github.com/{owner}/{repo}/archive/refs/tags/{tag_name}.zip"),
+                'source_hash': release_source_hash(release)
+            }
+        release_times[(owner, repo)] = [datetime.strptime(r['published_at'], '%Y-%m-%dT%H:%M:%SZ') for r in fetched]
+        if fetched:
+            new_marks[(owner, repo)] = newest_release(fetched)
 
-def scrape_stable_releases():
-    """Scrape stable releases for all repositories"""
-    repos = [
-        ("vercel", "next.js"),
-        ("facebook", "react")
-    ]
-    
+async def translate_release(item):
+    """Translate stage
+
+    A failed translation fails the item, so it is not saved and the
+    high-water mark stays put until a later run translates it.
+    """
+    print(f"\nProcessing: {item['version']}")
+    print("  Translating...")
+    item['content'] = await translate_to_chinese(item['content'])
+    return item
+
+def insert_versions(items, database):
+    """Persist stage: add a batch of versions, keeping any that already exist"""
+    if not save_versions_to_db(items, database, overwrite=False):
+        print(f"  [ERROR] Failed to save: {', '.join(item['version'] for item in items)}")
+        return False
+    for item in items:
+        print(f"  [OK] Saved: {item['version']}")
+    return True
+
+async def scrape_stable_releases():
+    """Scrape stable releases for every registered repository that is due"""
     if not db.connect():
         print("Failed to connect to database")
         return False
     
     try:
-        for owner, repo in repos:
-            print(f"\n{'='*60}")
-            print(f"Scraping {owner}/{repo}")
-            print(f"{'='*60}")
-            
-            # Get or create project
-            project_name = f"{owner}/{repo}"
-            project = db.execute_query("SELECT id FROM projects WHERE name = %s", (project_name,))
-            
-            if project:
-                project_id = project[0]['id']
-                print(f"Found existing project: {project_name} (ID: {project_id})")
-            else:
-                # Create project
-                icon = "JS"  # Default icon
-                project_id = db.execute_query("INSERT INTO projects (icon, name) VALUES (%s, %s)", (icon, project_name))
-                print(f"Created new project: {project_name} (ID: {project_id})")
-            
-            # Get existing versions
-            existing_versions = set()
-            versions_data = db.execute_query("SELECT version FROM versions WHERE project_id = %s", (project_id,))
-            if versions_data:
-                existing_versions = {v['version'] for v in versions_data}
-            print(f"Existing versions: {len(existing_versions)}")
-            
-            # Fetch all releases
-            print("Fetching all releases...")
-            releases = get_all_releases(owner, repo)
-            print(f"Total stable releases found: {len(releases)}")
-            
-            # Process releases (latest first)
-            new_count = 0
-            for release in releases[:50]:  # Limit to latest 50 for testing
-                tag_name = release.get('tag_name', '')
-                version = tag_name.lstrip('v')
-                if not version.startswith('v'):
-                    version = f"v{version}"
-                
-                # Skip if already exists
-                if version in existing_versions:
-                    continue
-                
-                print(f"\nProcessing: {version}")
-                
-                # Parse date
-                published_at = release.get('published_at', '')
-                if published_at:
-                    update_date = datetime.strptime(published_at.split('T')[0], '%Y-%m-%d').date()
-                else:
-                    update_date = datetime.now().date()
-                
-                # Get content
-                body = release.get('body', '')[:3000]  # Limit content
-                
-                # Translate
-                print("  Translating...")
-                content = translate_text(body)
-                
-                # Save to database
-                download_url = release.get('zipball_url', f"https://github.com/{owner}/{repo}/archive/refs/tags/{tag_name}.zip")
-                
-                result = db.execute_query(
-                    "INSERT INTO versions (project_id, version, update_time, content, download_url) VALUES (%s, %s, %s, %s, %s)",
-                    (project_id, version, update_date, content, download_url)
-                )
-                
-                if result:
-                    print(f"  [OK] Saved: {version}")
-                    new_count += 1
-                    existing_versions.add(version)
-                else:
-                    print(f"  [ERROR] Failed to save: {version}")
-                
-                # Small delay
-                time.sleep(1)
-            
-            # Update project latest version
-            if releases:
-                latest = releases[0]
-                latest_tag = latest.get('tag_name', '')
-                latest_version = latest_tag.lstrip('v')
-                if not latest_version.startswith('v'):
-                    latest_version = f"v{latest_version}"
-                
-                latest_date = datetime.strptime(latest.get('published_at', '').split('T')[0], '%Y-%m-%d').date()
-                
-                db.execute_query(
-                    "UPDATE projects SET latest_version = %s, latest_update_time = %s WHERE id = %s",
-                    (latest_version, latest_date, project_id)
-                )
-                print(f"\nUpdated project latest version: {latest_version}")
-            
-            print(f"\nAdded {new_count} new versions for {owner}/{repo}")
+        sources = list_sources(db, 'github', 'stable')
+        if not sources:
+            print("No GitHub repositories are due for polling")
+            return True
+        repos = [(source['owner'], source['repo']) for source in sources]
+        
+        async with aiohttp.ClientSession() as session:
+            with PersistStage(save=insert_versions) as persist:
+                pipeline = Pipeline('stable', [
+                    Stage('translate', translate_release, concurrency=TRANSLATE_CONCURRENCY),
+                    persist,
+                ])
+                marks = load_high_water_marks('stable')
+                new_marks = {}
+                release_times = {}
+                stats = await pipeline.run(iter_new_releases(repos, session, marks, new_marks, release_times))
+                translator.report()
+                print(f"GitHub HTTP cache: {http_cache.stats()}")
+                print(f"GitHub tokens: {scheduler.stats()}")
         
+        print(f"\nAdded {stats['persist']['processed']} new versions")
+        failed = any(stage['failed'] for stage in stats.values())
+        if failed:
+            print("Some releases failed; keeping the previous high-water marks")
+        else:
+            save_high_water_marks('stable', new_marks)
+        for source in sources:
+            key = (source['owner'], source['repo'])
+            record_poll(db, source, release_times.get(key), success=key in release_times and not failed)
         print("\n" + "="*60)
         print("Scraping completed successfully!")
         return True
@@ -210,4 +179,4 @@ def scrape_stable_releases():
         db.disconnect()
 
 if __name__ == "__main__":
-    scrape_stable_releases()
\ No newline at end of file
+    asyncio.run(scrape_stable_releases())
\ No newline at end of file
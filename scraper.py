@@ -5,24 +5,22 @@ Scrapes the VS Code RSS feed and inserts data into the database according to the
 """
 
 import feedparser
-import requests
 import re
 from datetime import datetime, date
 from database import db
 from models import Project, Version
-import markdownify
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
+from pipeline import Pipeline, Stage
+from translation import translate_to_chinese, translator
+from scrape_common import clean_html_content, content_digest, extract_article_content, load_source_hashes, PersistStage, FETCH_CONCURRENCY, CLEAN_CONCURRENCY, TRANSLATE_CONCURRENCY
+from rate_limiter import vscode_limiter
+from http_cache import http_cache
+from sources import list_sources, record_poll
 import json
 import os
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 import time
 import asyncio
 import aiohttp
-from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables from backend directory
 backend_dir = os.path.dirname(__file__)
@@ -49,282 +47,192 @@ def extract_month_year_from_title(title):
         return date(year, month_map[month_name], 1)
     return date.today()
 
-def clean_html_content(content):
-    """Convert HTML content to Markdown format and remove HTML tags"""
-    if not content:
-        return ""
-    try:
-        # Ensure content is properly encoded
-        if isinstance(content, bytes):
-            content = content.decode('utf-8')
-        
-        # Use markdownify to convert HTML to Markdown with better formatting
-        md_content = markdownify.markdownify(content, heading_style="ATX")
-        # Clean up extra whitespace and newlines
-        md_content = re.sub(r'\n\s*\n', '\n\n', md_content)
-        md_content = re.sub(r'\n{3,}', '\n\n', md_content)  # Limit consecutive newlines to 2
-        md_content = md_content.strip()
-        return md_content
-    except Exception as e:
-        print(f"Error converting HTML to Markdown: {e}")
-        # Fallback to simple tag removal
-        clean = re.compile('<.*?>')
-        cleaned_content = re.sub(clean, '', content).strip()
-        return cleaned_content
+# Read feeds from this file instead of fetching them (offline runs, e.g. vs_code_feed.xml)
+FEED_FILE = os.getenv('VSCODE_FEED_FILE')
 
-def fetch_article_content_sync(url):
-    """Fetch detailed content from article URL (synchronous version)"""
-    try:
-        response = requests.get(url, timeout=30)  # Increase timeout to 30 seconds
+# Upper bound on downloaded article size; longer pages are truncated
+ARTICLE_MAX_BYTES = int(os.getenv('ARTICLE_MAX_BYTES', 2 * 1024 * 1024))
+
+async def fetch_feed(feed_url, session):
+    """Fetch a feed with the validators stored from the last complete run
+
+    Returns the body and response headers, or (None, None) when the server
+    answers 304 Not Modified.
+    """
+    if FEED_FILE:
+        print(f"Reading feed from {FEED_FILE} instead of {feed_url}")
+        with open(FEED_FILE, 'rb') as f:
+            return f.read(), {}
+    cached = await asyncio.to_thread(http_cache.get, feed_url)
+    timeout = aiohttp.ClientTimeout(total=30)
+    await vscode_limiter.acquire_async()
+    async with session.get(feed_url, headers=http_cache.conditional_headers(cached), timeout=timeout) as response:
+        if response.status == 304 and cached:
+            http_cache.not_modified += 1
+            return None, None
         response.raise_for_status()
-        # Explicitly set encoding to utf-8
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.text, 'html.parser')
-        for script in soup(["script", "style"]):
-            script.decompose()
-        content_selectors = ['article', '.content', '.main-content', '.post-content', '.entry-content', 'main', '.article-content']
-        content = ""
-        for selector in content_selectors:
-            element = soup.select_one(selector)
-            if element:
-                content = str(element)
-                break
-        if not content:
-            body = soup.find('body')
-            if body:
-                for element in body.find_all(['header', 'footer', 'nav', 'aside']):
-                    element.decompose()
-                content = str(body)
-        return content[:5000] if content else ""
-    except Exception as e:
-        print(f"Error fetching article content from {url}: {e}")
-        return ""
+        http_cache.modified += 1
+        return await response.read(), response.headers
 
 async def fetch_article_content(url, session):
-    """Fetch detailed content from article URL (asynchronous version)"""
+    """Download the article HTML once, streamed and capped at ARTICLE_MAX_BYTES
+
+    Extraction happens later in the clean stage, on the process pool.
+    """
     try:
         # Use aiohttp with timeout
         timeout = aiohttp.ClientTimeout(total=30)  # 30 seconds timeout
+        await vscode_limiter.acquire_async()
         async with session.get(url, timeout=timeout) as response:
             response.raise_for_status()
-            # Get text content (aiohttp should handle encoding automatically)
-            content = await response.text()
-            
-        # Process content with BeautifulSoup
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            return await loop.run_in_executor(executor, fetch_article_content_sync, url)
+            chunks = []
+            size = 0
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                if size + len(chunk) > ARTICLE_MAX_BYTES:
+                    chunks.append(chunk[:ARTICLE_MAX_BYTES - size])
+                    print(f"Article {url} exceeds {ARTICLE_MAX_BYTES} bytes, truncating")
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+            return b"".join(chunks).decode(response.charset or 'utf-8', errors='replace')
     except Exception as e:
         print(f"Error fetching article content from {url}: {e}")
-        return ""
+        return None
 
-def translate_to_chinese_sync(text):
-    """Translate text to Chinese using Tencent Translate API (synchronous version)"""
-    if not text or not isinstance(text, str) or not any(c.isalpha() for c in text):
-        return text
+async def fetch_entry(entry, project_id, stored_hashes, unhashed, session):
+    """Fetch stage: parse the feed entry and download its update article
 
-    try:
-        secret_id = os.getenv('TENCENT_SECRET_ID')
-        secret_key = os.getenv('TENCENT_SECRET_KEY')
-        region = os.getenv('TENCENT_REGION', 'ap-beijing')
-        
-        if not secret_id or not secret_key:
-            raise ValueError("Tencent translation credentials not found")
+    Entries unchanged since their version was stored are dropped before
+    the article is downloaded. If the download fails the RSS content is
+    saved without a source hash, so the next run fetches the article again;
+    such versions are added to `unhashed`.
+    """
+    version = parse_version_from_title(entry.title)
 
-        cred = credential.Credential(secret_id, secret_key)
-        http_profile = HttpProfile(endpoint="tmt.tencentcloudapi.com")
-        client_profile = ClientProfile(httpProfile=http_profile)
-        client = tmt_client.TmtClient(cred, region, client_profile)
-        
-        req = models.TextTranslateRequest()
-        req.SourceText = text
-        req.Source = "en"
-        req.Target = "zh"
-        req.ProjectId = 0
-        
-        resp = client.TextTranslate(req)
-        
-        if resp.TargetText and any('\u4e00' <= char <= '\u9fff' for char in resp.TargetText):
-            return resp.TargetText
-        else:
-            raise ValueError(f"Translation result did not contain Chinese characters. API response: {resp.TargetText}")
+    # Get content from RSS feed
+    rss_content = entry.content[0].value if entry.content else ""
+    if not rss_content:
+        rss_content = entry.summary if entry.summary else entry.title
 
-    except Exception as e:
-        print(f"Translation error occurred: {e}")
-        raise
+    # Entries are identified by their Atom <id> and <updated>; the content
+    # covers feeds that do not bump <updated> on edits
+    source_hash = content_digest(entry.get('id') or entry.get('link'), entry.get('updated'), entry.title, rss_content)
+    if stored_hashes.get(version) == source_hash:
+        return None
+    print(f"\nProcessing entry: {entry.title}")
 
-async def translate_to_chinese(text):
-    """Translate text to Chinese using Tencent Translate API (asynchronous version)"""
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor() as executor:
-        return await loop.run_in_executor(executor, translate_to_chinese_sync, text)
+    # Try to fetch detailed content from article URL if available
+    detailed_content = ""
+    if entry.link:
+        detailed_content = await fetch_article_content(entry.link, session)
+        if detailed_content is None:
+            detailed_content = ""
+            source_hash = None
+            unhashed.append(version)
 
-async def process_entry(entry, project_id, existing_versions, session):
-    """Process a single entry asynchronously"""
-    try:
-        print(f"\nProcessing entry: {entry.title}")
-        start_time = time.time()
-        version = parse_version_from_title(entry.title)
-        update_date = extract_month_year_from_title(entry.title)
-        
-        # Get content from RSS feed
-        rss_content = entry.content[0].value if entry.content else ""
-        if not rss_content:
-            rss_content = entry.summary if entry.summary else entry.title
-            
-        # Clean and format the RSS content
-        content = clean_html_content(rss_content)
-        
-        # Try to fetch detailed content from article URL if available
-        if entry.link:
-            detailed_content = await fetch_article_content(entry.link, session)
-            if detailed_content:
-                # Convert detailed content to Markdown
-                detailed_md = clean_html_content(detailed_content)
-                content = f"{content}\n\n## 详细内容\n\n{detailed_md}"
-        
-        try:
-            # Translate content to Chinese
-            print(f"    Translating content for version {version}...")
-            translated_content = await translate_to_chinese(content)
-            print(f"    Translation successful for version {version}.")
-        except Exception as e:
-            print(f"    Skipping entry '{entry.title}' due to translation failure: {e}")
-            return None # Skip this entry if translation fails
-        
-        download_url = f"https://code.visualstudio.com/updates/{version.replace('v', '')}"
-        
-        print(f"Finished processing entry: {entry.title}. Took {time.time() - start_time:.2f} seconds.")
-        
-        # Return the processed data
-        return {
-            'version': version,
-            'update_date': update_date,
-            'content': translated_content,
-            'download_url': download_url,
-            'project_id': project_id,
-            'is_new': version not in existing_versions
-        }
-    except Exception as e:
-        print(f"  Error processing entry '{entry.title}': {e}")
-        return None
+    return {
+        'title': entry.title,
+        'version': version,
+        'update_date': extract_month_year_from_title(entry.title),
+        'rss_content': rss_content,
+        'detailed_content': detailed_content,
+        'download_url': f"https://code.visualstudio.com/updates/{version.replace('v', '')}",
+        'project_id': project_id,
+        'source_hash': source_hash,
+        'start_time': time.time()
+    }
 
-def save_versions_to_db(versions_data):
-    """Save all version data to database in batches"""
+def clean_entry(item):
+    """Clean stage: extract the article and convert everything to Markdown
+
+    Runs on the pipeline's process pool, so it must stay a picklable
+    top-level function.
+    """
+    # Clean and format the RSS content
+    content = clean_html_content(item.pop('rss_content'))
+    detailed_content = extract_article_content(item.pop('detailed_content'))
+    if detailed_content:
+        # Convert detailed content to Markdown
+        detailed_md = clean_html_content(detailed_content)
+        content = f"{content}\n\n## 详细内容\n\n{detailed_md}"
+    item['content'] = content
+    return item
+
+async def translate_entry(item):
+    """Translate stage: entries that fail to translate are skipped"""
     try:
-        # Separate new and existing versions
-        new_versions = [v for v in versions_data if v['is_new']]
-        existing_versions = [v for v in versions_data if not v['is_new']]
-        
-        # Batch insert new versions
-        if new_versions:
-            print(f"\nAdding {len(new_versions)} new versions...")
-            start_time = time.time()
-            insert_query = "INSERT INTO versions (project_id, version, update_time, content, download_url) VALUES (%s, %s, %s, %s, %s)"
-            # Prepare data for batch insert
-            insert_data = [
-                (v['project_id'], v['version'], v['update_date'], v['content'], v['download_url'])
-                for v in new_versions
-            ]
-            # Execute batch insert
-            for data in insert_data:
-                db.execute_query(insert_query, data)
-            print(f"Added {len(new_versions)} new versions. Took {time.time() - start_time:.2f} seconds.")
-        
-        # Batch update existing versions
-        if existing_versions:
-            print(f"\nUpdating {len(existing_versions)} existing versions...")
-            start_time = time.time()
-            update_query = "UPDATE versions SET update_time = %s, content = %s, download_url = %s WHERE project_id = %s AND version = %s"
-            # Prepare data for batch update
-            update_data = [
-                (v['update_date'], v['content'], v['download_url'], v['project_id'], v['version'])
-                for v in existing_versions
-            ]
-            # Execute batch update
-            for data in update_data:
-                db.execute_query(update_query, data)
-            print(f"Updated {len(existing_versions)} existing versions. Took {time.time() - start_time:.2f} seconds.")
-        
-        return True
+        # Translate content to Chinese
+        print(f"    Translating content for version {item['version']}...")
+        item['content'] = await translate_to_chinese(item['content'])
+        print(f"    Translation successful for version {item['version']}.")
     except Exception as e:
-        print(f"Error saving versions to database: {e}")
-        return False
+        print(f"    Skipping entry '{item['title']}' due to translation failure: {e}")
+        return None # Skip this entry if translation fails
+    print(f"Finished processing entry: {item['title']}. Took {time.time() - item['start_time']:.2f} seconds.")
+    return item
 
-async def scrape_vs_code_feed():
-    """Scrape VS Code RSS feed and store in database with async processing"""
-    feed_url = "https://code.visualstudio.com/feed.xml"
+async def scrape_feed(source, session):
+    """Scrape one release feed through the scraping pipeline
+
+    Only new or changed entries have their article fetched and translated.
+    Returns the publish times of the new release entries, or None on failure.
+    """
+    feed_url = source['url']
+    project_name = source['name']
     try:
         print(f"Fetching RSS feed from {feed_url}...")
-        response = requests.get(feed_url)
-        response.raise_for_status()
-        feed = feedparser.parse(response.content)
+        body, headers = await fetch_feed(feed_url, session)
+        if body is None:
+            print("Feed not modified since the last complete run")
+            return []
+        feed = feedparser.parse(body)
         print(f"Found {len(feed.entries)} entries in the feed")
 
-        if not db.connect():
-            print("Failed to connect to database")
-            return False
-
         # Get or create the project
-        project_query = "SELECT id FROM projects WHERE name = 'Visual Studio Code' LIMIT 1"
-        existing_project = db.execute_query(project_query)
+        project_query = "SELECT id FROM projects WHERE name = %s LIMIT 1"
+        existing_project = db.execute_query(project_query, (project_name,))
         project_id = None
         if existing_project:
             project_id = existing_project[0]['id']
-            print(f"Found existing VS Code project with ID: {project_id}")
+            print(f"Found existing {project_name} project with ID: {project_id}")
         else:
-            print("Creating new VS Code project...")
+            print(f"Creating new {project_name} project...")
             project_query = "INSERT INTO projects (icon, name) VALUES (%s, %s)"
-            project_id = db.execute_query(project_query, ('💻', 'Visual Studio Code'))
+            project_id = db.execute_query(project_query, ('💻', project_name))
             if project_id:
-                print(f"Created new VS Code project with ID: {project_id}")
+                print(f"Created new {project_name} project with ID: {project_id}")
             else:
                 print("Failed to create project")
-                return False
+                return None
 
         release_entries = [entry for entry in feed.entries if any(tag.get('term') == 'release' for tag in entry.get('tags', []))]
         print(f"Found {len(release_entries)} release entries")
 
-        # Optimization: Fetch all existing versions for this project at once
-        print("Fetching existing versions from database...")
-        start_time = time.time()
-        versions_query = "SELECT version FROM versions WHERE project_id = %s"
-        results = db.execute_query(versions_query, (project_id,))
-        existing_versions = {row['version'] for row in results} if results else set()
-        print(f"Found {len(existing_versions)} existing versions in the database. Query took {time.time() - start_time:.2f} seconds.")
+        # Entries whose source is unchanged are skipped in the fetch stage
+        stored_hashes = load_source_hashes(db, project_id)
+        unhashed = []
 
-        # Process entries asynchronously
-        print(f"Processing {len(release_entries)} entries asynchronously...")
-        
-        # Create aiohttp session for async HTTP requests
-        async with aiohttp.ClientSession() as session:
-            # Process entries in smaller batches to avoid overwhelming the system
-            batch_size = 5
-            all_processed_data = []
-            
-            for i in range(0, len(release_entries), batch_size):
-                batch = release_entries[i:i+batch_size]
-                print(f"\nProcessing batch {i//batch_size + 1} ({len(batch)} entries)...")
-                
-                # Create tasks for processing entries in this batch
-                tasks = [process_entry(entry, project_id, existing_versions, session) for entry in batch]
-                
-                # Wait for all tasks in this batch to complete
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Collect results
-                for result in batch_results:
-                    if result and not isinstance(result, Exception):
-                        all_processed_data.append(result)
-                
-                # Small delay between batches to avoid overwhelming servers
-                if i + batch_size < len(release_entries):
-                    print(f"Waiting 2 seconds before next batch...")
-                    await asyncio.sleep(2)
-            
-            # Save all collected data to database
-            print(f"\nSaving {len(all_processed_data)} processed entries to database...")
-            save_versions_to_db(all_processed_data)
+        # Each stage has its own concurrency limit; versions are saved as they finish
+        print(f"Processing {len(release_entries)} entries through the pipeline...")
+        with PersistStage() as persist:
+            pipeline = Pipeline('vscode', [
+                Stage('fetch', lambda entry: fetch_entry(entry, project_id, stored_hashes, unhashed, session), concurrency=FETCH_CONCURRENCY),
+                Stage('clean', clean_entry, concurrency=CLEAN_CONCURRENCY, mode='process'),
+                Stage('translate', translate_entry, concurrency=TRANSLATE_CONCURRENCY),
+                persist,
+            ])
+            stats = await pipeline.run(release_entries)
+            translator.report()
+
+        # Remember the feed's validators only once every entry made it into the
+        # database; otherwise a 304 next time would hide the ones that did not
+        complete = not any(stage['failed'] for stage in stats.values()) and not stats['translate']['dropped']
+        # Versions saved without a source hash (the article download failed) still need work
+        if unhashed:
+            print(f"Saved {len(unhashed)} versions without their article: {', '.join(unhashed)}")
+            complete = False
+        if complete and headers:
+            await asyncio.to_thread(http_cache.put, feed_url, headers.get('ETag'), headers.get('Last-Modified'), body)
 
         # Update project's latest version info
         if release_entries:
@@ -338,10 +246,28 @@ async def scrape_vs_code_feed():
             print(f"Updated project to latest version: {latest_version}. Took {time.time() - start_time:.2f} seconds.")
 
         print("\nRSS feed processing completed successfully!")
-        return True
+        # Release dates newer than the last one seen feed the source's adaptive polling interval
+        release_times = [datetime.combine(extract_month_year_from_title(entry.title), datetime.min.time()) for entry in release_entries]
+        return [t for t in release_times if not source['last_release_at'] or t > source['last_release_at']]
     except Exception as e:
         print(f"Error scraping RSS feed: {e}")
+        return None
+
+async def scrape_vs_code_feed():
+    """Scrape every registered release feed that is due (the VS Code updates feed)"""
+    if not db.connect():
+        print("Failed to connect to database")
         return False
+
+    try:
+        success = True
+        async with aiohttp.ClientSession() as session:
+            for source in list_sources(db, 'feed', 'vscode'):
+                release_times = await scrape_feed(source, session)
+                record_poll(db, source, release_times, success=release_times is not None)
+                success = success and release_times is not None
+        print(f"Feed HTTP cache: {http_cache.stats()}")
+        return success
     finally:
         db.disconnect()
 
@@ -4,6 +4,7 @@ Summary of GitHub releases scraping results
 """
 
 from database import db
+from sources import list_sources
 
 def show_summary():
     """Show scraping summary"""
@@ -13,8 +14,8 @@ def show_summary():
     
     try:
         repos = [
-            ("vercel/next.js", "Next.js"),
-            ("facebook/react", "React")
+            (f"{source['owner']}/{source['repo']}", source['name'])
+            for source in list_sources(db, 'github')
         ]
         
         print("\n" + "="*60)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Read-only SQLite snapshot of projects and versions
+Builds a compact, indexed snapshot file from MySQL and provides
+SnapshotDatabase, a drop-in read-only replacement for Database that the API
+uses when SNAPSHOT_PATH is set.
+
+Usage: python snapshot.py build [path]
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+
+from database import db
+
+DEFAULT_SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', 'logup_snapshot.sqlite3')
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE projects (
+    id INTEGER PRIMARY KEY,
+    icon TEXT NOT NULL,
+    name TEXT NOT NULL,
+    slug TEXT,
+    latest_version TEXT,
+    latest_update_time TEXT,
+    `describe` TEXT,
+    summar TEXT,
+    author TEXT,
+    type TEXT
+);
+CREATE TABLE versions (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    update_time TEXT NOT NULL,
+    content BLOB NOT NULL,
+    download_url TEXT NOT NULL
+);
+"""
+
+# Created after the bulk load, which is faster than maintaining them per row
+SNAPSHOT_INDEXES = """
+CREATE INDEX idx_projects_slug ON projects (slug);
+CREATE INDEX idx_projects_latest_update_time ON projects (latest_update_time);
+CREATE INDEX idx_versions_project_update_time ON versions (project_id, update_time);
+"""
+
+
+def _to_sqlite(row):
+    """Store dates as ISO strings, which the Pydantic models parse back"""
+    return tuple(value.isoformat() if hasattr(value, 'isoformat') else value for value in row)
+
+
+def build_snapshot(path=DEFAULT_SNAPSHOT_PATH, batch_size=1000):
+    """Build the snapshot next to `path` and atomically swap it into place"""
+    if not db.connect():
+        print("Failed to connect to database")
+        return False
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    start_time = time.time()
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        snapshot = sqlite3.connect(tmp_path)
+        try:
+            snapshot.execute("PRAGMA journal_mode = OFF")
+            snapshot.execute("PRAGMA synchronous = OFF")
+            snapshot.executescript(SNAPSHOT_SCHEMA)
+
+            tables = [
+                ("projects", "id, icon, name, slug, latest_version, latest_update_time, `describe`, summar, author, type"),
+                ("versions", "id, project_id, version, update_time, content, download_url"),
+            ]
+            for table, columns in tables:
+                placeholders = ", ".join(["?"] * len(columns.split(",")))
+                insert_query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+                count = 0
+                batch = []
+                # Stream from MySQL so large tables are copied in constant memory
+                for row in db.iter_query(f"SELECT {columns} FROM {table}", chunk_size=batch_size, row_type='tuple'):
+                    batch.append(_to_sqlite(row))
+                    if len(batch) >= batch_size:
+                        snapshot.executemany(insert_query, batch)
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    snapshot.executemany(insert_query, batch)
+                    count += len(batch)
+                print(f"Copied {count} rows from {table}")
+
+            snapshot.executescript(SNAPSHOT_INDEXES)
+            snapshot.commit()
+            snapshot.execute("ANALYZE")
+            snapshot.execute("VACUUM")
+        finally:
+            snapshot.close()
+
+        # Readers open the file per request, so they pick up the new file on
+        # their next request while in-flight ones finish on the old inode
+        os.replace(tmp_path, path)
+        print(f"Snapshot written to {path}. Took {time.time() - start_time:.2f} seconds.")
+        return True
+    except Exception as e:
+        print(f"Error building snapshot: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    finally:
+        db.disconnect()
+
+
+class SnapshotDatabase:
+    """Read-only Database lookalike backed by a snapshot file"""
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self.connection = None
+
+    def connect(self):
+        try:
+            self.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            return self.connection
+        except sqlite3.Error as e:
+            print(f"Error opening snapshot {self.path}: {e}")
+            return None
+
+    def disconnect(self):
+        try:
+            if self.connection:
+                self.connection.close()
+        except sqlite3.Error as e:
+            print(f"Error closing snapshot: {e}")
+        finally:
+            self.connection = None
+
+    def execute_query(self, query, params=None):
+        if not query.strip().upper().startswith('SELECT'):
+            print(f"Rejected write against read-only snapshot: {query}")
+            return None
+        try:
+            # Queries are written for MySQL's paramstyle
+            cursor = self.connection.execute(query.replace('%s', '?'), params or ())
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error executing query: {e}")
+            return None
+
+    def iter_query(self, query, params=None, chunk_size=500, row_type='dict'):
+        cursor = self.connection.execute(query.replace('%s', '?'), params or ())
+        if row_type == 'dict':
+            convert = dict
+        elif row_type == 'namedtuple':
+            convert = namedtuple('Row', [c[0] for c in cursor.description], rename=True)._make
+        else:
+            convert = tuple
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from map(convert, rows)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python snapshot.py build [path]")
+        sys.exit(1)
+    path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SNAPSHOT_PATH
+    sys.exit(0 if build_snapshot(path) else 1)
@@ -0,0 +1,112 @@
+"""
+Registry of tracked release sources
+Every GitHub repository and feed the scrapers follow is a row in the sources
+table. Each scraper keeps its own polling state per source (source_state),
+with an interval adapted to the release cadence the source has shown: busy
+repositories are checked often and dormant ones back off, so upstream calls
+stay proportional to actual release activity. Scrapers sharing a source
+(github and stable) therefore never consume each other's schedule.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+# Bounds for adaptive polling intervals
+MIN_POLL_SECONDS = int(os.getenv('SOURCE_MIN_POLL_SECONDS', 15 * 60))
+MAX_POLL_SECONDS = int(os.getenv('SOURCE_MAX_POLL_SECONDS', 7 * 24 * 3600))
+# Poll a few times per typical gap between releases
+POLLS_PER_RELEASE = 4
+# Quiet polls stretch the interval by this factor
+BACKOFF_FACTOR = 1.5
+# Weight of the newest gap in the release cadence average
+CADENCE_ALPHA = 0.3
+
+# Set to poll every enabled source regardless of its next due time
+SCRAPE_ALL_SOURCES = os.getenv('SCRAPE_ALL_SOURCES', '').lower() in ('1', 'true', 'yes')
+
+
+def list_sources(database, source_type, scraper=None, due_only=True):
+    """Enabled sources of one type ('github' or 'feed')
+
+    With a scraper name each source carries that scraper's polling state,
+    and due_only keeps just the sources that are due for it.
+    """
+    if scraper is None:
+        query = "SELECT * FROM sources s WHERE s.type = %s AND s.enabled = 1 ORDER BY s.id"
+        return database.execute_query(query, (source_type,)) or []
+
+    query = """
+        SELECT s.*, %s AS scraper, st.poll_interval_seconds, st.cadence_seconds,
+               st.last_release_at, st.last_success_at, st.next_due_at
+        FROM sources s
+        LEFT JOIN source_state st ON st.source_id = s.id AND st.scraper = %s
+        WHERE s.type = %s AND s.enabled = 1
+    """
+    if due_only and not SCRAPE_ALL_SOURCES:
+        query += " AND (st.next_due_at IS NULL OR st.next_due_at <= NOW())"
+    sources = database.execute_query(query + " ORDER BY st.next_due_at, s.id", (scraper, scraper, source_type)) or []
+    print(f"{len(sources)} {source_type} sources for {scraper} to poll")
+    return sources
+
+
+def update_cadence(cadence, last_release_at, release_times):
+    """Fold the gaps between newly seen releases into the cadence average"""
+    times = sorted(release_times)
+    if last_release_at:
+        times = [last_release_at] + [t for t in times if t > last_release_at]
+    for earlier, later in zip(times, times[1:]):
+        gap = (later - earlier).total_seconds()
+        cadence = gap if cadence is None else CADENCE_ALPHA * gap + (1 - CADENCE_ALPHA) * cadence
+    return cadence
+
+
+def next_interval(source, cadence, found_new):
+    """Seconds until the next poll"""
+    if found_new and cadence:
+        interval = cadence / POLLS_PER_RELEASE
+    elif found_new:
+        interval = MIN_POLL_SECONDS
+    else:
+        interval = (source['poll_interval_seconds'] or MIN_POLL_SECONDS) * BACKOFF_FACTOR
+    return int(min(MAX_POLL_SECONDS, max(MIN_POLL_SECONDS, interval)))
+
+
+def record_poll(database, source, release_times=None, success=True):
+    """Store the outcome of a scraper polling a source and schedule its next poll
+
+    source comes from list_sources with a scraper name. release_times are
+    the publish datetimes of the new releases found. A failed poll keeps
+    the interval and retries after MIN_POLL_SECONDS.
+    """
+    now = datetime.now()
+    if not success:
+        database.execute_query(
+            "INSERT INTO source_state (source_id, scraper, next_due_at) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE next_due_at = VALUES(next_due_at)",
+            (source['id'], source['scraper'], now + timedelta(seconds=MIN_POLL_SECONDS))
+        )
+        return
+
+    release_times = release_times or []
+    cadence = update_cadence(source['cadence_seconds'], source['last_release_at'], release_times)
+    interval = next_interval(source, cadence, bool(release_times))
+    last_release_at = max([source['last_release_at'], *release_times], key=lambda t: t or datetime.min)
+    database.execute_query(
+        """
+        INSERT INTO source_state
+            (source_id, scraper, poll_interval_seconds, cadence_seconds, last_release_at, last_success_at, next_due_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            poll_interval_seconds = VALUES(poll_interval_seconds), cadence_seconds = VALUES(cadence_seconds),
+            last_release_at = VALUES(last_release_at), last_success_at = VALUES(last_success_at),
+            next_due_at = VALUES(next_due_at)
+        """,
+        (source['id'], source['scraper'], interval, cadence, last_release_at, now, now + timedelta(seconds=interval))
+    )
+    print(f"Next {source['scraper']} poll of {source_label(source)} in {interval / 3600:.1f}h")
+
+
+def source_label(source):
+    if source['type'] == 'github':
+        return f"{source['owner']}/{source['repo']}"
+    return source['url']
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for API admission control: client rate limits and deadline-aware load shedding
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import admission as admission_module
+from admission import ClientRateLimiter, ConcurrencyLimiter, Overloaded, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    # Empty: the next token arrives after 1 / rate seconds
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now += 0.25
+    assert bucket.try_acquire() == pytest.approx(0.25)
+    clock.now += 0.25
+    assert bucket.try_acquire() == 0
+
+
+def test_token_bucket_never_exceeds_burst(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    clock.now += 3600
+    assert [bucket.try_acquire() for _ in range(2)] == [0, 0]
+    assert bucket.try_acquire() > 0
+
+
+def test_client_limit_is_per_client(clock):
+    limiter = ClientRateLimiter(rate=1, burst=1)
+    limiter.check('a')
+    with pytest.raises(Overloaded) as rejected:
+        limiter.check('a')
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after == pytest.approx(1)
+    limiter.check('b')
+
+
+def test_client_limit_forgets_the_least_recent_client(clock):
+    limiter = ClientRateLimiter(rate=1, burst=1, max_clients=2)
+    limiter.check('a')
+    limiter.check('b')
+    limiter.check('c')
+    assert list(limiter.buckets) == ['b', 'c']
+
+
+def test_free_slot_is_taken_without_waiting():
+    async def run():
+        limiter = ConcurrencyLimiter('detail', max_concurrent=2, max_queue=0, queue_timeout=1.0)
+        await limiter.acquire()
+        await limiter.acquire()
+        assert limiter.active == 2
+        limiter.release(0.1)
+        assert limiter.active == 1
+        assert limiter.avg_service_time == pytest.approx(0.8 * 0.05 + 0.2 * 0.1)
+
+    asyncio.run(run())
+
+
+def test_full_queue_is_rejected_with_503():
+    async def run():
+        limiter = ConcurrencyLimiter('detail', max_concurrent=1, max_queue=1, queue_timeout=10.0)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        with pytest.raises(Overloaded) as rejected:
+            await limiter.acquire()
+        assert rejected.value.status_code == 503
+        assert "queue is full" in rejected.value.reason
+        limiter.release(0.05)
+        await waiter
+        assert (limiter.active, limiter.waiting) == (1, 0)
+
+    asyncio.run(run())
+
+
+def test_request_is_shed_when_the_expected_wait_exceeds_the_deadline():
+    async def run():
+        limiter = ConcurrencyLimiter('list', max_concurrent=1, max_queue=100, queue_timeout=1.0)
+        # Requests have been taking 2 seconds each, so waiting for the slot would miss the deadline
+        limiter.avg_service_time = 2.0
+        await limiter.acquire()
+        with pytest.raises(Overloaded) as rejected:
+            await limiter.acquire()
+        assert "exceeds deadline" in rejected.value.reason
+        assert rejected.value.retry_after == pytest.approx(2.0)
+        assert limiter.waiting == 0
+
+    asyncio.run(run())
+
+
+def test_queued_request_gives_up_at_the_deadline():
+    async def run():
+        limiter = ConcurrencyLimiter('list', max_concurrent=1, max_queue=10, queue_timeout=0.05)
+        await limiter.acquire()
+        with pytest.raises(Overloaded) as rejected:
+            await limiter.acquire()
+        assert "exceeded deadline" in rejected.value.reason
+        assert limiter.waiting == 0
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    import main
+    from snapshot import SnapshotDatabase
+    monkeypatch.setattr(main.admission, 'client_limiter', ClientRateLimiter(rate=1000, burst=1000))
+    # Reads fail fast instead of waiting for a MySQL server
+    monkeypatch.setattr(main, 'get_read_db', lambda: SnapshotDatabase(str(tmp_path / 'missing.sqlite3')))
+    return main
+
+
+def test_shed_request_gets_503_with_retry_after(api, monkeypatch):
+    # No free slot and no room to queue
+    limiter = ConcurrencyLimiter('list', max_concurrent=1, max_queue=0, queue_timeout=1.0)
+    limiter._semaphore = asyncio.Semaphore(0)
+    monkeypatch.setitem(api.admission.limiters, 'list', limiter)
+
+    response = TestClient(api.app).get('/projects')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.json() == {'detail': 'list queue is full'}
+
+
+def test_rate_limited_client_gets_429_with_retry_after(api, monkeypatch):
+    monkeypatch.setattr(api.admission, 'client_limiter', ClientRateLimiter(rate=0.4, burst=1))
+    client = TestClient(api.app)
+    assert client.get('/projects/1/versions', headers={'X-Forwarded-For': '203.0.113.9'}).status_code != 429
+    response = client.get('/projects/1/versions', headers={'X-Forwarded-For': '203.0.113.9, 10.0.0.1'})
+    assert response.status_code == 429
+    # 1 / 0.4 = 2.5 seconds until the next token, rounded up
+    assert response.headers['Retry-After'] == '3'
+
+
+def test_routes_without_db_work_skip_admission(api, monkeypatch):
+    monkeypatch.setattr(api.admission, 'client_limiter', ClientRateLimiter(rate=0.001, burst=1))
+    client = TestClient(api.app)
+    assert [client.get('/').status_code for _ in range(3)] == [200, 200, 200]
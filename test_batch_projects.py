@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for GET /projects/batch
+Served from a SQLite snapshot so no MySQL server is needed.
+"""
+
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from admission import ClientRateLimiter
+from content_codec import compress_content
+from snapshot import SNAPSHOT_INDEXES, SNAPSHOT_SCHEMA
+
+PROJECTS = [
+    (1, 'PY', 'alpha', 'alpha', 'v3.0.0', '2025-03-01'),
+    (2, 'JS', 'beta', 'beta', 'v1.0.0', '2025-02-01'),
+    (3, 'GO', 'gamma', 'gamma', 'v2.0.0', '2025-01-01'),
+]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = str(tmp_path / 'snapshot.sqlite3')
+    connection = sqlite3.connect(path)
+    connection.executescript(SNAPSHOT_SCHEMA + SNAPSHOT_INDEXES)
+    connection.executemany(
+        "INSERT INTO projects (id, icon, name, slug, latest_version, latest_update_time) VALUES (?, ?, ?, ?, ?, ?)",
+        PROJECTS
+    )
+    versions = []
+    version_id = 1
+    for project_id, count in ((1, 5), (2, 2)):
+        # Inserted oldest first so the response order has to come from the query
+        for n in range(count):
+            versions.append((version_id, project_id, f"v{n}.0.0", f"2024-0{n + 1}-01",
+                             compress_content(f"Notes for v{n}.0.0 " * 30), f"https://example.com/{version_id}.zip"))
+            version_id += 1
+    connection.executemany(
+        "INSERT INTO versions (id, project_id, version, update_time, content, download_url) VALUES (?, ?, ?, ?, ?, ?)",
+        versions
+    )
+    connection.commit()
+    connection.close()
+
+    monkeypatch.setattr(main, 'SNAPSHOT_PATH', path)
+    monkeypatch.setattr(main.admission, 'client_limiter', ClientRateLimiter(rate=1000, burst=1000))
+    return TestClient(main.app)
+
+
+def test_results_are_keyed_in_request_order(client):
+    response = client.get('/projects/batch', params={'ids': 'gamma, 1,missing,1,beta'})
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body['data']) == ['gamma', '1', 'beta']
+    assert body['data']['1']['name'] == 'alpha'
+    assert body['missing'] == ['missing']
+    assert body['data']['gamma']['versions'] == []
+
+
+def test_versions_are_newest_first_and_limited_per_project(client):
+    response = client.get('/projects/batch', params={'ids': '1,2,3', 'include_versions': 'true', 'versions_limit': 3})
+    data = response.json()['data']
+    assert [v['version'] for v in data['1']['versions']] == ['v4.0.0', 'v3.0.0', 'v2.0.0']
+    assert [v['version'] for v in data['2']['versions']] == ['v1.0.0', 'v0.0.0']
+    assert data['3']['versions'] == []
+    # Stored content is decompressed
+    assert data['1']['versions'][0]['content'].startswith('Notes for v4.0.0')
+
+
+def test_identifier_limits(client):
+    assert client.get('/projects/batch', params={'ids': ' , ,'}).status_code == 400
+    too_many = ','.join(str(i) for i in range(main.MAX_BATCH_IDS + 1))
+    assert client.get('/projects/batch', params={'ids': too_many}).status_code == 400
+    assert client.get('/projects/batch', params={'ids': '1', 'versions_limit': 0}).status_code == 422
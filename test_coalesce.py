@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight coalescing of identical concurrent reads
+"""
+
+import asyncio
+
+import pytest
+
+from coalesce import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def run():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+
+        results = await asyncio.gather(*(flight.do('key', fetch) for _ in range(5)))
+        assert results == [1] * 5
+        assert calls == 1
+        assert flight.shared_count == 4
+        # Once finished, the next call starts a fresh execution
+        assert await flight.do('key', fetch) == 2
+        assert flight.in_flight == {}
+
+    asyncio.run(run())
+
+
+def test_different_keys_do_not_coalesce():
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        assert await asyncio.gather(flight.do('a', lambda: fetch('a')), flight.do('b', lambda: fetch('b'))) == ['a', 'b']
+        assert flight.shared_count == 0
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_caller():
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do('key', fetch), flight.do('key', fetch), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.in_flight == {}
+
+    asyncio.run(run())
+
+
+def test_cancelled_leader_does_not_abort_waiters():
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        leader = asyncio.create_task(flight.do('key', fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do('key', fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await waiter == 'done'
+
+    asyncio.run(run())
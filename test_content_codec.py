@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for compressed version content and its format markers
+"""
+
+import os
+
+from content_codec import (COMPRESS_MIN_BYTES, MARKER_ZLIB, compress_content,
+                           decompress_content, is_compressed)
+
+
+def test_round_trip():
+    text = "## Features\n\n" + "- Added a new option to the release scraper\n" * 50
+    stored = compress_content(text)
+    assert is_compressed(stored)
+    assert len(stored) < len(text.encode('utf-8'))
+    assert decompress_content(stored) == text
+
+
+def test_round_trip_unicode():
+    text = "更新说明：修复了若干问题。\n" * 100
+    assert decompress_content(compress_content(text)) == text
+
+
+def test_short_content_is_stored_plain():
+    text = "x" * (COMPRESS_MIN_BYTES - 1)
+    stored = compress_content(text)
+    assert stored == text.encode('utf-8')
+    assert not is_compressed(stored)
+    assert decompress_content(stored) == text
+
+
+def test_incompressible_content_is_stored_plain():
+    text = os.urandom(2048).hex()[:COMPRESS_MIN_BYTES + 10]
+    stored = compress_content(text)
+    if not is_compressed(stored):
+        assert stored == text.encode('utf-8')
+    assert decompress_content(stored) == text
+
+
+def test_legacy_values_pass_through():
+    assert decompress_content("plain legacy text") == "plain legacy text"
+    assert decompress_content(b"plain legacy bytes") == "plain legacy bytes"
+    assert decompress_content(bytearray(b"from a BLOB column")) == "from a BLOB column"
+    assert decompress_content(None) is None
+    assert compress_content(None) is None
+
+
+def test_marker_detection():
+    stored = compress_content("a" * 1000)
+    assert stored.startswith(MARKER_ZLIB)
+    assert is_compressed(bytearray(stored))
+    assert not is_compressed("\x00ZL1 looks like a marker but is a str")
+    assert not is_compressed(b"ZL1")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming query results with Database.iter_query
+"""
+
+import pytest
+from mysql.connector import Error
+
+from database import Database
+
+
+class FakeCursor:
+    def __init__(self, connection, rows, dictionary, fail_after=None):
+        self.connection = connection
+        self.rows = list(rows)
+        self.dictionary = dictionary
+        self.fail_after = fail_after
+        self.column_names = ('id', 'version')
+        self.fetches = []
+        self.closed = False
+
+    def execute(self, query, params=None):
+        self.connection.unread_result = bool(self.rows)
+
+    def fetchmany(self, size):
+        if self.fail_after is not None and len(self.fetches) >= self.fail_after:
+            raise Error("Lost connection to MySQL server during query")
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        self.fetches.append(len(chunk))
+        self.connection.unread_result = bool(self.rows)
+        if self.dictionary:
+            return [dict(zip(self.column_names, row)) for row in chunk]
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, rows, fail_after=None):
+        self.rows = rows
+        self.fail_after = fail_after
+        self.unread_result = False
+        self.cursors = []
+
+    def cursor(self, dictionary=False, buffered=True):
+        # Streaming must not buffer the whole result on the client
+        assert buffered is False
+        cursor = FakeCursor(self, self.rows, dictionary, self.fail_after)
+        self.cursors.append(cursor)
+        return cursor
+
+
+def make_db(rows, fail_after=None):
+    database = Database()
+    database.connection = FakeConnection(rows, fail_after)
+    return database
+
+
+ROWS = [(i, f"v{i}.0.0") for i in range(1, 8)]
+
+
+def test_rows_are_fetched_in_chunks():
+    database = make_db(ROWS)
+    assert list(database.iter_query("SELECT id, version FROM versions", chunk_size=3, row_type='tuple')) == ROWS
+    cursor = database.connection.cursors[0]
+    assert cursor.fetches == [3, 3, 1, 0]
+    assert cursor.closed
+
+
+def test_row_types():
+    assert next(make_db(ROWS).iter_query("SELECT id, version FROM versions")) == {'id': 1, 'version': 'v1.0.0'}
+    row = next(make_db(ROWS).iter_query("SELECT id, version FROM versions", row_type='namedtuple'))
+    assert (row.id, row.version) == (1, 'v1.0.0')
+
+
+def test_stopping_early_drains_the_unread_rows():
+    database = make_db(ROWS)
+    rows = database.iter_query("SELECT id, version FROM versions", chunk_size=2, row_type='tuple')
+    assert next(rows) == ROWS[0]
+    rows.close()
+    cursor = database.connection.cursors[0]
+    assert cursor.rows == []
+    assert not database.connection.unread_result
+    assert cursor.closed
+
+
+def test_errors_mid_stream_are_raised():
+    database = make_db(ROWS, fail_after=1)
+    rows = database.iter_query("SELECT id, version FROM versions", chunk_size=3, row_type='tuple')
+    with pytest.raises(Error):
+        list(rows)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Tests for the GitHub client: Link header paging, conditional requests and token scheduling
+"""
+
+import asyncio
+import json
+
+import aiohttp
+import pytest
+
+import github_client
+from github_client import GitHubScheduler, last_page_from_link
+
+
+def test_last_page():
+    link = ('<https://api.github.com/repositories/1/releases?per_page=100&page=2>; rel="next", '
+            '<https://api.github.com/repositories/1/releases?per_page=100&page=7>; rel="last"')
+    assert last_page_from_link(link) == 7
+
+
+def test_last_page_listed_first():
+    link = ('<https://api.github.com/repos/o/r/releases?page=12&per_page=100>; rel="last", '
+            '<https://api.github.com/repos/o/r/releases?page=2&per_page=100>; rel="next"')
+    assert last_page_from_link(link) == 12
+
+
+def test_no_last_relation():
+    # The last page only links back to the first and previous pages
+    link = ('<https://api.github.com/repos/o/r/releases?page=1>; rel="first", '
+            '<https://api.github.com/repos/o/r/releases?page=6>; rel="prev"')
+    assert last_page_from_link(link) is None
+
+
+def test_missing_header():
+    assert last_page_from_link(None) is None
+    assert last_page_from_link('') is None
+
+
+def test_last_url_without_page_parameter():
+    assert last_page_from_link('<https://api.github.com/repos/o/r/releases>; rel="last"') is None
+
+
+class FakeResponse:
+    def __init__(self, status, body=b'', headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return self.body
+
+    async def text(self):
+        return self.body.decode('utf-8')
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(None, (), status=self.status)
+
+
+class FakeGitHub:
+    """Answers from a list of responses (or a function of the request headers)"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+
+    def request(self, method, url, headers=None, json=None):
+        self.requests.append((method, url, headers))
+        return self.respond(headers)
+
+
+class FakeCacheConnection:
+    """In-memory stand-in for the http_cache table"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def ensure_connected(self):
+        return True
+
+    def execute(self, query, params=None, fetch=None, dictionary=False):
+        if query.startswith("SELECT"):
+            return self.rows.get(params[0])
+        url_hash, _, etag, last_modified, body = params
+        self.rows[url_hash] = {'etag': etag, 'last_modified': last_modified, 'body': body}
+        return 1
+
+
+@pytest.fixture
+def github(monkeypatch):
+    async def no_wait():
+        pass
+
+    monkeypatch.setattr(github_client, 'scheduler', GitHubScheduler([]))
+    monkeypatch.setattr(github_client.github_limiter, 'acquire_async', no_wait)
+    monkeypatch.setattr(github_client.http_cache, 'connection', FakeCacheConnection())
+    monkeypatch.setattr(github_client.http_cache, 'enabled', True)
+    monkeypatch.setattr(github_client.http_cache, 'not_modified', 0)
+    monkeypatch.setattr(github_client.http_cache, 'modified', 0)
+    return github_client
+
+
+def test_stored_etag_turns_the_next_fetch_into_a_304(github):
+    releases = [{'tag_name': 'v1.0.0'}]
+
+    def respond(headers):
+        if headers.get('If-None-Match') == '"abc"':
+            return FakeResponse(304, headers={'ETag': '"abc"'})
+        return FakeResponse(200, json.dumps(releases).encode('utf-8'), {'ETag': '"abc"'})
+
+    session = FakeGitHub(respond)
+    url = "https://api.github.com/repos/o/r/releases?page=1&per_page=100"
+    assert asyncio.run(github.github_get_json(url, session)) == releases
+    # The second request is conditional and its body comes from the cache
+    assert asyncio.run(github.github_get_json(url, session)) == releases
+
+    assert 'If-None-Match' not in session.requests[0][2]
+    assert session.requests[1][2]['If-None-Match'] == '"abc"'
+    assert github.http_cache.stats() == {'not_modified': 1, 'modified': 1}
+
+
+def test_last_modified_is_sent_back_as_if_modified_since(github):
+    stamp = 'Wed, 01 Jan 2025 00:00:00 GMT'
+    session = FakeGitHub(lambda headers: FakeResponse(200, b'[]', {'Last-Modified': stamp}))
+    url = "https://api.github.com/repos/o/r/releases/tags/v1"
+    asyncio.run(github.github_get_json(url, session))
+    asyncio.run(github.github_get_json(url, session))
+    assert session.requests[1][2]['If-Modified-Since'] == stamp
+
+
+def test_responses_without_validators_are_not_stored(github):
+    session = FakeGitHub(lambda headers: FakeResponse(200, b'{}'))
+    url = "https://api.github.com/repos/o/r"
+    asyncio.run(github.github_get_json(url, session))
+    asyncio.run(github.github_get_json(url, session))
+    assert github.http_cache.connection.rows == {}
+    assert 'If-None-Match' not in session.requests[1][2]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(github_client.time, 'time', clock)
+    return clock
+
+
+def test_scheduler_ignores_responses_without_rate_limit_headers(clock):
+    scheduler = GitHubScheduler(['t1'])
+    state = scheduler.tokens[0]
+    scheduler.update(state, {})
+    assert (state.remaining, state.ready_at) == (None, 0.0)
+
+
+def test_scheduler_leaves_a_healthy_budget_unpaced(clock):
+    scheduler = GitHubScheduler(['t1'])
+    state = scheduler.tokens[0]
+    scheduler.update(state, {'X-RateLimit-Remaining': '4000', 'X-RateLimit-Reset': str(clock.now + 1800)})
+    assert state.remaining == 4000
+    assert state.ready_at == 0.0
+
+
+def test_scheduler_spreads_a_low_budget_until_reset(clock):
+    scheduler = GitHubScheduler(['t1'])
+    state = scheduler.tokens[0]
+    scheduler.update(state, {'X-RateLimit-Remaining': '100', 'X-RateLimit-Reset': str(clock.now + 1000)})
+    assert state.ready_at == pytest.approx(clock.now + 10)
+
+
+def test_scheduler_parks_an_exhausted_token_until_reset(clock):
+    scheduler = GitHubScheduler(['t1'])
+    state = scheduler.tokens[0]
+    scheduler.update(state, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(clock.now + 600)})
+    assert state.ready_at == clock.now + 601
+
+
+def test_scheduler_round_robins_over_ready_tokens(clock):
+    scheduler = GitHubScheduler(['token-a', 'token-b', 'token-c'])
+    scheduler.back_off(scheduler.tokens[1], 60)
+
+    async def pick(n):
+        return [(await scheduler.acquire()).token for _ in range(n)]
+
+    assert asyncio.run(pick(4)) == ['token-a', 'token-c', 'token-a', 'token-c']
+
+
+def test_scheduler_waits_when_every_token_is_exhausted(clock, monkeypatch):
+    scheduler = GitHubScheduler(['token-a'])
+    scheduler.update(scheduler.tokens[0], {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(clock.now + 30)})
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(github_client.asyncio, 'sleep', fake_sleep)
+    assert asyncio.run(scheduler.acquire()).token == 'token-a'
+    assert slept == [pytest.approx(31)]
+
+
+def test_rate_limited_request_is_retried_on_another_token(github, clock, monkeypatch):
+    monkeypatch.setattr(github, 'scheduler', GitHubScheduler(['token-a', 'token-b']))
+    responses = [
+        FakeResponse(403, b'{"message": "secondary rate limit"}', {'Retry-After': '120'}),
+        FakeResponse(200, b'{"ok": true}', {'X-RateLimit-Remaining': '4999', 'X-RateLimit-Reset': str(clock.now + 3600)}),
+    ]
+    session = FakeGitHub(lambda headers: responses.pop(0))
+    assert asyncio.run(github.github_get_json("https://api.github.com/repos/o/r", session)) == {'ok': True}
+
+    assert [request[2]['Authorization'] for request in session.requests] == ['token token-a', 'token token-b']
+    token_a, token_b = github.scheduler.tokens
+    assert token_a.ready_at == clock.now + 120
+    assert token_b.remaining == 4999
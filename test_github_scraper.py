@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Tests for fetching GitHub releases over REST pages and GraphQL, and for
+the per-repository high-water marks
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import github_scraper
+from github_scraper import (GITHUB_TIME_FORMAT, RELEASES_PER_PAGE, build_releases_query, fetch_github_releases,
+                            graphql_release_to_rest, is_newer, load_high_water_marks, save_high_water_marks,
+                            settle_high_water_marks)
+
+
+def make_releases(count):
+    """`count` releases, newest first, one hour apart"""
+    newest = datetime(2025, 1, 1)
+    return [
+        {'tag_name': f"v1.0.{count - i}", 'published_at': (newest - timedelta(hours=i)).strftime(GITHUB_TIME_FORMAT)}
+        for i in range(count)
+    ]
+
+
+def serve_pages(monkeypatch, releases):
+    """Serve `releases` as REST pages; returns the list of requested page numbers"""
+    pages = [releases[i:i + RELEASES_PER_PAGE] for i in range(0, len(releases), RELEASES_PER_PAGE)] or [[]]
+    requested = []
+
+    def page_of(url):
+        page = int(url.split('page=')[1].split('&')[0])
+        requested.append(page)
+        return pages[page - 1] if page <= len(pages) else []
+
+    async def get_page(url, session):
+        return page_of(url), len(pages)
+
+    async def get_json(url, session):
+        return page_of(url)
+
+    monkeypatch.setattr(github_scraper, 'github_get_page', get_page)
+    monkeypatch.setattr(github_scraper, 'github_get_json', get_json)
+    return requested
+
+
+def test_incremental_poll_stops_at_the_page_reaching_the_mark(monkeypatch):
+    releases = make_releases(250)
+    requested = serve_pages(monkeypatch, releases)
+    # Page 1 is full, but its oldest release is already older than the mark
+    since = releases[50]['published_at']
+    fetched = asyncio.run(fetch_github_releases('o', 'r', None, since))
+    assert requested == [1]
+    assert fetched == releases[:50]
+
+
+def test_incremental_poll_walks_on_while_the_whole_page_is_new(monkeypatch):
+    releases = make_releases(250)
+    requested = serve_pages(monkeypatch, releases)
+    since = releases[150]['published_at']
+    fetched = asyncio.run(fetch_github_releases('o', 'r', None, since))
+    assert requested == [1, 2]
+    assert fetched == releases[:150]
+
+
+def test_mark_on_a_page_boundary_needs_no_extra_page(monkeypatch):
+    releases = make_releases(250)
+    requested = serve_pages(monkeypatch, releases)
+    since = releases[RELEASES_PER_PAGE - 1]['published_at']
+    fetched = asyncio.run(fetch_github_releases('o', 'r', None, since))
+    assert requested == [1]
+    assert fetched == releases[:RELEASES_PER_PAGE - 1]
+
+
+def test_backfill_reads_every_page(monkeypatch):
+    releases = make_releases(250)
+    requested = serve_pages(monkeypatch, releases)
+    fetched = asyncio.run(fetch_github_releases('o', 'r', None))
+    assert sorted(requested) == [1, 2, 3]
+    assert fetched == releases
+
+
+def graphql_node(tag, published_at, prerelease=False):
+    return {'tagName': tag, 'name': f"Release {tag}", 'isPrerelease': prerelease,
+            'publishedAt': published_at, 'description': f"Notes for {tag}"}
+
+
+def test_graphql_node_is_shaped_like_a_rest_release():
+    release = graphql_release_to_rest(graphql_node('v2.0.0', '2025-01-02T00:00:00Z', True), 'octo', 'cat')
+    assert release == {
+        'tag_name': 'v2.0.0',
+        'name': 'Release v2.0.0',
+        'prerelease': True,
+        'published_at': '2025-01-02T00:00:00Z',
+        'body': 'Notes for v2.0.0',
+        'zipball_url': 'https://api.github.com/repos/octo/cat/zipball/v2.0.0',
+    }
+
+
+def test_releases_query_aliases_each_repository():
+    query = build_releases_query([('a', 'one'), ('b', 'two')])
+    assert 'r0: repository(owner: $o0, name: $n0)' in query
+    assert 'r1: repository(owner: $o1, name: $n1)' in query
+    assert 'after: $c1' in query
+
+
+def test_graphql_pages_map_to_release_lists(monkeypatch):
+    pages = {
+        ('a', 'one', None): {
+            'pageInfo': {'hasNextPage': True, 'endCursor': 'cursor-1'},
+            'nodes': [graphql_node('v3', '2025-03-01T00:00:00Z'), graphql_node('draft', None),
+                      graphql_node('v2', '2025-02-01T00:00:00Z')],
+        },
+        ('a', 'one', 'cursor-1'): {
+            'pageInfo': {'hasNextPage': False, 'endCursor': None},
+            'nodes': [graphql_node('v1', '2025-01-01T00:00:00Z')],
+        },
+        ('b', 'two', None): {
+            'pageInfo': {'hasNextPage': True, 'endCursor': 'cursor-2'},
+            'nodes': [graphql_node('v9', '2025-03-05T00:00:00Z'), graphql_node('v8', '2024-12-01T00:00:00Z')],
+        },
+    }
+    queries = []
+
+    async def fake_graphql(query, variables, session):
+        batch = []
+        data = {}
+        i = 0
+        while f"o{i}" in variables:
+            key = (variables[f"o{i}"], variables[f"n{i}"], variables[f"c{i}"])
+            batch.append(key)
+            # ('c', 'missing') does not exist, so GraphQL returns null for it
+            data[f"r{i}"] = {'releases': pages[key]} if key in pages else None
+            i += 1
+        queries.append(batch)
+        return data
+
+    monkeypatch.setattr(github_scraper, 'github_graphql', fake_graphql)
+    repos = [('a', 'one'), ('b', 'two'), ('c', 'missing')]
+    # b/two's page already reaches back to its mark, so its next page is not fetched
+    marks = {('b', 'two'): '2025-01-01T00:00:00Z'}
+    releases = asyncio.run(github_scraper.fetch_releases_graphql(repos, None, marks))
+
+    assert [r['tag_name'] for r in releases[('a', 'one')]] == ['v3', 'v2', 'v1']
+    assert [r['tag_name'] for r in releases[('b', 'two')]] == ['v9']
+    assert ('c', 'missing') not in releases
+    assert queries == [[('a', 'one', None), ('b', 'two', None), ('c', 'missing', None)], [('a', 'one', 'cursor-1')]]
+
+
+class FakeDatabase:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = []
+
+    def execute_query(self, query, params=None):
+        self.queries.append((query, params))
+        return self.rows if query.strip().startswith('SELECT') else 1
+
+
+def test_is_newer_compares_against_the_mark():
+    release = {'published_at': '2025-01-02T00:00:00Z'}
+    assert is_newer(release, None)
+    assert is_newer(release, '2025-01-01T23:59:59Z')
+    assert not is_newer(release, '2025-01-02T00:00:00Z')
+    assert not is_newer({'published_at': None}, '2025-01-01T00:00:00Z')
+
+
+def test_marks_are_loaded_per_scraper(monkeypatch):
+    database = FakeDatabase([{'owner': 'o', 'repo': 'r', 'last_published_at': datetime(2025, 1, 2, 3, 4, 5)}])
+    monkeypatch.setattr(github_scraper, 'db', database)
+    assert load_high_water_marks('stable') == {('o', 'r'): '2025-01-02T03:04:05Z'}
+    assert database.queries[0][1] == ('stable',)
+
+
+def test_full_scan_ignores_the_marks(monkeypatch):
+    database = FakeDatabase([{'owner': 'o', 'repo': 'r', 'last_published_at': datetime(2025, 1, 2)}])
+    monkeypatch.setattr(github_scraper, 'db', database)
+    monkeypatch.setattr(github_scraper, 'GITHUB_FULL_SCAN', True)
+    assert load_high_water_marks('github') == {}
+    assert database.queries == []
+
+
+def test_saved_marks_record_the_release(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(github_scraper, 'db', database)
+    save_high_water_marks('github', {('o', 'r'): {'tag_name': 'v2', 'published_at': '2025-01-02T03:04:05Z'}})
+    [(query, params)] = database.queries
+    assert 'ON DUPLICATE KEY UPDATE' in query
+    assert params == ('github', 'o', 'r', datetime(2025, 1, 2, 3, 4, 5), 'v2')
+
+
+def test_bulk_fetch_passes_each_repository_its_mark(monkeypatch):
+    calls = []
+
+    async def fake_fetch(owner, repo, session, since=None):
+        calls.append((owner, repo, since))
+        if repo == 'broken':
+            raise RuntimeError("page 2 failed")
+        return []
+
+    monkeypatch.setattr(github_scraper, 'GITHUB_FETCHER', 'rest')
+    monkeypatch.setattr(github_scraper, 'fetch_github_releases', fake_fetch)
+    marks = {('o', 'known'): '2025-01-01T00:00:00Z'}
+    results = asyncio.run(github_scraper.fetch_releases_bulk([('o', 'known'), ('o', 'new'), ('o', 'broken')], None, marks))
+    assert calls == [('o', 'known', '2025-01-01T00:00:00Z'), ('o', 'new', None), ('o', 'broken', None)]
+    # A repository that could not be read completely is reported, not truncated
+    assert results == {('o', 'known'): [], ('o', 'new'): [], ('o', 'broken'): None}
+
+
+def fetched_release(n, prerelease=False):
+    return {'tag_name': f"v{n}", 'published_at': f"2025-01-0{n}T00:00:00Z", 'prerelease': prerelease, 'source_hash': f"h{n}"}
+
+
+def test_marks_advance_to_the_newest_saved_release(monkeypatch):
+    monkeypatch.setattr(github_scraper, 'load_source_hashes', lambda database, project_id: {'v1': 'h1', 'v2': 'h2', 'v3': 'h3'})
+    # v4 is a pre-release, which is never saved
+    fetched = {('o', 'r'): {'project_id': 1, 'releases': [fetched_release(4, True), fetched_release(3), fetched_release(2)]},
+               ('o', 'quiet'): {'project_id': 2, 'releases': []}}
+    marks = settle_high_water_marks(fetched)
+    assert list(marks) == [('o', 'r')]
+    assert marks[('o', 'r')]['tag_name'] == 'v4'
+
+
+def test_marks_stop_below_the_oldest_unsaved_release(monkeypatch):
+    # v3 was saved untranslated (no hash), v5 is still waiting for a retry
+    monkeypatch.setattr(github_scraper, 'load_source_hashes', lambda database, project_id: {'v1': 'h1', 'v2': 'h2', 'v3': None, 'v4': 'h4'})
+    releases = [fetched_release(n) for n in (5, 4, 3, 2)]
+    marks = settle_high_water_marks({('o', 'r'): {'project_id': 1, 'releases': releases}})
+    assert marks[('o', 'r')]['tag_name'] == 'v2'
+
+
+def test_marks_stay_put_when_the_oldest_new_release_is_unsaved(monkeypatch):
+    monkeypatch.setattr(github_scraper, 'load_source_hashes', lambda database, project_id: {})
+    assert settle_high_water_marks({('o', 'r'): {'project_id': 1, 'releases': [fetched_release(2), fetched_release(1)]}}) == {}
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable scrape job queue and checkpointed job stages
+"""
+
+import asyncio
+import json
+
+import job_queue
+from job_queue import MAX_ATTEMPTS, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS, JobQueue, JobStage
+from pipeline import Pipeline, Stage
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((query, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    """Stands in for LockedConnection and records every statement"""
+
+    def __init__(self, claim_rows=()):
+        self.statements = []
+        self.cursor = FakeCursor(list(claim_rows))
+
+    def execute(self, query, params=None, fetch=None, dictionary=False):
+        self.statements.append((query, params))
+        return 1
+
+    def transaction(self, dictionary=False):
+        connection = self
+
+        class Transaction:
+            def __enter__(self):
+                return connection.cursor
+
+            def __exit__(self, *exc):
+                return False
+
+        return Transaction()
+
+
+def make_queue(claim_rows=()):
+    queue = JobQueue('test', worker_id='worker-1')
+    queue.connection = FakeConnection(claim_rows)
+    return queue
+
+
+def make_job(attempts=1, checkpoint=None):
+    return {'id': 7, 'key': 'owner/repo@v1', 'attempts': attempts, 'checkpoint': checkpoint}
+
+
+def test_claim_leases_due_jobs_and_decodes_them():
+    rows = [
+        {'id': 1, 'job_key': 'a', 'payload': json.dumps({'tag': 'v1'}), 'checkpoint': None, 'attempts': 0},
+        {'id': 2, 'job_key': 'b', 'payload': json.dumps({'tag': 'v2'}),
+         'checkpoint': json.dumps({'stages': ['clean'], 'item': {'tag': 'v2', 'content': 'x'}}), 'attempts': 2},
+    ]
+    queue = make_queue(rows)
+    jobs = queue.claim(10)
+
+    assert [job['tag'] for job in jobs] == ['v1', 'v2']
+    # The claim itself counts as an attempt
+    assert [job['job']['attempts'] for job in jobs] == [1, 3]
+    assert jobs[1]['job']['checkpoint']['stages'] == ['clean']
+    select, update = queue.connection.cursor.statements
+    assert 'FOR UPDATE SKIP LOCKED' in select[0]
+    assert update[1] == ('worker-1', job_queue.LEASE_SECONDS, 1, 2)
+    assert queue.claimed == 2
+
+
+def test_claim_with_nothing_due():
+    queue = make_queue()
+    assert queue.claim(10) == []
+    assert len(queue.connection.cursor.statements) == 1
+
+
+def test_fail_backs_off_exponentially():
+    queue = make_queue()
+    for attempts in (1, 2, 3):
+        queue.fail(make_job(attempts), ValueError("boom"))
+    delays = [params[:2] for _, params in queue.connection.statements]
+    assert delays == [('pending', RETRY_BASE_SECONDS), ('pending', RETRY_BASE_SECONDS * 2), ('pending', RETRY_BASE_SECONDS * 4)]
+    assert queue.retried == 3
+
+
+def test_fail_caps_the_back_off(monkeypatch):
+    monkeypatch.setattr(job_queue, 'MAX_ATTEMPTS', 100)
+    queue = make_queue()
+    queue.fail(make_job(30), ValueError("boom"))
+    assert queue.connection.statements[0][1][:2] == ('pending', RETRY_MAX_SECONDS)
+
+
+def test_fail_gives_up_at_max_attempts():
+    queue = make_queue()
+    queue.fail(make_job(MAX_ATTEMPTS), ValueError("boom"))
+    _, params = queue.connection.statements[0]
+    assert params[:3] == ('failed', 0, 'boom')
+    assert (queue.retried, queue.failed) == (0, 1)
+
+
+def test_checkpoint_stores_the_stage_output():
+    queue = make_queue()
+    job = make_job(checkpoint={'stages': ['clean'], 'item': {}})
+    queue.checkpoint(job, 'translate', {'content': '你好', 'job': job})
+    assert job['checkpoint'] == {'stages': ['clean', 'translate'], 'item': {'content': '你好'}}
+    _, params = queue.connection.statements[0]
+    assert json.loads(params[0]) == job['checkpoint']
+
+
+class FakeQueue:
+    """Records what JobStage reports instead of writing to scrape_jobs"""
+
+    def __init__(self):
+        self.checkpoints = []
+        self.completed = []
+        self.failed = []
+
+    def checkpoint(self, job, stage, item):
+        job['checkpoint'] = {'stages': ((job['checkpoint'] or {}).get('stages', [])) + [stage],
+                             'item': {k: v for k, v in item.items() if k != 'job'}}
+        self.checkpoints.append((job['id'], stage))
+
+    def complete(self, job):
+        self.completed.append(job['id'])
+
+    def fail(self, job, error):
+        self.failed.append((job['id'], str(error)))
+
+
+def run_jobs(queue, stages, jobs):
+    return asyncio.run(Pipeline('test', [JobStage(queue, stage, final=i == len(stages) - 1)
+                                         for i, stage in enumerate(stages)]).run(jobs))
+
+
+def test_checkpointed_stage_is_skipped_on_the_next_attempt():
+    calls = []
+
+    async def clean(item):
+        calls.append(('clean', item['n']))
+        return {**item, 'content': 'cleaned'}
+
+    async def translate(item):
+        calls.append(('translate', item['n']))
+        return {**item, 'content': item['content'] + ' translated'}
+
+    saved = []
+
+    async def persist(item):
+        saved.append(item['content'])
+        return item
+
+    job = make_job(attempts=2, checkpoint={'stages': ['clean'], 'item': {'n': 1, 'content': 'from checkpoint'}})
+    queue = FakeQueue()
+    run_jobs(queue, [Stage('clean', clean), Stage('translate', translate), Stage('persist', persist)],
+             [{'n': 1, 'job': job}])
+
+    assert calls == [('translate', 1)]
+    assert saved == ['from checkpoint translated']
+    assert queue.checkpoints == [(7, 'translate')]
+    assert queue.completed == [7]
+
+
+def test_failed_stage_schedules_a_retry_and_keeps_earlier_checkpoints():
+    async def clean(item):
+        return item
+
+    async def translate(item):
+        raise RuntimeError("translation unavailable")
+
+    queue = FakeQueue()
+    job = make_job()
+    stats = run_jobs(queue, [Stage('clean', clean), Stage('translate', translate), Stage('persist', clean)],
+                     [{'n': 1, 'job': job}])
+
+    assert queue.checkpoints == [(7, 'clean')]
+    assert queue.failed == [(7, 'translation unavailable')]
+    assert queue.completed == []
+    assert stats['translate']['failed'] == 1
+
+
+def test_final_stage_and_dropped_items_complete_the_job():
+    async def keep_even(item):
+        return item if item['n'] % 2 == 0 else None
+
+    queue = FakeQueue()
+    jobs = [{'n': n, 'job': {**make_job(), 'id': n}} for n in range(4)]
+    run_jobs(queue, [Stage('filter', keep_even), Stage('persist', keep_even)], jobs)
+
+    assert sorted(queue.completed) == [0, 1, 2, 3]
+    # The final stage completes jobs without a checkpoint
+    assert sorted(queue.checkpoints) == [(0, 'filter'), (2, 'filter')]
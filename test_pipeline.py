@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the scraping pipeline engine
+"""
+
+import asyncio
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+
+async def double(item):
+    return item * 2
+
+
+async def drop_odd(item):
+    return item if item % 2 == 0 else None
+
+
+def test_items_flow_through_every_stage():
+    results = []
+
+    async def collect(item):
+        results.append(item)
+        return item
+
+    stats = asyncio.run(Pipeline('test', [
+        Stage('double', double, concurrency=3),
+        Stage('collect', collect),
+    ]).run(range(10)))
+    assert sorted(results) == [i * 2 for i in range(10)]
+    assert stats['double']['processed'] == 10
+    assert stats['collect']['processed'] == 10
+
+
+def test_dropped_and_failed_items_are_counted():
+    async def fail_on_four(item):
+        if item == 4:
+            raise ValueError("boom")
+        return item
+
+    stats = asyncio.run(Pipeline('test', [
+        Stage('filter', drop_odd, concurrency=2),
+        Stage('check', fail_on_four),
+    ]).run(range(10)))
+    assert (stats['filter']['processed'], stats['filter']['dropped'], stats['filter']['failed']) == (5, 5, 0)
+    assert (stats['check']['processed'], stats['check']['dropped'], stats['check']['failed']) == (4, 0, 1)
+
+
+def test_source_error_is_raised_after_fed_items_finish():
+    results = []
+
+    async def collect(item):
+        results.append(item)
+        return item
+
+    async def source():
+        for i in range(3):
+            yield i
+        raise RuntimeError("listing failed")
+
+    with pytest.raises(RuntimeError, match="listing failed"):
+        asyncio.run(Pipeline('test', [Stage('collect', collect, concurrency=2)]).run(source()))
+    assert sorted(results) == [0, 1, 2]
+
+
+def test_thread_stage():
+    stats = asyncio.run(Pipeline('test', [
+        Stage('square', lambda item: item * item, concurrency=2, mode='thread'),
+    ]).run([1, 2, 3]))
+    assert stats['square']['processed'] == 3
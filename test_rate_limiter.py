@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared SQLite-backed token buckets that pace upstream APIs
+"""
+
+import asyncio
+
+import pytest
+
+import rate_limiter
+from rate_limiter import SharedTokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'rate_limits.sqlite3')
+
+
+def test_burst_is_free_then_callers_queue_at_the_rate(clock, db_path):
+    bucket = SharedTokenBucket('api', rate=2, burst=3, path=db_path)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    # Each further reservation waits one more refill interval
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0.5, 1.0, 1.5])
+    assert bucket.stats() == {'acquired': 6, 'waited_seconds': 3.0}
+
+
+def test_tokens_refill_over_time_up_to_burst(clock, db_path):
+    bucket = SharedTokenBucket('api', rate=2, burst=3, path=db_path)
+    for _ in range(3):
+        bucket.reserve()
+    clock.now += 1
+    assert [bucket.reserve(), bucket.reserve()] == [0, 0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    clock.now += 3600
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_buckets_with_the_same_name_share_the_budget(clock, db_path):
+    # Two processes (or scrapers) opening the same file draw from one bucket
+    first = SharedTokenBucket('github', rate=1, burst=2, path=db_path)
+    second = SharedTokenBucket('github', rate=1, burst=2, path=db_path)
+    other = SharedTokenBucket('tmt', rate=1, burst=2, path=db_path)
+    assert first.reserve() == 0
+    assert second.reserve() == 0
+    assert first.reserve() == pytest.approx(1.0)
+    assert other.reserve() == 0
+
+
+def test_acquire_async_sleeps_for_the_deficit(clock, db_path, monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, 'sleep', fake_sleep)
+    bucket = SharedTokenBucket('vscode', rate=4, burst=1, path=db_path)
+
+    async def run():
+        await bucket.acquire_async()
+        await bucket.acquire_async()
+
+    asyncio.run(run())
+    assert slept == [pytest.approx(0.25)]
+
+
+def test_invalid_limits_are_rejected(db_path):
+    with pytest.raises(ValueError):
+        SharedTokenBucket('api', rate=0, burst=1, path=db_path)
+    with pytest.raises(ValueError):
+        SharedTokenBucket('api', rate=1, burst=0, path=db_path)
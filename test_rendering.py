@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for sanitized HTML rendering of version content and its cache
+"""
+
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from rendering import HtmlRenderCache, render_markdown
+from snapshot import SNAPSHOT_SCHEMA
+
+UNSAFE_NOTES = """## Fixes
+
+- Fixed <script>alert('xss')</script> a crash
+- [Details](javascript:alert(1)) and [changelog](https://example.com/changes)
+- <img src="https://example.com/shot.png" onerror="alert(1)" alt="screenshot">
+- <a href="https://example.com" onclick="steal()">link</a>
+- <iframe src="https://evil.example"></iframe>
+"""
+
+
+def test_markdown_is_rendered():
+    html = render_markdown("## Title\n\n- one\n- **two**\n\n```python\nprint(1)\n```")
+    assert '<h2>Title</h2>' in html
+    assert '<strong>two</strong>' in html
+    assert '<code class="language-python">' in html
+
+
+def test_unsafe_markup_is_stripped():
+    html = render_markdown(UNSAFE_NOTES)
+    assert '<script' not in html
+    assert '<iframe' not in html
+    assert 'javascript:' not in html
+    assert 'onerror' not in html
+    assert 'onclick' not in html
+    assert '<a href="https://example.com/changes">changelog</a>' in html
+    assert 'src="https://example.com/shot.png"' in html
+
+
+def test_empty_content():
+    assert render_markdown(None) == ''
+
+
+def test_cache_hits_until_content_changes():
+    cache = HtmlRenderCache()
+    first = cache.render(1, "# One")
+    assert cache.render(1, "# One") is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.render(1, "# One, edited") == '<h1>One, edited</h1>'
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = HtmlRenderCache(max_entries=2)
+    cache.render(1, "a")
+    cache.render(2, "b")
+    cache.render(1, "a")
+    cache.render(3, "c")
+    assert list(cache.entries) == [1, 3]
+    cache.invalidate(1)
+    assert list(cache.entries) == [3]
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    import main
+    from admission import ClientRateLimiter
+    path = str(tmp_path / 'snapshot.sqlite3')
+    connection = sqlite3.connect(path)
+    connection.executescript(SNAPSHOT_SCHEMA)
+    connection.execute("INSERT INTO projects (id, icon, name, slug, latest_version, latest_update_time) "
+                       "VALUES (1, 'PY', 'alpha', 'alpha', 'v1.0.0', '2025-01-01')")
+    connection.execute("INSERT INTO versions (id, project_id, version, update_time, content, download_url) "
+                       "VALUES (7, 1, 'v1.0.0', '2025-01-01', ?, 'https://example.com/1.zip')", (UNSAFE_NOTES,))
+    connection.commit()
+    connection.close()
+    monkeypatch.setattr(main, 'SNAPSHOT_PATH', path)
+    monkeypatch.setattr(main, 'html_cache', HtmlRenderCache())
+    monkeypatch.setattr(main.admission, 'client_limiter', ClientRateLimiter(rate=1000, burst=1000))
+    return main
+
+
+def test_api_serves_sanitized_html_from_the_cache(api):
+    client = TestClient(api.app)
+    first = client.get('/projects/1/versions', params={'format': 'html'}).json()[0]['content']
+    assert first.startswith('<h2>Fixes</h2>')
+    assert '<script' not in first
+    second = client.get('/projects/alpha', params={'format': 'html'}).json()['versions'][0]['content']
+    assert second == first
+    assert (api.html_cache.hits, api.html_cache.misses) == (1, 1)
+
+
+def test_api_defaults_to_markdown(api):
+    client = TestClient(api.app)
+    assert client.get('/projects/1/versions').json()[0]['content'] == UNSAFE_NOTES
+    assert client.get('/projects/1/versions', params={'format': 'pdf'}).status_code == 422
+    assert api.html_cache.misses == 0
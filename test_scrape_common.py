@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for batched version persistence in the scraping pipelines
+"""
+
+import asyncio
+import time
+from datetime import date
+
+import pytest
+
+from content_codec import decompress_content
+from pipeline import Pipeline, Stage
+from scrape_common import PersistStage, save_versions_to_db
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.connected = False
+
+    def connect(self):
+        self.connected = True
+        return True
+
+    def disconnect(self):
+        self.connected = False
+
+
+def make_persist(save, **kwargs):
+    persist = PersistStage(save=save, **kwargs)
+    persist.database = FakeDatabase()
+    return persist
+
+
+async def passthrough(item):
+    return item
+
+
+def test_flushes_full_batches_and_the_rest_when_input_ends():
+    batches = []
+
+    def save(items, database):
+        assert database.connected
+        batches.append(list(items))
+        return True
+
+    start_time = time.time()
+    with make_persist(save, batch_size=3, flush_seconds=30) as persist:
+        stats = asyncio.run(Pipeline('test', [Stage('source', passthrough), persist]).run(range(7)))
+
+    # The last partial batch does not wait for the 30 second timer
+    assert time.time() - start_time < 5
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert sorted(item for batch in batches for item in batch) == list(range(7))
+    assert stats['persist']['processed'] == 7
+    assert stats['persist']['flushes'] == 3
+    assert not persist.database.connected
+
+
+def test_flushes_a_partial_batch_after_flush_seconds():
+    flushed_at = []
+
+    def save(items, database):
+        flushed_at.append((len(items), time.time()))
+        return True
+
+    async def run(persist):
+        start_time = time.time()
+        # The item is still being awaited, so only the timer can flush it
+        result = await asyncio.wait_for(persist.call('v1'), timeout=5)
+        assert result == 'v1'
+        return start_time
+
+    with make_persist(save, batch_size=10, flush_seconds=0.1) as persist:
+        start_time = asyncio.run(run(persist))
+    assert len(flushed_at) == 1
+    assert flushed_at[0][0] == 1
+    assert flushed_at[0][1] - start_time >= 0.1
+
+
+def test_failed_flush_fails_every_item_in_the_batch():
+    def save(items, database):
+        return False
+
+    with make_persist(save, batch_size=2, flush_seconds=30) as persist:
+        stats = asyncio.run(Pipeline('test', [Stage('source', passthrough), persist]).run(range(4)))
+    assert stats['persist']['failed'] == 4
+    assert stats['persist']['processed'] == 0
+
+
+def test_save_exception_reaches_the_caller():
+    def save(items, database):
+        raise ValueError("deadlock")
+
+    async def run(persist):
+        with pytest.raises(ValueError, match="deadlock"):
+            await persist.call('v1')
+
+    with make_persist(save, batch_size=1) as persist:
+        asyncio.run(run(persist))
+
+
+class RecordingDatabase:
+    """Records execute_many calls; returns `affected` like Database.execute_many"""
+
+    def __init__(self, affected=1):
+        self.affected = affected
+        self.calls = []
+
+    def execute_many(self, query, rows):
+        self.calls.append((query, rows))
+        return self.affected
+
+
+def make_version(version, content="## Notes", source_hash="abc"):
+    return {'project_id': 3, 'version': version, 'update_date': date(2025, 1, 2), 'content': content,
+            'download_url': f"https://example.com/{version}.zip", 'source_hash': source_hash}
+
+
+def test_upsert_sends_every_version_in_one_statement():
+    database = RecordingDatabase(affected=3)
+    content = "Release notes " * 100
+    assert save_versions_to_db([make_version('v1'), make_version('v2', content, None)], database)
+
+    [(query, rows)] = database.calls
+    assert query.startswith("INSERT INTO versions")
+    assert "ON DUPLICATE KEY UPDATE" in query
+    assert "content = VALUES(content)" in query
+    assert "source_hash = VALUES(source_hash)" in query
+    assert [row[1] for row in rows] == ['v1', 'v2']
+    assert rows[1][5] is None
+    # Content is stored through the codec
+    assert decompress_content(rows[1][3]) == content
+
+
+def test_upsert_without_overwrite_keeps_existing_rows():
+    database = RecordingDatabase()
+    assert save_versions_to_db([make_version('v1')], database, overwrite=False)
+    query, _ = database.calls[0]
+    assert query.endswith("ON DUPLICATE KEY UPDATE id = id")
+
+
+def test_upsert_reports_failure_and_skips_empty_batches():
+    assert not save_versions_to_db([make_version('v1')], RecordingDatabase(affected=None))
+    database = RecordingDatabase()
+    assert save_versions_to_db([], database)
+    assert database.calls == []
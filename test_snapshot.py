@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for building and serving the read-only SQLite snapshot
+"""
+
+import os
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+import snapshot
+from content_codec import compress_content
+from snapshot import SnapshotDatabase, build_snapshot
+
+
+class FakeMySQL:
+    """Streams fixed rows for the tables build_snapshot copies"""
+
+    def __init__(self, projects, versions, fail=False):
+        self.tables = {'projects': projects, 'versions': versions}
+        self.fail = fail
+        self.connected = False
+
+    def connect(self):
+        self.connected = True
+        return True
+
+    def disconnect(self):
+        self.connected = False
+
+    def iter_query(self, query, params=None, chunk_size=500, row_type='dict'):
+        table = query.split(' FROM ')[1]
+        for i, row in enumerate(self.tables[table]):
+            if self.fail and table == 'versions' and i == 1:
+                raise RuntimeError("Lost connection to MySQL server during query")
+            yield row
+
+
+def catalog(latest_version):
+    projects = [(1, 'PY', 'alpha', 'alpha', latest_version, date(2025, 3, 1), 'About alpha', None, 'me', 'Tool')]
+    versions = [
+        (10, 1, 'v1.0.0', date(2025, 1, 1), compress_content("First release " * 40), 'https://example.com/1.zip'),
+        (11, 1, latest_version, date(2025, 3, 1), compress_content("Latest release"), 'https://example.com/2.zip'),
+    ]
+    return projects, versions
+
+
+def build(monkeypatch, path, latest_version='v2.0.0', fail=False):
+    mysql = FakeMySQL(*catalog(latest_version), fail=fail)
+    monkeypatch.setattr(snapshot, 'db', mysql)
+    result = build_snapshot(path, batch_size=1)
+    assert not mysql.connected
+    return result
+
+
+def read_latest(path):
+    database = SnapshotDatabase(path)
+    assert database.connect()
+    try:
+        return database.execute_query("SELECT latest_version FROM projects WHERE id = %s", (1,))[0]['latest_version']
+    finally:
+        database.disconnect()
+
+
+def test_snapshot_copies_projects_and_versions(monkeypatch, tmp_path):
+    path = str(tmp_path / 'snapshot.sqlite3')
+    assert build(monkeypatch, path)
+    database = SnapshotDatabase(path)
+    database.connect()
+    try:
+        project = database.execute_query("SELECT * FROM projects WHERE slug = %s", ('alpha',))[0]
+        assert project['latest_update_time'] == '2025-03-01'
+        rows = list(database.iter_query("SELECT id, version FROM versions ORDER BY update_time DESC", row_type='tuple'))
+        assert rows == [(11, 'v2.0.0'), (10, 'v1.0.0')]
+        row = next(database.iter_query("SELECT id, version FROM versions ORDER BY id", row_type='namedtuple'))
+        assert (row.id, row.version) == (10, 'v1.0.0')
+    finally:
+        database.disconnect()
+    assert os.listdir(tmp_path) == ['snapshot.sqlite3']
+
+
+def test_rebuild_swaps_the_file_atomically(monkeypatch, tmp_path):
+    path = str(tmp_path / 'snapshot.sqlite3')
+    assert build(monkeypatch, path, 'v2.0.0')
+    reader = SnapshotDatabase(path)
+    reader.connect()
+    try:
+        assert build(monkeypatch, path, 'v3.0.0')
+        # A reader that opened the old file keeps reading it; new readers see the new one
+        assert reader.execute_query("SELECT latest_version FROM projects")[0]['latest_version'] == 'v2.0.0'
+        assert read_latest(path) == 'v3.0.0'
+    finally:
+        reader.disconnect()
+
+
+def test_failed_build_keeps_the_previous_snapshot(monkeypatch, tmp_path):
+    path = str(tmp_path / 'snapshot.sqlite3')
+    assert build(monkeypatch, path, 'v2.0.0')
+    assert not build(monkeypatch, path, 'v3.0.0', fail=True)
+    assert read_latest(path) == 'v2.0.0'
+    # The half-written temporary file is removed
+    assert os.listdir(tmp_path) == ['snapshot.sqlite3']
+
+
+def test_snapshot_rejects_writes(monkeypatch, tmp_path):
+    path = str(tmp_path / 'snapshot.sqlite3')
+    assert build(monkeypatch, path)
+    database = SnapshotDatabase(path)
+    database.connect()
+    try:
+        assert database.execute_query("DELETE FROM projects") is None
+        assert database.execute_query("SELECT COUNT(*) AS total FROM projects")[0]['total'] == 1
+    finally:
+        database.disconnect()
+
+
+def test_missing_snapshot_fails_to_open(tmp_path):
+    assert not SnapshotDatabase(str(tmp_path / 'missing.sqlite3')).connect()
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    import main
+    from admission import ClientRateLimiter
+    path = str(tmp_path / 'snapshot.sqlite3')
+    assert build(monkeypatch, path)
+    monkeypatch.setattr(main, 'SNAPSHOT_PATH', path)
+    monkeypatch.setattr(main, 'SNAPSHOT_WRITES', 'reject')
+    monkeypatch.setattr(main.admission, 'client_limiter', ClientRateLimiter(rate=1000, burst=1000))
+    return TestClient(main.app)
+
+
+def test_api_reads_come_from_the_snapshot(api):
+    project = api.get('/projects/alpha').json()
+    assert project['latest_version'] == 'v2.0.0'
+    assert [v['version'] for v in project['versions']] == ['v2.0.0', 'v1.0.0']
+    assert project['versions'][1]['content'].startswith('First release')
+    page = api.get('/projects').json()
+    assert (page['total'], page['data'][0]['slug']) == (1, 'alpha')
+
+
+def test_api_writes_are_rejected_with_503(api):
+    version = {'project_id': 1, 'version': 'v9.0.0', 'update_time': '2025-04-01',
+               'content': 'New', 'download_url': 'https://example.com/9.zip'}
+    assert api.post('/versions', json=version).status_code == 503
+    assert api.put('/versions/10', json=version).status_code == 503
+    assert api.delete('/versions/10').status_code == 503
+    assert api.get('/projects/1/versions').json()[0]['version'] == 'v2.0.0'
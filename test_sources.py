@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the adaptive polling interval of release sources
+"""
+
+from datetime import datetime, timedelta
+
+from sources import (BACKOFF_FACTOR, CADENCE_ALPHA, MAX_POLL_SECONDS,
+                     MIN_POLL_SECONDS, POLLS_PER_RELEASE, next_interval,
+                     update_cadence)
+
+DAY = 24 * 3600
+
+
+def test_cadence_starts_from_first_gap():
+    start = datetime(2025, 1, 1)
+    times = [start, start + timedelta(days=2)]
+    assert update_cadence(None, None, times) == 2 * DAY
+
+
+def test_cadence_is_an_exponential_average():
+    start = datetime(2025, 1, 1)
+    cadence = update_cadence(10 * DAY, start, [start + timedelta(days=2)])
+    assert cadence == CADENCE_ALPHA * 2 * DAY + (1 - CADENCE_ALPHA) * 10 * DAY
+
+
+def test_cadence_ignores_releases_not_newer_than_the_last_one():
+    last = datetime(2025, 1, 10)
+    assert update_cadence(DAY, last, [datetime(2025, 1, 5), last]) == DAY
+
+
+def test_cadence_unchanged_without_releases():
+    assert update_cadence(None, None, []) is None
+    assert update_cadence(3 * DAY, datetime(2025, 1, 1), []) == 3 * DAY
+
+
+def test_cadence_sorts_release_times():
+    start = datetime(2025, 1, 1)
+    times = [start + timedelta(days=4), start, start + timedelta(days=2)]
+    assert update_cadence(None, None, times) == CADENCE_ALPHA * 2 * DAY + (1 - CADENCE_ALPHA) * 2 * DAY
+
+
+def test_new_release_polls_several_times_per_cadence():
+    source = {'poll_interval_seconds': None}
+    assert next_interval(source, 8 * DAY, True) == 8 * DAY / POLLS_PER_RELEASE
+
+
+def test_new_release_without_cadence_polls_at_minimum():
+    assert next_interval({'poll_interval_seconds': 5 * DAY}, None, True) == MIN_POLL_SECONDS
+
+
+def test_quiet_poll_backs_off():
+    source = {'poll_interval_seconds': 4 * 3600}
+    assert next_interval(source, DAY, False) == int(4 * 3600 * BACKOFF_FACTOR)
+
+
+def test_quiet_poll_of_a_new_source_starts_from_minimum():
+    assert next_interval({'poll_interval_seconds': None}, None, False) == int(MIN_POLL_SECONDS * BACKOFF_FACTOR)
+
+
+def test_interval_is_clamped():
+    assert next_interval({'poll_interval_seconds': None}, 60, True) == MIN_POLL_SECONDS
+    assert next_interval({'poll_interval_seconds': MAX_POLL_SECONDS}, None, False) == MAX_POLL_SECONDS
+    assert next_interval({'poll_interval_seconds': None}, 100 * MAX_POLL_SECONDS, True) == MAX_POLL_SECONDS
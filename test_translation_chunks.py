@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for splitting long release notes into translation chunks and joining the results
+"""
+
+import pytest
+
+from translation import join_chunks, split_into_chunks
+
+
+def test_short_text_is_one_chunk():
+    assert split_into_chunks("Hello\n\nWorld", 100) == ["Hello\n\nWorld"]
+
+
+def test_paragraphs_are_packed_up_to_the_limit():
+    paragraphs = ["a" * 40, "b" * 40, "c" * 40]
+    chunks = split_into_chunks("\n\n".join(paragraphs), 90)
+    # Two paragraphs plus the separator fit in 90 characters, three do not
+    assert chunks == ["a" * 40 + "\n\n" + "b" * 40, "c" * 40]
+
+
+def test_exact_fit_stays_in_one_chunk():
+    text = "a" * 44 + "\n\n" + "b" * 44
+    assert split_into_chunks(text, 90) == [text]
+    assert split_into_chunks(text, 89) == ["a" * 44, "b" * 44]
+
+
+def test_oversized_paragraph_is_cut_on_line_breaks():
+    lines = [f"- item {i:03d}" for i in range(50)]
+    chunks = split_into_chunks("\n".join(lines), 100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    # No line is split in the middle
+    assert [line for chunk in chunks for line in chunk.split("\n")] == lines
+
+
+def test_oversized_paragraph_without_line_breaks_is_hard_cut():
+    chunks = split_into_chunks("x" * 250, 100)
+    assert chunks == ["x" * 100, "x" * 100, "x" * 50]
+
+
+def test_pending_chunk_is_flushed_before_an_oversized_paragraph():
+    chunks = split_into_chunks("intro\n\n" + "x" * 150, 100)
+    assert chunks == ["intro", "x" * 100, "x" * 50]
+
+
+def test_no_content_is_lost():
+    text = "\n\n".join(f"Paragraph {i}\n" + "word " * (i * 7) for i in range(30))
+    chunks = split_into_chunks(text, 120)
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_join_single_chunk_requires_chinese():
+    assert join_chunks(["Hello"], ["你好"]) == "你好"
+    with pytest.raises(ValueError):
+        join_chunks(["Hello"], ["Hello"])
+
+
+def test_join_keeps_order_and_falls_back_to_originals():
+    assert join_chunks(["one", "two", "three"], ["一", "", "三"]) == "一\n\ntwo\n\n三"
@@ -0,0 +1,285 @@
+"""
+Tencent Cloud translation service
+One long-lived service shared by every scraper: TMT clients are created once
+and pooled, blocking SDK calls run on a single shared thread pool, and the
+async API caps how many translations are in flight at a time. Long texts
+are split into chunks that are translated concurrently, and short texts
+from different callers are packed into TextTranslateBatch requests.
+"""
+
+import asyncio
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from tencentcloud.common import credential
+from tencentcloud.common.profile.client_profile import ClientProfile
+from tencentcloud.common.profile.http_profile import HttpProfile
+from tencentcloud.tmt.v20180321 import tmt_client, models
+
+from rate_limiter import tmt_limiter
+from translation_cache import translation_cache
+
+load_dotenv()
+
+# TextTranslate accepts up to 6000 characters; leave some buffer
+MAX_TEXT_LENGTH = 5000
+
+# TextTranslateBatch limits the combined length of SourceTextList the same way
+BATCH_MAX_CHARS = 5000
+# Texts up to this size wait briefly to share a batch request with others
+BATCH_ITEM_MAX_CHARS = int(os.getenv('TMT_BATCH_ITEM_MAX_CHARS', 1000))
+BATCH_WINDOW = float(os.getenv('TMT_BATCH_WINDOW', 0.05))
+
+# Part of the translation cache key, so a different engine never reuses entries
+ENGINE = 'tencent-tmt'
+
+
+def contains_chinese(text):
+    return any('\u4e00' <= char <= '\u9fff' for char in text)
+
+
+class TranslationService:
+    """Pooled, thread-safe wrapper around the TMT TextTranslate API"""
+
+    def __init__(self, max_concurrency=None, cache=None):
+        self.cache = cache
+        self.max_concurrency = max_concurrency or int(os.getenv('TMT_MAX_CONCURRENCY', 5))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='translate')
+        self.clients = queue.SimpleQueue()
+        # Created lazily so they bind to the running event loop
+        self._loop = None
+        self._semaphore = None
+        self._pending = []
+        self._pending_chars = 0
+        self._flush_handle = None
+        self._batch_tasks = set()
+        self.requests = 0
+        self.batch_requests = 0
+        self.batched_texts = 0
+
+    def _new_client(self):
+        secret_id = os.getenv('TENCENT_SECRET_ID')
+        secret_key = os.getenv('TENCENT_SECRET_KEY')
+        region = os.getenv('TENCENT_REGION', 'ap-beijing')
+
+        if not secret_id or not secret_key:
+            raise ValueError("Tencent translation credentials not found")
+
+        cred = credential.Credential(secret_id, secret_key)
+        http_profile = HttpProfile(endpoint="tmt.tencentcloudapi.com")
+        client_profile = ClientProfile(httpProfile=http_profile)
+        return tmt_client.TmtClient(cred, region, client_profile)
+
+    def _call(self, method, req):
+        """Run one SDK call on a pooled client, within the shared TMT rate limit"""
+        tmt_limiter.acquire()
+        try:
+            client = self.clients.get_nowait()
+        except queue.Empty:
+            client = self._new_client()
+        try:
+            req.ProjectId = 0
+            self.requests += 1
+            return getattr(client, method)(req)
+        finally:
+            # Clients are stateless between calls, so they can be reused freely
+            self.clients.put(client)
+
+    def _request(self, text, source="en", target="zh"):
+        """One TextTranslate call"""
+        req = models.TextTranslateRequest()
+        req.SourceText = text
+        req.Source = source
+        req.Target = target
+        return self._call('TextTranslate', req).TargetText
+
+    def _request_batch(self, texts, source="en", target="zh"):
+        """One TextTranslateBatch call; results come back in input order"""
+        req = models.TextTranslateBatchRequest()
+        req.SourceTextList = texts
+        req.Source = source
+        req.Target = target
+        target_texts = self._call('TextTranslateBatch', req).TargetTextList
+        if not target_texts or len(target_texts) != len(texts):
+            raise ValueError(f"Batch translation returned {len(target_texts or [])} texts for {len(texts)}")
+        return target_texts
+
+    def _cache_get(self, text):
+        if self.cache:
+            return self.cache.get(text, "en", "zh", ENGINE)
+        return None
+
+    def _cache_put(self, text, target_text):
+        # Only keep results that look like real translations
+        if self.cache and target_text and contains_chinese(target_text):
+            self.cache.put(text, "en", "zh", ENGINE, target_text)
+
+    def _translate_chunk(self, text):
+        """Translate one request-sized text, answering from the cache when possible"""
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+        target_text = self._request(text)
+        self._cache_put(text, target_text)
+        return target_text
+
+    def translate_sync(self, text):
+        """Translate text to Chinese, splitting it into chunks when too long (blocking)"""
+        if not needs_translation(text):
+            return text
+
+        try:
+            chunks = split_into_chunks(text, MAX_TEXT_LENGTH)
+            if len(chunks) > 1:
+                print(f"    Text is too long ({len(text)} chars), translating {len(chunks)} chunks...")
+            return join_chunks(chunks, [self._translate_chunk(chunk) for chunk in chunks])
+        except Exception as e:
+            print(f"Translation error occurred: {e}")
+            raise
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._pending = []
+            self._pending_chars = 0
+            self._flush_handle = None
+        return loop
+
+    async def _run_limited(self, func, *args):
+        """Run a blocking SDK call on the shared pool, within the concurrency limit"""
+        async with self._semaphore:
+            return await self._loop.run_in_executor(self.executor, func, *args)
+
+    def _enqueue_batch(self, text):
+        """Add a short text to the batch being collected and return its future"""
+        if self._pending and self._pending_chars + len(text) > BATCH_MAX_CHARS:
+            self._flush_batch()
+        future = self._loop.create_future()
+        self._pending.append((text, future))
+        self._pending_chars += len(text)
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(BATCH_WINDOW, self._flush_batch)
+        return future
+
+    def _flush_batch(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending, self._pending_chars = self._pending, [], 0
+        if pending:
+            # Keep a reference so the task is not garbage collected mid-flight
+            task = self._loop.create_task(self._send_batch(pending))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, pending):
+        texts = [text for text, _ in pending]
+        try:
+            if len(texts) == 1:
+                results = [await self._run_limited(self._request, texts[0])]
+            else:
+                results = await self._run_limited(self._request_batch, texts)
+                self.batch_requests += 1
+                self.batched_texts += len(texts)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _translate_piece(self, text):
+        cached = await self._loop.run_in_executor(self.executor, self._cache_get, text)
+        if cached is not None:
+            return cached
+        if len(text) <= BATCH_ITEM_MAX_CHARS:
+            target_text = await self._enqueue_batch(text)
+        else:
+            target_text = await self._run_limited(self._request, text)
+        await self._loop.run_in_executor(self.executor, self._cache_put, text, target_text)
+        return target_text
+
+    async def translate(self, text):
+        """Async translation; chunks of long texts are translated concurrently"""
+        if not needs_translation(text):
+            return text
+        self._bind_loop()
+
+        try:
+            chunks = split_into_chunks(text, MAX_TEXT_LENGTH)
+            if len(chunks) > 1:
+                print(f"    Text is too long ({len(text)} chars), translating {len(chunks)} chunks concurrently...")
+            results = await asyncio.gather(*(self._translate_piece(chunk) for chunk in chunks))
+            return join_chunks(chunks, results)
+        except Exception as e:
+            print(f"Translation error occurred: {e}")
+            raise
+
+    def report(self):
+        """Print API usage and cache effectiveness for this run"""
+        print(f"Translation: {self.requests} TMT requests "
+              f"({self.batch_requests} batches carrying {self.batched_texts} texts)")
+        if self.cache:
+            print(f"Translation cache: {self.cache.stats()}")
+
+
+def needs_translation(text):
+    return bool(text) and isinstance(text, str) and any(c.isalpha() for c in text)
+
+
+def join_chunks(chunks, results):
+    """Reassemble translated chunks in order, keeping originals for empty results"""
+    if len(chunks) == 1:
+        target_text = results[0]
+        if target_text and contains_chinese(target_text):
+            return target_text
+        raise ValueError(f"Translation result did not contain Chinese characters. API response: {target_text}")
+    return '\n\n'.join(result or chunk for chunk, result in zip(chunks, results))
+
+
+def split_into_chunks(text, max_length):
+    """Split text on paragraph boundaries into chunks of at most max_length"""
+    chunks = []
+    current_chunk = ""
+
+    for para in text.split('\n\n'):
+        # A single oversized paragraph is cut on line breaks, then hard-cut
+        while len(para) > max_length:
+            cut = para.rfind('\n', 0, max_length)
+            cut = cut if cut > 0 else max_length
+            if current_chunk:
+                chunks.append(current_chunk)
+                current_chunk = ""
+            chunks.append(para[:cut])
+            para = para[cut:].lstrip('\n')
+
+        # If adding this paragraph would exceed the limit, save current chunk and start new one
+        if len(current_chunk) + len(para) + 2 > max_length and current_chunk:
+            chunks.append(current_chunk)
+            current_chunk = para
+        else:
+            current_chunk = f"{current_chunk}\n\n{para}" if current_chunk else para
+
+    # Add the last chunk
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+translator = TranslationService(cache=translation_cache)
+
+
+def translate_to_chinese_sync(text):
+    """Translate text to Chinese using the shared service (blocking)"""
+    return translator.translate_sync(text)
+
+
+async def translate_to_chinese(text):
+    """Translate text to Chinese using the shared service"""
+    return await translator.translate(text)
@@ -0,0 +1,108 @@
+"""
+Persistent translation cache
+Translations are stored in MySQL keyed by a hash of the engine, language
+direction and source text, so re-running a scraper over unchanged release
+notes is answered from the table instead of calling Tencent TMT again.
+Entries that have not been used for TRANSLATION_CACHE_TTL_DAYS are pruned.
+"""
+
+import hashlib
+import os
+
+from database import LockedConnection
+
+
+def cache_key(text, source, target, engine):
+    """Content address of one translation"""
+    return hashlib.sha256(f"{engine}\0{source}\0{target}\0{text}".encode('utf-8')).hexdigest()
+
+
+class TranslationCache:
+    """MySQL-backed translation store shared by every scraper
+
+    It uses a dedicated LockedConnection, so translation worker threads can
+    use it without touching the scraper's own connection. If the database is
+    unreachable the cache turns itself off and translation carries on
+    uncached.
+    """
+
+    def __init__(self, ttl_days=180, enabled=True):
+        self.ttl_days = ttl_days
+        self.enabled = enabled
+        self.connection = LockedConnection(on_connect=self.prune)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _available(self):
+        if self.enabled and not self.connection.ensure_connected():
+            print("Translation cache unavailable, translating without it")
+            self.enabled = False
+        return self.enabled
+
+    def get(self, text, source, target, engine):
+        """Return the cached translation, or None on a miss"""
+        if not self.enabled:
+            return None
+        key = cache_key(text, source, target, engine)
+        try:
+            if not self._available():
+                return None
+            row = self.connection.execute("SELECT translated_text FROM translation_cache WHERE cache_key = %s", (key,), fetch='one')
+            if row is None:
+                self.misses += 1
+                return None
+            self.connection.execute("UPDATE translation_cache SET hits = hits + 1, last_used_at = NOW() WHERE cache_key = %s", (key,))
+            self.hits += 1
+            return row[0]
+        except Exception as e:
+            print(f"Translation cache lookup failed: {e}")
+            self.misses += 1
+            return None
+
+    def put(self, text, source, target, engine, translated_text):
+        if not self.enabled or not translated_text:
+            return
+        key = cache_key(text, source, target, engine)
+        try:
+            if not self._available():
+                return
+            self.connection.execute(
+                "INSERT INTO translation_cache (cache_key, engine, source_lang, target_lang, source_length, translated_text) "
+                "VALUES (%s, %s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE translated_text = VALUES(translated_text), last_used_at = NOW()",
+                (key, engine, source, target, len(text), translated_text)
+            )
+            self.stores += 1
+        except Exception as e:
+            print(f"Translation cache store failed: {e}")
+
+    def prune(self):
+        """Expire entries that have not been used within the TTL"""
+        try:
+            removed = self.connection.execute(
+                "DELETE FROM translation_cache WHERE last_used_at < NOW() - INTERVAL %s DAY",
+                (self.ttl_days,)
+            )
+            if removed:
+                print(f"Pruned {removed} expired translation cache entries")
+        except Exception as e:
+            print(f"Translation cache prune failed: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+translation_cache = TranslationCache(
+    ttl_days=int(os.getenv('TRANSLATION_CACHE_TTL_DAYS', 180)),
+    enabled=os.getenv('TRANSLATION_CACHE', 'on').lower() not in ('0', 'off', 'false'),
+)